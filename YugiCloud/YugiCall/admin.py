@@ -5,12 +5,25 @@ from django.contrib import admin
 from django.contrib import admin
 from .models import Card, CardSet
 
+# Recherche indexée, comptes estimés, filtres en cache, inlines paginés
+from .admin_tools import (
+    EstimatedCountPaginator,
+    FastSearchMixin,
+    PaginatedInlineMixin,
+    cached_filters,
+)
+
+# Aide affichée sous la barre de recherche des listes
+CARD_SEARCH_HELP = "Début du nom (sans casse ni accents), début de l'archétype ou id exact. Préfixer par * pour chercher partout (lent)."
+SET_SEARCH_HELP = "Début du code set ou du nom d'extension, ou id de carte. Préfixer par * pour chercher partout (lent)."
+
 
 # === Configuration pour CardSet ===
-class CardSetInline(admin.TabularInline):
+class CardSetInline(PaginatedInlineMixin, admin.TabularInline):
     """
     Permet d’afficher/éditer les sets directement dans la page d’admin d’une Card.
     TabularInline = affichage sous forme de tableau.
+    Paginé : on ne charge que per_page éditions à la fois.
     """
     model = CardSet
     extra = 1   # combien de lignes vides afficher pour ajouter de nouveaux sets
@@ -18,16 +31,20 @@ class CardSetInline(admin.TabularInline):
 
 # === Configuration pour Card ===
 @admin.register(Card)
-class CardAdmin(admin.ModelAdmin):
+class CardAdmin(FastSearchMixin, admin.ModelAdmin):
     """
     Affichage personnalisé du modèle Card dans l’admin.
     """
     # Colonnes visibles dans la liste des cartes
     list_display = ("id", "name", "type", "atk", "def_stat", "level", "race", "attribute")
-    # Champs sur lesquels on peut rechercher
+    # Recherche par défaut : préfixe du nom (index) ou id ; "*terme" → ces champs en "contient"
+    prefix_search_fields = ("name_key", "archetype")
     search_fields = ("name", "type", "race", "attribute")
-    # Filtres sur la droite
-    list_filter = ("type", "race", "attribute", "level")
+    search_help_text = CARD_SEARCH_HELP
+    # Filtres sur la droite (valeurs mises en cache par version du catalogue)
+    list_filter = cached_filters("type", "race", "attribute", "level", "archetype", "ban_tcg")
+    # Nombre total estimé (pas de COUNT(*) complet sur la liste non filtrée)
+    paginator = EstimatedCountPaginator
     # Lien direct dans la liste (clickable)
     list_display_links = ("id", "name")
     # Inline pour afficher les sets associés
@@ -36,13 +53,21 @@ class CardAdmin(admin.ModelAdmin):
 
 # === Configuration pour CardSet ===
 @admin.register(CardSet)
-class CardSetAdmin(admin.ModelAdmin):
+class CardSetAdmin(FastSearchMixin, admin.ModelAdmin):
     """
     Affichage personnalisé du modèle CardSet (si on veut les gérer séparément).
     """
     list_display = ("card", "set_name", "set_code", "set_rarity", "set_price")
+    prefix_search_fields = ("set_code", "set_name_key")
+    id_search_field = "card__id"
     search_fields = ("set_name", "set_code", "set_rarity")
-    list_filter = ("set_rarity",)
+    search_help_text = SET_SEARCH_HELP
+    list_filter = cached_filters("set_rarity")
+    paginator = EstimatedCountPaginator
+    # La carte est affichée sur chaque ligne : jointure plutôt qu'une requête par ligne
+    list_select_related = ("card",)
+    # Pas de <select> avec toutes les cartes sur la page d'édition
+    autocomplete_fields = ("card",)
 
 # --- AJOUT : enregistrement des modèles EN ---
 
@@ -50,9 +75,9 @@ class CardSetAdmin(admin.ModelAdmin):
 from .models import CardEN, CardSetEN
 
 
-class CardSetENInline(admin.TabularInline):
+class CardSetENInline(PaginatedInlineMixin, admin.TabularInline):
     """
-    Inline pour voir/éditer les impressions EN d'une carte EN.
+    Inline pour voir/éditer les impressions EN d'une carte EN (paginé).
     """
     model = CardSetEN
     extra = 1
@@ -61,24 +86,93 @@ class CardSetENInline(admin.TabularInline):
 
 
 @admin.register(CardEN)
-class CardENAdmin(admin.ModelAdmin):
+class CardENAdmin(FastSearchMixin, admin.ModelAdmin):
     """
     Admin pour les cartes EN (structure identique au FR).
     """
     list_display = ("id", "name", "type", "atk", "def_stat", "level", "race", "attribute")
+    prefix_search_fields = ("name_key", "archetype")
     search_fields = ("name", "type", "race", "attribute", "id", "desc")
-    list_filter = ("type", "race", "attribute", "level")
+    search_help_text = CARD_SEARCH_HELP
+    list_filter = cached_filters("type", "race", "attribute", "level", "archetype", "ban_tcg")
+    paginator = EstimatedCountPaginator
     list_display_links = ("id", "name")
     inlines = [CardSetENInline]
 
 
 @admin.register(CardSetEN)
-class CardSetENAdmin(admin.ModelAdmin):
+class CardSetENAdmin(FastSearchMixin, admin.ModelAdmin):
     """
     Admin pour les sets EN liés aux cartes EN.
     """
     list_display = ("card", "set_name", "set_code", "set_rarity", "set_price")
+    prefix_search_fields = ("set_code", "set_name_key")
+    id_search_field = "card__id"
     search_fields = ("set_name", "set_code", "set_rarity", "card__name", "card__id")
-    list_filter = ("set_rarity",)
+    search_help_text = SET_SEARCH_HELP
+    list_filter = cached_filters("set_rarity")
+    paginator = EstimatedCountPaginator
     autocomplete_fields = ("card",)
     list_select_related = ("card",)
+
+
+# --- Journal des synchronisations ---
+
+from django.template.response import TemplateResponse
+
+from .models import SetSummary, SyncRun
+
+
+@admin.register(SetSummary)
+class SetSummaryAdmin(FastSearchMixin, admin.ModelAdmin):
+    """
+    Résumés par extension (recalculés par la synchro, lecture seule).
+    Recherche : début du code produit ou du nom (sans casse ni accents).
+    """
+    list_display = ("code", "set_name", "lang", "card_count", "printings", "price_total", "updated_at")
+    prefix_search_fields = ("code", "set_name_key")
+    search_fields = ("set_name", "code")
+    list_filter = ("lang",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SyncRun)
+class SyncRunAdmin(admin.ModelAdmin):
+    """
+    Historique des synchros (lecture seule). L'action "Comparer" affiche les
+    runs sélectionnés côte à côte, phase par phase.
+    """
+    list_display = ("started_at", "command", "language", "outcome", "remote_version",
+                    "duration", "rows_per_sec", "cards", "rows_inserted", "rows_updated",
+                    "bytes_downloaded", "peak_rss_kb")
+    list_filter = ("command", "outcome", "language")
+    date_hierarchy = "started_at"
+    actions = ["compare_runs"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Comparer les runs sélectionnés")
+    def compare_runs(self, request, queryset):
+        runs = list(queryset.order_by("started_at"))
+        phases = []
+        for run in runs:
+            for name in (run.phases or {}):
+                if name not in phases:
+                    phases.append(name)
+        rows = [(name, [(run.phases or {}).get(name) for run in runs]) for name in phases]
+        return TemplateResponse(request, "admin/yugicall/syncrun_compare.html", {
+            **self.admin_site.each_context(request),
+            "title": "Comparaison des synchronisations",
+            "opts": self.model._meta,
+            "runs": runs,
+            "phase_rows": rows,
+        })
@@ -0,0 +1,217 @@
+# YugiCall/admin_tools.py
+# -*- coding: utf-8 -*-
+"""
+Briques pour des pages d'admin rapides sur les grosses tables du catalogue.
+
+- FastSearchMixin : recherche par préfixe via un intervalle indexé
+  (champ >= terme AND champ < terme + U+10FFFF), id exact si le terme est
+  numérique ; sur une colonne clé (*_key), le terme est d'abord normalisé
+  (sans casse ni accents) ; la recherche "contient" historique (LIKE '%…%'
+  sur tous les search_fields) seulement si le terme commence par "*".
+- EstimatedCountPaginator : liste non filtrée → nombre de lignes estimé
+  depuis les statistiques du planificateur (sqlite_stat1 / pg_class) au lieu
+  d'un COUNT(*) complet ; avec list_select_related, les pk de la page sont
+  choisis avant la jointure.
+- CachedAllValuesFieldListFilter : choix des list_filter mis en cache par
+  version du catalogue (plus de SELECT DISTINCT à chaque affichage).
+- PaginatedInlineFormSet / PaginatedInlineMixin : inlines limités à une page
+  de lignes, avec navigation (?<prefix>_page=N).
+"""
+
+from typing import Optional
+
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, router
+from django.db.models import Q, QuerySet
+from django.forms.models import BaseInlineFormSet
+from django.http import QueryDict
+from django.utils.functional import cached_property
+
+from YugiCall.cache import LRUCache
+from YugiCall.catalog import LANGUAGES, lang_models
+from YugiCall.dbversion import cache_token
+from YugiCall.normalize import normalize_key
+
+FULL_TEXT_PREFIX = "*"
+# Borne haute d'un intervalle de préfixe : plus grand point de code Unicode.
+PREFIX_UPPER = "\U0010ffff"
+
+
+def model_lang(model) -> Optional[str]:
+    """Langue d'un modèle du catalogue (None pour les autres modèles)."""
+    for lang in LANGUAGES:
+        if model in lang_models(lang):
+            return lang
+    return None
+
+
+def prefix_q(field: str, term: str) -> Q:
+    return Q(**{f"{field}__gte": term, f"{field}__lt": term + PREFIX_UPPER})
+
+
+class FastSearchMixin:
+    """
+    À mélanger avec admin.ModelAdmin. Attributs :
+    - prefix_search_fields : champs (indexés) cherchés par préfixe,
+    - id_search_field      : champ comparé quand le terme est un entier.
+    search_fields reste utilisé pour la recherche complète ("*terme").
+    """
+
+    prefix_search_fields = ("name",)
+    id_search_field = "pk"
+    show_full_result_count = False  # évite un second COUNT(*) sur toute la table
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if term.startswith(FULL_TEXT_PREFIX):
+            return super().get_search_results(request, queryset, term[len(FULL_TEXT_PREFIX):].strip())
+
+        condition = Q()
+        for field in self.prefix_search_fields:
+            if field.endswith("_key"):
+                key = normalize_key(term)
+                if key:
+                    condition |= prefix_q(field, key)
+            else:
+                condition |= prefix_q(field, term)
+        if term.isdigit():
+            condition |= Q(**{self.id_search_field: int(term)})
+        may_have_duplicates = any("__" in f for f in self.prefix_search_fields)
+        return queryset.filter(condition), may_have_duplicates
+
+
+def estimated_row_count(model) -> Optional[int]:
+    """
+    Nombre de lignes d'après les statistiques du planificateur (rafraîchies
+    après chaque synchro par refresh_statistics), ou None si indisponible.
+    """
+    alias = router.db_for_read(model)
+    conn = connections[alias]
+    table = model._meta.db_table
+    try:
+        with conn.cursor() as cursor:
+            if conn.vendor == "sqlite":
+                # Pour chaque index, "stat" commence par le nombre de lignes de la table.
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+                row = cursor.fetchone()
+                return int(row[0].split()[0]) if row else None
+            if conn.vendor == "postgresql":
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+                row = cursor.fetchone()
+                return int(row[0]) if row and row[0] >= 0 else None
+    except DatabaseError:
+        # sqlite_stat1 n'existe qu'après un premier ANALYZE.
+        return None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Estimation pour la liste complète, COUNT exact dès qu'un filtre s'applique."""
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is not None and not query.where:
+            estimate = estimated_row_count(self.object_list.model)
+            if estimate is not None:
+                return estimate
+        return super().count
+
+    def _get_page(self, object_list, number, paginator):
+        # Avec list_select_related, trier toutes les lignes jointes avant le
+        # LIMIT coûte cher (~50k lignes pour une recherche "legend") : on
+        # choisit d'abord les pk de la page sur la seule table, puis on ne
+        # joint que ces lignes-là (même ordre, le order_by est conservé).
+        if isinstance(object_list, QuerySet) and object_list.query.select_related:
+            ids = list(object_list.values_list("pk", flat=True))
+            object_list = self.object_list.filter(pk__in=ids)
+        return super()._get_page(object_list, number, paginator)
+
+
+_choices_cache = LRUCache(maxsize=128)
+
+
+class CachedAllValuesFieldListFilter(admin.AllValuesFieldListFilter):
+    """
+    Comme AllValuesFieldListFilter, mais les valeurs distinctes sont mises en
+    cache par (modèle, champ, version du catalogue) : une requête par synchro.
+    """
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        lang = model_lang(model)
+        key = (model._meta.label, field_path, cache_token(lang) if lang else "")
+        choices = _choices_cache.get(key)
+        super().__init__(field, request, params, model, model_admin, field_path)
+        if choices is None:
+            choices = list(self.lookup_choices)
+            _choices_cache.set(key, choices)
+        self.lookup_choices = choices
+
+
+def cached_filters(*fields):
+    """list_filter = cached_filters("type", "race", …)"""
+    return tuple((f, CachedAllValuesFieldListFilter) for f in fields)
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Formset inline qui n'édite qu'une page de lignes (triées par pk)."""
+
+    per_page = 25
+    page = 1
+    page_param = "page"
+    base_query = None
+
+    def get_queryset(self):
+        if not hasattr(self, "_page_queryset"):
+            queryset = super().get_queryset()
+            if not queryset.ordered:
+                queryset = queryset.order_by(self.model._meta.pk.name)
+            self.total_count = queryset.count()
+            self.num_pages = max(1, -(-self.total_count // self.per_page))
+            self.page = min(max(1, self.page), self.num_pages)
+            start = (self.page - 1) * self.per_page
+            self._page_queryset = queryset[start:start + self.per_page]
+        return self._page_queryset
+
+    def page_url(self, page: int) -> str:
+        """Lien vers une autre page, en gardant les autres paramètres (_changelist_filters…)."""
+        query = self.base_query.copy() if self.base_query is not None else QueryDict(mutable=True)
+        query[self.page_param] = page
+        return f"?{query.urlencode()}"
+
+    @property
+    def previous_page_url(self) -> str:
+        return self.page_url(self.page - 1)
+
+    @property
+    def next_page_url(self) -> str:
+        return self.page_url(self.page + 1)
+
+
+class PaginatedInlineMixin:
+    """
+    À mélanger avec admin.TabularInline : seules `per_page` lignes sont
+    chargées ; la page est lue dans ?<prefix>_page=N (conservé au POST,
+    le formulaire d'admin repostant sur la même URL).
+    """
+
+    per_page = 25
+    formset = PaginatedInlineFormSet
+    template = "admin/yugicall/paginated_tabular.html"
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        prefix = formset.get_default_prefix()
+        try:
+            page = int(request.GET.get(f"{prefix}_page", 1))
+        except ValueError:
+            page = 1
+        return type(formset.__name__, (formset,), {
+            "per_page": self.per_page,
+            "page": page,
+            "page_param": f"{prefix}_page",
+            "base_query": request.GET.copy(),
+        })
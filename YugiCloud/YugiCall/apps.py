@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class YugicallConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'YugiCall'
+
+    def ready(self):
+        # Profil SQLite (PRAGMA) appliqué à chaque nouvelle connexion.
+        from django.db.backends.signals import connection_created
+        from .sqlite_profile import on_connection_created
+        connection_created.connect(on_connection_created, dispatch_uid="yugicall_sqlite_profile")
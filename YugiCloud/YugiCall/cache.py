@@ -0,0 +1,86 @@
+# YugiCall/cache.py
+# -*- coding: utf-8 -*-
+"""
+Petit cache LRU en mémoire de processus, borné et thread-safe.
+
+Utilisé pour les objets chauds (cartes sérialisées…) dont la clé inclut la
+"database_version" : une nouvelle synchro change la clé, l'ancienne entrée
+finit simplement évincée.
+
+Borné en nombre d'entrées (maxsize) et, optionnellement, en "poids" total
+(maxweight, avec weigh(valeur) → poids, ex: len d'une liste d'ids) pour les
+valeurs de tailles très différentes.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 1024, maxweight: Optional[int] = None,
+                 weigh: Optional[Callable[[Any], int]] = None):
+        self.maxsize = maxsize
+        self.maxweight = maxweight
+        self.weigh = weigh if maxweight is not None else None
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._weights: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        weight = self.weigh(value) if self.weigh is not None else 0
+        if self.maxweight is not None and weight > self.maxweight:
+            # Plus lourd que tout le cache : on ne le garde pas.
+            return
+        with self._lock:
+            self.weight += weight - self._weights.pop(key, 0)
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.weigh is not None:
+                self._weights[key] = weight
+            while len(self._data) > self.maxsize or (self.maxweight is not None and self.weight > self.maxweight):
+                old_key, _value = self._data.popitem(last=False)
+                self.weight -= self._weights.pop(old_key, 0)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._weights.clear()
+            self.weight = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            total = self.hits + self.misses
+            stats = {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+            }
+            if self.maxweight is not None:
+                stats["weight"] = self.weight
+                stats["maxweight"] = self.maxweight
+            return stats
@@ -0,0 +1,244 @@
+# YugiCall/catalog.py
+# -*- coding: utf-8 -*-
+"""
+Base "catalogue" séparée (Card, CardSet, CardEN, CardSetEN) + bascule blue/green.
+
+- CatalogRouter envoie les modèles du catalogue vers DATABASES["catalog"] ;
+  auth, sessions, admin… restent sur "default". Une synchro ne prend donc
+  plus jamais le verrou d'écriture de la base des comptes.
+- staged_catalog() construit une copie du catalogue à côté de la base en
+  service, la synchro écrit dedans, on la vérifie, puis on bascule de façon
+  atomique. Les lecteurs gardent l'ancienne copie jusqu'à leur reconnexion
+  (CONN_MAX_AGE=0 ⇒ à la requête suivante) ; une synchro ratée ne touche
+  jamais au catalogue en service.
+
+Sous SQLite, le chemin configuré (ex: catalog.sqlite3) est un lien symbolique
+vers catalog_builds/catalog-<horodatage>.sqlite3. SQLite résout le lien à
+l'ouverture : chaque génération a ses propres fichiers -wal/-shm, et la
+bascule se résume à remplacer le lien (os.replace, atomique).
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .sqlite_profile import refresh_statistics
+
+CATALOG_DB = "catalog"
+BUILD_ALIAS = "catalog_build"
+
+# Modèles (app YugiCall) qui vivent dans la base catalogue.
+CATALOG_MODELS = {"card", "cardset", "carden", "cardseten", "setsummary"}
+LANGUAGES = ("fr", "en")
+
+# Nombre d'anciennes générations conservées (retour arrière manuel possible).
+KEEP_GENERATIONS = 2
+
+_local = threading.local()
+
+
+class CatalogVerificationError(Exception):
+    """La copie construite n'a pas passé la vérification : pas de bascule."""
+
+
+def is_catalog_model(model) -> bool:
+    return model._meta.app_label == "YugiCall" and model._meta.model_name in CATALOG_MODELS
+
+
+def catalog_alias() -> str:
+    """
+    Alias à utiliser pour les modèles du catalogue : la copie en construction
+    pendant une synchro (dans le thread qui synchronise), sinon "catalog"
+    (ou "default" si aucune base catalogue n'est configurée).
+    """
+    override = getattr(_local, "alias", None)
+    if override:
+        return override
+    return CATALOG_DB if CATALOG_DB in settings.DATABASES else "default"
+
+
+class CatalogRouter:
+    """Routeur Django : catalogue → base "catalog", le reste → "default"."""
+
+    def db_for_read(self, model, **hints):
+        return catalog_alias() if is_catalog_model(model) else None
+
+    def db_for_write(self, model, **hints):
+        return catalog_alias() if is_catalog_model(model) else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        a, b = is_catalog_model(type(obj1)), is_catalog_model(type(obj2))
+        if a and b:
+            return True
+        if a != b:
+            return False
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        on_catalog_db = db in (CATALOG_DB, BUILD_ALIAS)
+        if model_name is None:
+            # Opérations sans modèle (RunPython/RunSQL) : laissées à la migration.
+            return None
+        is_catalog = app_label == "YugiCall" and model_name in CATALOG_MODELS
+        if CATALOG_DB not in settings.DATABASES:
+            return None
+        return is_catalog == on_catalog_db
+
+
+def lang_models(lang: str):
+    """(modèle carte, modèle set) pour une langue : "fr" → Card/CardSet, "en" → CardEN/CardSetEN."""
+    from YugiCall.models import Card, CardEN, CardSet, CardSetEN
+    models = {"fr": (Card, CardSet), "en": (CardEN, CardSetEN)}
+    if lang not in models:
+        raise ValueError(f"Langue inconnue: {lang}")
+    return models[lang]
+
+
+def require_rows(*models) -> Callable[[str], None]:
+    """Vérification standard : chaque modèle doit avoir au moins une ligne."""
+    def verify(alias: str) -> None:
+        for model in models:
+            if not model.objects.using(alias).exists():
+                raise CatalogVerificationError(f"{model._meta.label} est vide après la synchro")
+    return verify
+
+
+def _is_sqlite(alias: str) -> bool:
+    return settings.DATABASES[alias]["ENGINE"] == "django.db.backends.sqlite3"
+
+
+def generation() -> str:
+    """Identifiant de la génération SQLite en service (cible du lien), "" sinon."""
+    if CATALOG_DB not in settings.DATABASES or not _is_sqlite(CATALOG_DB):
+        return ""
+    try:
+        return os.path.basename(os.readlink(settings.DATABASES[CATALOG_DB]["NAME"]))
+    except OSError:
+        return ""
+
+
+@contextmanager
+def _route_to(alias: str):
+    previous = getattr(_local, "alias", None)
+    _local.alias = alias
+    try:
+        yield alias
+    finally:
+        _local.alias = previous
+
+
+def _quick_check(path: Path) -> None:
+    conn = sqlite3.connect(str(path))
+    try:
+        result = conn.execute("PRAGMA quick_check").fetchone()[0]
+        # En WAL, on rapatrie tout dans le fichier principal avant la bascule.
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    if result != "ok":
+        raise CatalogVerificationError(f"quick_check: {result}")
+
+
+def _cleanup_generations(builds_dir: Path, current: Path) -> None:
+    gens = sorted(p for p in builds_dir.glob("catalog-*.sqlite3") if p != current)
+    for old in gens[:-KEEP_GENERATIONS] if KEEP_GENERATIONS else gens:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(f"{old}{suffix}")
+            except FileNotFoundError:
+                pass
+
+
+@contextmanager
+def staged_catalog(verify: Optional[Callable[[str], None]] = None):
+    """
+    Contexte de synchro blue/green. Renvoie l'alias DB où écrire ; dans ce
+    bloc, l'ORM route aussi les modèles du catalogue vers cette copie.
+
+    `verify(alias)` (optionnel) est appelé avant la bascule et peut lever
+    une exception pour l'annuler (ex: catalogue vide). Les statistiques du
+    planificateur (ANALYZE) sont rafraîchies avant la bascule.
+
+    Hors SQLite (PostgreSQL…), le MVCC isole déjà les lecteurs d'une
+    transaction en cours : on écrit directement dans la base catalogue, dans
+    une seule transaction qui englobe aussi `verify` (un échec annule tout).
+    """
+    alias = catalog_alias()
+    if getattr(_local, "alias", None):
+        # Déjà dans une construction (appel imbriqué) : c'est l'appelant externe qui finalise.
+        yield alias
+        return
+    if alias != CATALOG_DB or not _is_sqlite(CATALOG_DB):
+        # Pas de base catalogue dédiée, ou pas SQLite : vérification avant le
+        # COMMIT, sinon un catalogue vide ou partiel resterait en service.
+        with transaction.atomic(using=alias):
+            yield alias
+            if verify is not None:
+                verify(alias)
+        refresh_statistics(alias)
+        return
+
+    live = Path(settings.DATABASES[CATALOG_DB]["NAME"])
+    builds_dir = live.parent / "catalog_builds"
+    builds_dir.mkdir(parents=True, exist_ok=True)
+    build_path = builds_dir / f"catalog-{timezone.now():%Y%m%d-%H%M%S-%f}.sqlite3"
+
+    # 1) Copie cohérente de la génération en service (API backup de SQLite :
+    #    sûre même si des lecteurs ont la base ouverte).
+    dst = sqlite3.connect(str(build_path))
+    try:
+        if live.exists():
+            src = sqlite3.connect(str(live))
+            try:
+                src.backup(dst)
+            finally:
+                src.close()
+    finally:
+        dst.close()
+
+    # 2) Alias temporaire vers la copie (mêmes réglages que "catalog").
+    connections.databases[BUILD_ALIAS] = dict(connections.databases[CATALOG_DB], NAME=str(build_path))
+    ok = False
+    try:
+        # Nouvelles migrations éventuelles appliquées sur la copie, pas en service.
+        call_command("migrate", database=BUILD_ALIAS, verbosity=0, interactive=False)
+        with _route_to(BUILD_ALIAS):
+            yield BUILD_ALIAS
+            if verify is not None:
+                verify(BUILD_ALIAS)
+        # Statistiques du planificateur à jour avant la mise en service.
+        refresh_statistics(BUILD_ALIAS)
+        connections[BUILD_ALIAS].close()
+        # Vérification physique de la copie avant toute bascule.
+        _quick_check(build_path)
+        ok = True
+    finally:
+        connections[BUILD_ALIAS].close()
+        del connections[BUILD_ALIAS]
+        connections.databases.pop(BUILD_ALIAS, None)
+        if not ok:
+            for suffix in ("", "-wal", "-shm", "-journal"):
+                try:
+                    os.remove(f"{build_path}{suffix}")
+                except FileNotFoundError:
+                    pass
+
+    # 3) Bascule atomique du lien symbolique.
+    tmp_link = live.with_name(f".{live.name}.swap")
+    try:
+        os.remove(tmp_link)
+    except FileNotFoundError:
+        pass
+    os.symlink(os.path.relpath(build_path, live.parent), tmp_link)
+    os.replace(tmp_link, live)
+    # Ce processus-ci se reconnecte aussi sur la nouvelle génération.
+    connections[CATALOG_DB].close()
+    _cleanup_generations(builds_dir, build_path)
@@ -0,0 +1,204 @@
+# YugiCall/columnar.py
+# -*- coding: utf-8 -*-
+"""
+Moteur colonnaire en mémoire pour les filtres sur les statistiques.
+
+Le catalogue (~13k cartes) tient sans peine en mémoire sous forme de
+tableaux typés : atk / def_stat / level en int32, attribute / race / type
+codés en entiers. Un filtre combiné (égalités, intervalles, "dans une
+liste") devient un masque booléen vectorisé, le tri un argsort, et on ne
+renvoie que des ids → une seule requête d'hydratation (pk__in) derrière.
+
+- NumPy est optionnel : sans lui (ou avec settings.COLUMNAR_SEARCH = False)
+  enabled() vaut False et la recherche reste 100 % ORM.
+- Une instance par langue et par worker, reconstruite quand le jeton de
+  version du catalogue change (nouvelle synchro / bascule de génération).
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from YugiCall.catalog import lang_models
+from YugiCall.dbversion import cache_token
+
+# NumPy est optionnel : sans lui, le moteur est simplement désactivé.
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    np = None
+
+NUMERIC_FIELDS = ("atk", "def_stat", "level")
+CATEGORICAL_FIELDS = ("attribute", "race", "type")
+OPERATORS = ("exact", "in", "gt", "gte", "lt", "lte")
+
+# Valeur sentinelle pour NULL (Magies/Pièges sans ATK, ATK "?"…).
+NULL = -(2 ** 31)
+
+Filter = Tuple[str, str, Any]  # (champ, opérateur, valeur)
+
+
+def enabled() -> bool:
+    return np is not None and getattr(settings, "COLUMNAR_SEARCH", False)
+
+
+def supports(field: str) -> bool:
+    return field in NUMERIC_FIELDS or field in CATEGORICAL_FIELDS
+
+
+class ColumnarStore:
+    """
+    Colonnes d'une langue, lignes rangées par (name, id) : le tri par nom
+    est donc l'ordre naturel des lignes, sans colonne de texte en mémoire.
+    """
+
+    def __init__(self, lang: str, token: str, ids, numeric: Dict[str, Any],
+                 codes: Dict[str, Any], vocab: Dict[str, List[str]], build_seconds: float):
+        self.lang = lang
+        self.token = token
+        self.ids = ids
+        self.numeric = numeric
+        self.codes = codes
+        self.vocab = vocab
+        self.lookup = {f: {v: i for i, v in enumerate(words)} for f, words in vocab.items()}
+        self.build_seconds = build_seconds
+
+    @classmethod
+    def build(cls, lang: str, token: Optional[str] = None) -> "ColumnarStore":
+        """Charge les colonnes en UNE requête (values_list triée par nom)."""
+        if np is None:
+            raise RuntimeError("NumPy n'est pas installé : moteur colonnaire indisponible")
+        t0 = time.perf_counter()
+        token = cache_token(lang) if token is None else token
+        card_model, _set_model = lang_models(lang)
+        columns = ("id",) + NUMERIC_FIELDS + CATEGORICAL_FIELDS
+        rows = list(card_model.objects.order_by("name", "id").values_list(*columns))
+
+        ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        numeric = {}
+        for pos, field in enumerate(NUMERIC_FIELDS, start=1):
+            numeric[field] = np.fromiter(
+                (NULL if r[pos] is None else r[pos] for r in rows), dtype=np.int32, count=len(rows))
+        codes, vocab = {}, {}
+        for pos, field in enumerate(CATEGORICAL_FIELDS, start=1 + len(NUMERIC_FIELDS)):
+            words: Dict[str, int] = {}
+            codes[field] = np.fromiter(
+                (words.setdefault(r[pos] or "", len(words)) for r in rows), dtype=np.int32, count=len(rows))
+            vocab[field] = list(words)
+        return cls(lang, token, ids, numeric, codes, vocab, time.perf_counter() - t0)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Empreinte des tableaux NumPy (hors dictionnaires de codes)."""
+        return int(self.ids.nbytes + sum(a.nbytes for a in self.numeric.values())
+                   + sum(a.nbytes for a in self.codes.values()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lang": self.lang,
+            "token": self.token,
+            "rows": len(self),
+            "nbytes": self.nbytes,
+            "vocab_sizes": {f: len(words) for f, words in self.vocab.items()},
+            "build_seconds": round(self.build_seconds, 4),
+        }
+
+    # --- Filtres ---
+
+    def _column_mask(self, field: str, op: str, value: Any):
+        if op not in OPERATORS:
+            raise ValueError(f"Opérateur inconnu: {op}")
+        if field in NUMERIC_FIELDS:
+            col = self.numeric[field]
+            if op == "in":
+                return np.isin(col, [int(v) for v in value]) & (col != NULL)
+            value = int(value)
+            if op == "exact":
+                return col == value
+            # Les comparaisons excluent NULL, comme en SQL.
+            notnull = col != NULL
+            if op == "gt":
+                return notnull & (col > value)
+            if op == "gte":
+                return notnull & (col >= value)
+            if op == "lt":
+                return notnull & (col < value)
+            return notnull & (col <= value)
+        if field in CATEGORICAL_FIELDS:
+            if op not in ("exact", "in"):
+                raise ValueError(f"Opérateur {op} non supporté sur {field}")
+            values = [value] if op == "exact" else list(value)
+            wanted = [self.lookup[field][v] for v in values if v in self.lookup[field]]
+            return np.isin(self.codes[field], wanted)
+        raise ValueError(f"Champ non supporté par le moteur colonnaire: {field}")
+
+    def mask(self, filters: Iterable[Filter]):
+        """ET logique de tous les filtres (aucun filtre → toutes les lignes)."""
+        result = np.ones(len(self), dtype=bool)
+        for field, op, value in filters:
+            result &= self._column_mask(field, op, value)
+        return result
+
+    def query(self, filters: Iterable[Filter] = (), order_by: str = "name",
+              limit: Optional[int] = None) -> List[int]:
+        """
+        Ids des cartes satisfaisant `filters`, triés selon `order_by`
+        ("name", "id" ou un champ numérique, préfixé de "-" pour l'ordre
+        décroissant ; NULL toujours en dernier, égalités départagées par nom).
+        """
+        rows = np.flatnonzero(self.mask(filters))
+        desc = order_by.startswith("-")
+        key = order_by.lstrip("-")
+        if key == "name":
+            order = rows[::-1] if desc else rows
+        elif key == "id":
+            order = rows[np.argsort(self.ids[rows], kind="stable")]
+            if desc:
+                order = order[::-1]
+        elif key in NUMERIC_FIELDS:
+            col = self.numeric[key][rows].astype(np.int64)
+            nulls = col == NULL
+            sort_key = -col if desc else col
+            # lexsort : dernière clé = clé principale ; rows = ordre par nom.
+            order = rows[np.lexsort((rows, sort_key, nulls))]
+        else:
+            raise ValueError(f"Tri non supporté: {order_by}")
+        if limit is not None:
+            order = order[:limit]
+        return self.ids[order].tolist()
+
+
+_stores: Dict[str, ColumnarStore] = {}
+_lock = threading.Lock()
+
+
+def get_store(lang: str) -> ColumnarStore:
+    """Store de la langue, reconstruit si la version du catalogue a changé."""
+    token = cache_token(lang)
+    store = _stores.get(lang)
+    if store is not None and store.token == token:
+        return store
+    with _lock:
+        store = _stores.get(lang)
+        if store is None or store.token != token:
+            store = ColumnarStore.build(lang, token)
+            _stores[lang] = store
+    return store
+
+
+def search_ids(lang: str, filters: Sequence[Filter], order_by: str = "name",
+               limit: Optional[int] = None) -> List[int]:
+    return get_store(lang).query(filters, order_by=order_by, limit=limit)
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "enabled": enabled(),
+        "numpy": np is not None,
+        "stores": {lang: store.stats() for lang, store in _stores.items()},
+    }
@@ -0,0 +1,82 @@
+# YugiCall/dbversion.py
+# -*- coding: utf-8 -*-
+"""
+Marqueurs de version de la base locale.
+
+Chaque commande de synchro écrit, après un import réussi, la réponse de
+checkDBVer dans un petit fichier JSON (un par langue). On centralise ici
+les chemins et la lecture pour que le démon, les exports et les caches
+lisent exactement la même chose que les commandes.
+"""
+
+import json
+import os
+from typing import Any, Optional
+
+# Fichiers relatifs au répertoire courant (comportement historique des commandes).
+MARKER_FILES = {
+    "fr": ".last_db_ver.json",
+    "en": ".last_db_ver_en.json",
+}
+
+
+def marker_path(lang: str) -> str:
+    return os.path.join(os.getcwd(), MARKER_FILES[lang])
+
+
+def read_marker(lang: str) -> Optional[Any]:
+    """Contenu brut du marqueur (réponse checkDBVer), ou None si absent/illisible."""
+    try:
+        with open(marker_path(lang), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except Exception:
+        return None
+
+
+def write_marker(lang: str, remote_ver: Any) -> str:
+    path = marker_path(lang)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(remote_ver, fh, ensure_ascii=False, indent=2)
+    return path
+
+
+def version_string(remote_ver: Any) -> str:
+    """
+    Extrait "database_version" d'une réponse checkDBVer
+    (l'API renvoie une liste d'un seul dict : [{"database_version": ..., "last_update": ...}]).
+    """
+    if isinstance(remote_ver, list) and remote_ver:
+        remote_ver = remote_ver[0]
+    if isinstance(remote_ver, dict):
+        return str(remote_ver.get("database_version") or "")
+    return ""
+
+
+_current_cache = {}
+
+
+def current_version(lang: str) -> str:
+    """
+    "database_version" actuellement importée pour une langue ("" si inconnue).
+    Relit le marqueur seulement quand son mtime change : appelable à chaque requête.
+    """
+    path = marker_path(lang)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return ""
+    cached = _current_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, version_string(read_marker(lang)))
+        _current_cache[path] = cached
+    return cached[1]
+
+
+def cache_token(lang: str) -> str:
+    """
+    Jeton à mettre dans les clés de cache : version importée + génération du
+    catalogue en service. Change dès qu'une synchro bascule, même dans le court
+    intervalle entre la bascule et l'écriture du marqueur.
+    """
+    from YugiCall.catalog import generation
+    return f"{current_version(lang)}@{generation()}"
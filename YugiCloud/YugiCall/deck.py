@@ -0,0 +1,179 @@
+# YugiCall/deck.py
+# -*- coding: utf-8 -*-
+"""
+Analyse de decks au format .ydk (YGOPro / EDOPro).
+
+Un .ydk n'est qu'une liste d'ids groupés en sections :
+
+    #created by ...
+    #main
+    46986414
+    46986414
+    #extra
+    ...
+    !side
+    ...
+
+- parse_ydk()    : texte → {"main": [...], "extra": [...], "side": [...]},
+- deck_hash()    : empreinte du contenu (ordre des cartes ignoré),
+- analyze_deck() : deck résolu + statistiques, en UNE requête SQL
+  (lookup.fetch_cards : cartes + sets en LEFT JOIN), mis en cache par
+  (empreinte, langue, version du catalogue).
+"""
+
+import hashlib
+import json
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from YugiCall.cache import LRUCache
+from YugiCall.dbversion import cache_token, current_version
+from YugiCall.lookup import fetch_cards
+
+SECTIONS = ("main", "extra", "side")
+# Bien au-delà d'un deck légal (60 + 15 + 15) : protège juste la requête.
+MAX_DECK_CARDS = 300
+
+deck_cache = LRUCache(maxsize=getattr(settings, "DECK_CACHE_SIZE", 2000))
+
+
+class DeckError(ValueError):
+    """Fichier .ydk illisible ou trop gros."""
+
+
+def parse_ydk(text: str) -> Dict[str, List[int]]:
+    """
+    Découpe un .ydk en sections. Les lignes de commentaire ("#created by…")
+    et les lignes vides sont ignorées ; un id non numérique lève DeckError.
+    """
+    sections: Dict[str, List[int]] = {name: [] for name in SECTIONS}
+    current = "main"  # certains exports omettent "#main"
+    total = 0
+    for lineno, raw in enumerate(text.splitlines(), start=1):
+        line = raw.strip()
+        if not line:
+            continue
+        if line[0] in "#!":
+            name = line[1:].strip().lower()
+            if name in SECTIONS:
+                current = name
+            continue
+        try:
+            cid = int(line)
+        except ValueError:
+            raise DeckError(f"Ligne {lineno}: id de carte invalide ({line[:40]!r})")
+        sections[current].append(cid)
+        total += 1
+        if total > MAX_DECK_CARDS:
+            raise DeckError(f"Deck trop grand (plus de {MAX_DECK_CARDS} cartes)")
+    if not total:
+        raise DeckError("Deck vide")
+    return sections
+
+
+def deck_hash(sections: Dict[str, List[int]]) -> str:
+    """Empreinte SHA-256 du contenu (section → ids triés) : l'ordre n'a pas d'importance."""
+    canonical = {name: sorted(sections.get(name) or []) for name in SECTIONS}
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _price(value: Any) -> Optional[Decimal]:
+    if value in (None, ""):
+        return None
+    try:
+        price = Decimal(str(value))
+    except InvalidOperation:
+        return None
+    # 0.00 = pas de prix connu chez YGOPRODeck
+    return price if price > 0 else None
+
+
+def cheapest_printing(card: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Édition la moins chère d'une carte sérialisée (avec "card_sets"), ou None."""
+    best = None
+    for printing in card.get("card_sets") or []:
+        price = _price(printing.get("set_price"))
+        if price is not None and (best is None or price < best[0]):
+            best = (price, printing)
+    return best[1] if best else None
+
+
+def _distribution(counter: Counter) -> Dict[str, int]:
+    return dict(sorted(counter.items(), key=lambda kv: (-kv[1], kv[0])))
+
+
+def _analyze(sections: Dict[str, List[int]], lang: str) -> Dict[str, Any]:
+    ids = {cid for name in SECTIONS for cid in sections[name]}
+    cards = fetch_cards(ids, lang)
+
+    types: Counter = Counter()
+    attributes: Counter = Counter()
+    levels: Counter = Counter()
+    total = Decimal("0")
+    unpriced: List[int] = []
+    out_sections: Dict[str, Any] = {}
+    missing = sorted(ids - set(cards))
+
+    cheapest = {cid: cheapest_printing(card) for cid, card in cards.items()}
+
+    for name in SECTIONS:
+        copies = Counter(sections[name])
+        entries = []
+        section_total = Decimal("0")
+        # Ordre du fichier conservé (première apparition de chaque id).
+        for cid in dict.fromkeys(sections[name]):
+            count = copies[cid]
+            card = cards.get(cid)
+            if card is None:
+                continue
+            printing = cheapest[cid]
+            card_info = {k: v for k, v in card.items() if k != "card_sets"}
+            entries.append({"count": count, "card": card_info, "cheapest": printing})
+
+            types[card["type"]] += count
+            if card.get("attribute"):
+                attributes[card["attribute"]] += count
+            if card.get("level") is not None:
+                levels[str(card["level"])] += count
+            if printing is None:
+                if cid not in unpriced:
+                    unpriced.append(cid)
+            else:
+                section_total += _price(printing["set_price"]) * count
+        total += section_total
+        out_sections[name] = {
+            "count": len(sections[name]),
+            "price": str(section_total),
+            "cards": entries,
+        }
+
+    return {
+        "deck_hash": deck_hash(sections),
+        "lang": lang,
+        "database_version": current_version(lang),
+        "sections": out_sections,
+        "missing": missing,
+        "stats": {
+            "types": _distribution(types),
+            "attributes": _distribution(attributes),
+            "levels": _distribution(levels),
+            "total_price": str(total),
+            "unpriced": unpriced,
+        },
+    }
+
+
+def analyze_deck(sections: Dict[str, List[int]], lang: str) -> Dict[str, Any]:
+    """
+    Deck résolu + statistiques. Zéro requête si le même deck (au sens de
+    deck_hash) a déjà été analysé pour cette version du catalogue, une sinon.
+    """
+    key = (deck_hash(sections), lang, cache_token(lang))
+    result = deck_cache.get(key)
+    if result is None:
+        result = _analyze(sections, lang)
+        deck_cache.set(key, result)
+    return result
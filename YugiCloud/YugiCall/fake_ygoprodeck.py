@@ -0,0 +1,344 @@
+# YugiCall/fake_ygoprodeck.py
+# -*- coding: utf-8 -*-
+"""
+Serveur de remplacement local pour l'API YGOPRODeck (cardinfo.php,
+checkDBVer.php), pour tester synchros et vues hors ligne, sans risque de ban.
+
+    with FakeYGOPRODeck(cards=2000, faults=Faults(error_rate=0.1, seed=1)) as fake:
+        with override_settings(YGOPRODECK_API_BASE=fake.api_base):
+            call_command("sync_DB_pub_en", "--force")
+        print(fake.stats())
+
+- catalogue synthétique (YugiCall/synthetic.py) de la taille voulue, même
+  forme de réponse que la vraie API : {"data": [...]} et, avec num/offset,
+  le bloc "meta" (total_rows, next_page_offset…) ;
+- vrais paramètres : name, fname, id, type, race, attribute, archetype,
+  level, atk, def, scale, link, linkmarker, cardset, banlist, sort,
+  language, num, offset, misc… ; paramètre inconnu, langue inconnue ou
+  aucun résultat → 400 {"error": …}, comme l'API ;
+- pannes injectées (Faults), tirées d'un random à graine (déterministe à
+  ordre de requêtes égal) : latence, 429 + Retry-After, 5xx, corps tronqué
+  (connexion coupée avant Content-Length), envoi lent par morceaux.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from YugiCall import synthetic
+
+API_PATH = "/api/v7"
+LANGUAGES = ("fr", "de", "it", "pt")
+
+# Paramètres acceptés par cardinfo.php (les autres → 400)
+KNOWN_PARAMS = {
+    "name", "fname", "id", "konami_id", "type", "race", "attribute", "archetype", "level", "atk", "def",
+    "scale", "link", "linkmarker", "cardset", "banlist", "sort", "format", "misc", "staple",
+    "has_effect", "startdate", "enddate", "dateregion", "language", "num", "offset", "tcgplayer_data",
+}
+NO_MATCH = "No card matching your query was found in the database. Please see https://ygoprodeck.com/api-guide/ for API documentation."
+
+
+class Faults:
+    """
+    Pannes injectées sur chaque requête (probabilités entre 0 et 1) :
+    - latency / jitter      : délai avant réponse (s), + uniforme [0, jitter],
+    - rate_limit_rate       : 429 avec Retry-After = retry_after (s),
+    - error_rate            : 5xx tiré dans error_statuses,
+    - truncate_rate         : Content-Length complet mais connexion coupée à mi-corps,
+    - slow_rate / slow_bps  : corps envoyé par morceaux à slow_bps octets/s.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_limit_rate: float = 0.0,
+                 retry_after: int = 1, error_rate: float = 0.0, error_statuses: Tuple[int, ...] = (500, 502, 503),
+                 truncate_rate: float = 0.0, slow_rate: float = 0.0, slow_bps: int = 64 * 1024, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.truncate_rate = truncate_rate
+        self.slow_rate = slow_rate
+        self.slow_bps = max(1, slow_bps)
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> Dict[str, Any]:
+        """Pannes de la prochaine requête (tirage sous verrou : séquence reproductible)."""
+        with self._lock:
+            r = self._rnd
+            return {
+                "delay": self.latency + (r.uniform(0, self.jitter) if self.jitter else 0.0),
+                "rate_limited": r.random() < self.rate_limit_rate,
+                "error": r.choice(self.error_statuses) if r.random() < self.error_rate else None,
+                "truncate": r.random() < self.truncate_rate,
+                "slow": r.random() < self.slow_rate,
+            }
+
+
+class CardinfoError(Exception):
+    """Requête refusée par cardinfo.php (→ 400 {"error": …})."""
+
+
+def _matches(card: Dict[str, Any], key: str, values: List[str]) -> bool:
+    if key == "name":
+        return card["name"].casefold() in {v.casefold() for v in values}
+    if key == "fname":
+        return values[0].casefold() in card["name"].casefold()
+    if key == "id":
+        return str(card["id"]) in values
+    if key in ("type", "race", "attribute", "archetype"):
+        return (card.get(key) or "").casefold() in {v.casefold() for v in values}
+    if key in ("level", "atk", "def", "scale", "link"):
+        field = "linkval" if key == "link" else key
+        value = card.get(field)
+        if value is None:
+            return False
+        wanted = values[0]
+        for prefix, op in (("gte", int.__ge__), ("lte", int.__le__), ("gt", int.__gt__), ("lt", int.__lt__)):
+            if wanted.startswith(prefix):
+                return op(int(value), int(wanted[len(prefix):]))
+        return int(value) == int(wanted)
+    if key == "linkmarker":
+        return {v.casefold() for v in values} <= {m.casefold() for m in card.get("linkmarkers") or []}
+    if key == "cardset":
+        needle = values[0].casefold()
+        return any(needle == s["set_name"].casefold() for s in card.get("card_sets") or [])
+    if key == "banlist":
+        return bool((card.get("banlist_info") or {}).get(f"ban_{values[0].lower()}"))
+    return True
+
+
+SORT_KEYS = {
+    "name": lambda c: c["name"],
+    "atk": lambda c: -(c.get("atk") or -1),
+    "def": lambda c: -(c.get("def") or -1),
+    "level": lambda c: -(c.get("level") or -1),
+    "id": lambda c: c["id"],
+    "new": lambda c: -c["id"],
+}
+
+
+class FakeYGOPRODeck:
+    """
+    Serveur HTTP dans un thread (port 0 = port libre choisi par l'OS).
+    Utilisable en contexte (`with`) ou via start()/stop().
+    """
+
+    def __init__(self, cards: int = 1000, seed: int = 0, host: str = "127.0.0.1", port: int = 0,
+                 faults: Optional[Faults] = None, database_version: str = "1.0",
+                 last_update: str = "2024-01-01 00:00:00"):
+        self.count = cards
+        self.seed = seed
+        self.faults = faults or Faults()
+        self.database_version = database_version
+        self.last_update = last_update
+        self._catalogs: Dict[str, List[Dict[str, Any]]] = {}
+        self._full_dumps: Dict[str, bytes] = {}
+        self._catalog_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.counters: Dict[str, int] = {"requests": 0, "bytes_sent": 0, "rate_limited": 0, "errors": 0,
+                                         "truncated": 0, "slow": 0}
+        self.statuses: Dict[str, int] = {}
+        self.server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Cycle de vie ---
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_base(self) -> str:
+        """Valeur à mettre dans settings.YGOPRODECK_API_BASE."""
+        return self.base_url + API_PATH
+
+    def start(self) -> "FakeYGOPRODeck":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-ygoprodeck", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Données ---
+
+    def catalog(self, language: Optional[str]) -> List[Dict[str, Any]]:
+        """Cartes d'une langue (None = anglais), générées une fois, triées par nom comme l'API."""
+        key = language or "en"
+        with self._catalog_lock:
+            if key not in self._catalogs:
+                cards = list(synthetic.generate_cards(self.count, self.seed, key))
+                cards.sort(key=SORT_KEYS["name"])
+                self._catalogs[key] = cards
+            return self._catalogs[key]
+
+    def full_dump(self, language: Optional[str]) -> bytes:
+        """Réponse sans filtre (synchro complète), encodée une seule fois."""
+        key = language or "en"
+        cards = self.catalog(language)
+        with self._catalog_lock:
+            if key not in self._full_dumps:
+                self._full_dumps[key] = json.dumps({"data": cards}).encode("utf-8")
+            return self._full_dumps[key]
+
+    def cardinfo(self, query: Dict[str, List[str]]) -> bytes:
+        unknown = sorted(set(query) - KNOWN_PARAMS)
+        if unknown:
+            raise CardinfoError(f"Invalid parameter(s): {', '.join(unknown)}")
+        language = (query.get("language") or [None])[0]
+        if language is not None and language not in LANGUAGES:
+            raise CardinfoError("Invalid language")
+        filters = {k: v for k, v in query.items() if k not in ("language", "num", "offset", "sort", "misc", "format")}
+        if not filters and "num" not in query and "sort" not in query:
+            return self.full_dump(language)
+
+        cards = self.catalog(language)
+        try:
+            for key, values in filters.items():
+                values = [v for raw in values for v in raw.split(",")] if key in ("name", "id", "type", "linkmarker") else values
+                cards = [c for c in cards if _matches(c, key, values)]
+        except ValueError:
+            raise CardinfoError("Invalid numeric value")
+        if "sort" in query:
+            sort_key = SORT_KEYS.get(query["sort"][0])
+            if sort_key is None:
+                raise CardinfoError("Invalid sort")
+            cards = sorted(cards, key=sort_key)
+
+        payload: Dict[str, Any] = {}
+        if "num" in query or "offset" in query:
+            try:
+                num, offset = int(query["num"][0]), int(query["offset"][0])
+            except (KeyError, ValueError):
+                raise CardinfoError("You must provide both num and offset as integers")
+            total = len(cards)
+            page = cards[offset:offset + num]
+            if not page:
+                raise CardinfoError(NO_MATCH)
+            remaining = max(0, total - offset - len(page))
+            meta = {
+                "current_rows": len(page),
+                "total_rows": total,
+                "rows_remaining": remaining,
+                "total_pages": -(-total // num),
+                "pages_remaining": -(-remaining // num),
+            }
+            if remaining:
+                next_query = {k: v[0] for k, v in query.items()}
+                next_query["offset"] = offset + num
+                meta["next_page"] = f"{self.api_base}/cardinfo.php?{urlencode(next_query)}"
+                meta["next_page_offset"] = offset + num
+            payload["data"] = page
+            payload["meta"] = meta
+        else:
+            if not cards:
+                raise CardinfoError(NO_MATCH)
+            payload["data"] = cards
+        return json.dumps(payload).encode("utf-8")
+
+    def check_db_ver(self) -> bytes:
+        return json.dumps([{"database_version": self.database_version, "last_update": self.last_update}]).encode()
+
+    # --- Compteurs ---
+
+    def count_response(self, status: int, sent: int, **flags) -> None:
+        with self._stats_lock:
+            self.counters["requests"] += 1
+            self.counters["bytes_sent"] += sent
+            for name, value in flags.items():
+                if value:
+                    self.counters[name] += 1
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {**self.counters, "statuses": dict(self.statuses)}
+
+
+def _handler_for(fake: FakeYGOPRODeck):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        server_version = "FakeYGOPRODeck/1.0"
+
+        def log_message(self, format, *args):  # noqa: A002 - signature imposée
+            pass
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            if parts.path == "/stats":
+                # Hors pannes (et hors tirage : la séquence des pannes reste reproductible).
+                return self._send(200, json.dumps(fake.stats()).encode(), count=False)
+            faults = fake.faults.draw()
+            if faults["delay"]:
+                time.sleep(faults["delay"])
+            if faults["rate_limited"]:
+                fake.count_response(429, 0, rate_limited=True)
+                return self._send(429, b'{"error": "Too many requests"}', {"Retry-After": str(fake.faults.retry_after)},
+                                  count=False)
+            if faults["error"]:
+                fake.count_response(faults["error"], 0, errors=True)
+                return self._send(faults["error"], b"<html>upstream error</html>", count=False,
+                                  content_type="text/html")
+
+            try:
+                if parts.path == f"{API_PATH}/checkDBVer.php":
+                    body = fake.check_db_ver()
+                elif parts.path == f"{API_PATH}/cardinfo.php":
+                    body = fake.cardinfo(parse_qs(parts.query, keep_blank_values=True))
+                else:
+                    return self._send(404, b'{"error": "Not found"}')
+            except CardinfoError as e:
+                return self._send(400, json.dumps({"error": str(e)}).encode())
+            self._send(200, body, truncate=faults["truncate"], slow=faults["slow"])
+
+        def _send(self, status, body, headers=None, count=True, truncate=False, slow=False,
+                  content_type="application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            if truncate:
+                self.send_header("Connection", "close")
+            self.end_headers()
+            sent = 0
+            try:
+                if truncate:
+                    sent = len(body) // 2
+                    self.wfile.write(body[:sent])
+                    self.close_connection = True
+                elif slow:
+                    chunk = max(1, fake.faults.slow_bps // 10)
+                    for start in range(0, len(body), chunk):
+                        self.wfile.write(body[start:start + chunk])
+                        self.wfile.flush()
+                        sent += len(body[start:start + chunk])
+                        time.sleep(chunk / fake.faults.slow_bps)
+                else:
+                    self.wfile.write(body)
+                    sent = len(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # Le client a abandonné (timeout) : rien d'autre à faire.
+                self.close_connection = True
+            if count:
+                fake.count_response(status, sent, truncated=truncate, slow=slow)
+
+    return Handler
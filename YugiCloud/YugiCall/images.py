@@ -0,0 +1,258 @@
+# YugiCall/images.py
+# -*- coding: utf-8 -*-
+"""
+Miroir local des images de cartes (stockage adressé par contenu).
+
+Organisation sur disque (sous settings.CARD_IMAGES_ROOT) :
+    objects/ab/abcdef….jpg          → image originale, nommée par son sha256
+    thumbs/small/ab/abcdef….jpg     → vignette "small"
+    thumbs/medium/ab/abcdef….jpg    → vignette "medium"
+    index.json                      → {image_id: {"sha256": ..., "url": ..., "thumbs": [...]}}
+
+"thumbs" liste les vignettes générées : les pages n'ont pas à tester la
+présence des fichiers, ligne par ligne.
+
+Le guide YGOPRODeck demande explicitement de ne PAS hotlinker leurs images :
+on les télécharge une fois, puis on les sert nous-mêmes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from django.conf import settings
+
+# Pillow (requirements.txt) génère les vignettes ; sync_images refuse de tourner
+# sans lui, sauf avec --no-thumbs (originaux seulement).
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    Image = None
+
+
+# Tailles des vignettes (largeur, hauteur max) ; les images YGOPRODeck font 421x614.
+THUMB_SIZES: Dict[str, Tuple[int, int]] = {
+    "small": (96, 140),
+    "medium": (210, 307),
+}
+
+
+def images_root() -> Path:
+    """Racine du stockage d'images (configurable via settings.CARD_IMAGES_ROOT)."""
+    return Path(settings.CARD_IMAGES_ROOT)
+
+
+def object_path(root: Path, sha256: str) -> Path:
+    """Chemin de l'original pour un hash donné (sharding sur 2 caractères)."""
+    return root / "objects" / sha256[:2] / f"{sha256}.jpg"
+
+
+def thumb_path(root: Path, size: str, sha256: str) -> Path:
+    """Chemin d'une vignette pour un hash et une taille donnés."""
+    return root / "thumbs" / size / sha256[:2] / f"{sha256}.jpg"
+
+
+def iter_card_images(cards: Iterable[dict]) -> Iterator[Tuple[int, str]]:
+    """
+    Parcourt le payload cardinfo et renvoie les couples (image_id, url).
+    Une carte peut avoir plusieurs artworks (card_images est une liste).
+    """
+    for card in cards:
+        for img in card.get("card_images") or []:
+            image_id = img.get("id")
+            url = img.get("image_url")
+            if image_id is None or not url:
+                continue
+            yield int(image_id), url
+
+
+class Throttle:
+    """
+    Limiteur simple et thread-safe : au plus `rate` départs par seconde,
+    répartis régulièrement (chaque appel réserve son créneau sous verrou).
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def penalize(self, seconds: float) -> None:
+        """429 reçu : plus aucun départ (tous threads) avant `seconds` secondes."""
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+class ImageIndex:
+    """
+    Index image_id → {"sha256", "url", "thumbs"} persisté en JSON.
+    Écriture atomique (fichier temporaire + os.replace) pour rester
+    cohérent même si la commande est interrompue au milieu.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.path = root / "index.json"
+        self._lock = threading.Lock()
+        self.entries: Dict[str, dict] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as fh:
+                    self.entries = json.load(fh)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def has(self, image_id: int, verify: bool = False) -> bool:
+        """True si l'image est déjà présente (entrée d'index + fichier objet)."""
+        entry = self.entries.get(str(image_id))
+        if not entry:
+            return False
+        path = object_path(self.root, entry["sha256"])
+        if not path.exists():
+            return False
+        if verify:
+            return sha256_file(path) == entry["sha256"]
+        return True
+
+    def set(self, image_id: int, sha256: str, url: str) -> None:
+        with self._lock:
+            previous = self.entries.get(str(image_id)) or {}
+            entry = {"sha256": sha256, "url": url}
+            if previous.get("sha256") == sha256 and "thumbs" in previous:
+                entry["thumbs"] = previous["thumbs"]
+            self.entries[str(image_id)] = entry
+
+    def mark_thumbnails(self, hashes: Iterable[str]) -> None:
+        """Note dans l'index que toutes les vignettes de ces originaux existent."""
+        complete = set(hashes)
+        sizes = sorted(THUMB_SIZES)
+        with self._lock:
+            for entry in self.entries.values():
+                if entry["sha256"] in complete:
+                    entry["thumbs"] = sizes
+
+    def save(self) -> None:
+        with self._lock:
+            data = json.dumps(self.entries, ensure_ascii=False, sort_keys=True)
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".index-", suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(data)
+        os.replace(tmp, self.path)
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def store_bytes(root: Path, content: bytes) -> str:
+    """
+    Écrit le contenu dans le stockage adressé par contenu et renvoie son sha256.
+    Si l'objet existe déjà (même image pour deux ids), on ne réécrit rien.
+    """
+    sha256 = hashlib.sha256(content).hexdigest()
+    dest = object_path(root, sha256)
+    if not dest.exists():
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        # Écriture dans un temporaire du même dossier puis rename atomique :
+        # jamais de fichier objet tronqué après une interruption.
+        fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=".dl-")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(content)
+        os.replace(tmp, dest)
+    return sha256
+
+
+def make_thumbnails(root: str, sha256: str) -> Tuple[str, Optional[str]]:
+    """
+    Génère les vignettes manquantes pour un original.
+    Fonction de module (picklable) : exécutée dans les processus du pool.
+    Renvoie (sha256, message d'erreur ou None).
+    """
+    if Image is None:
+        return sha256, "Pillow non installé"
+    base = Path(root)
+    src = object_path(base, sha256)
+    try:
+        with Image.open(src) as im:
+            im = im.convert("RGB")
+            for size, box in THUMB_SIZES.items():
+                dest = thumb_path(base, size, sha256)
+                if dest.exists():
+                    continue
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                thumb = im.copy()
+                thumb.thumbnail(box, Image.LANCZOS)
+                fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=".th-")
+                with os.fdopen(fd, "wb") as fh:
+                    thumb.save(fh, format="JPEG", quality=82, optimize=True, progressive=True)
+                os.replace(tmp, dest)
+    except Exception as e:  # image corrompue, disque plein…
+        return sha256, str(e)
+    return sha256, None
+
+
+def missing_thumbnails(root: Path, hashes: Iterable[str]) -> Iterator[str]:
+    """Hashes dont au moins une vignette manque (reprise après interruption)."""
+    for sha256 in hashes:
+        if any(not thumb_path(root, size, sha256).exists() for size in THUMB_SIZES):
+            yield sha256
+
+
+# --- Lecture côté web (templates / vues) ---
+
+# index.json n'est re-stat-é qu'au plus une fois par intervalle (pas une fois par ligne).
+INDEX_RECHECK_SECONDS = 2.0
+
+_index_cache = {"mtime": None, "checked": float("-inf"), "entries": {}}
+_index_cache_lock = threading.Lock()
+
+
+def lookup_image(image_id: int) -> Optional[dict]:
+    """
+    Entrée d'index de l'image d'une carte ({"sha256", "url", "thumbs"}), ou
+    None si non miroitée. L'index est rechargé seulement si index.json a
+    changé (mtime, vérifiée au plus toutes les INDEX_RECHECK_SECONDS).
+    """
+    with _index_cache_lock:
+        now = time.monotonic()
+        if now - _index_cache["checked"] >= INDEX_RECHECK_SECONDS:
+            _index_cache["checked"] = now
+            path = images_root() / "index.json"
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                mtime = None
+                _index_cache["entries"] = {}
+            if mtime is not None and _index_cache["mtime"] != mtime:
+                try:
+                    with open(path, "r", encoding="utf-8") as fh:
+                        _index_cache["entries"] = json.load(fh)
+                except (OSError, ValueError):
+                    mtime = None  # fichier en cours de remplacement : on réessaiera
+            _index_cache["mtime"] = mtime
+        return _index_cache["entries"].get(str(image_id))
+
+
+def lookup_sha256(image_id: int) -> Optional[str]:
+    """Sha256 de l'image d'une carte, ou None si non miroitée."""
+    entry = lookup_image(image_id)
+    return entry["sha256"] if entry else None
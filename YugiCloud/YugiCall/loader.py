@@ -0,0 +1,370 @@
+# YugiCall/loader.py
+# -*- coding: utf-8 -*-
+"""
+Chargement du catalogue à partir du JSON cardinfo.
+
+- card_values() / set_values() : mapping API → champs des modèles, partagé
+  par les commandes FR et EN (un seul endroit à modifier si l'API évolue).
+- orm_load()  : chemin historique, update_or_create ligne par ligne (SQLite).
+- copy_load() : PostgreSQL — COPY dans des tables temporaires puis un seul
+  INSERT … ON CONFLICT DO UPDATE ensembliste par table.
+- RowLayout / CopyStage / BulkStage : les mêmes étapes découpées (tuples,
+  écriture par lots, fusion), pour le pipeline de synchro (YugiCall/pipeline.py).
+- LoadStats   : compteurs optionnels (lignes insérées/mises à jour, temps
+  passé sur les cartes / les sets) repris par le journal des synchros, et
+  empreintes par extension (set_digests) pour rafraîchir les SetSummary.
+"""
+
+import io
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.core.management.base import CommandError
+from django.db import connections, models
+
+from YugiCall.normalize import normalize_key
+from YugiCall.setsummary import add_row
+
+
+def card_values(card: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Champs d'une Card/CardEN à partir d'un dict brut de l'API
+    (clé primaire "id" incluse). Lève CommandError si un champ requis manque.
+    """
+    cid        = card.get("id")
+    name       = card.get("name")
+    ctype      = card.get("type")
+    frametype  = card.get("frameType")
+    desc       = card.get("desc")
+
+    if cid is None or name is None or ctype is None or frametype is None or desc is None:
+        # On exige ces champs minimum pour créer la Card
+        raise CommandError(f"Carte invalide (id/name/type/frameType/desc manquant): {card}")
+
+    # Absent de l'API quand la carte n'est dans aucune banlist.
+    banlist = card.get("banlist_info") or {}
+    race = card.get("race") or ""               # race peut être absente pour Spell/Trap
+    attribute = card.get("attribute") or ""     # idem
+
+    return dict(
+        id=cid,
+        name=name,
+        type=ctype,
+        frameType=frametype,
+        desc=desc,
+        atk=card.get("atk"),
+        def_stat=card.get("def"),                  # 'def' API → def_stat modèle
+        level=card.get("level"),
+        race=race,
+        attribute=attribute,
+        archetype=card.get("archetype") or "",
+        scale=card.get("scale"),                   # monstres Pendule seulement
+        linkval=card.get("linkval"),               # monstres Lien seulement
+        linkmarkers=card.get("linkmarkers") or [],
+        ygoprodeck_url=card.get("ygoprodeck_url") or "",
+        banlist_info=banlist or None,
+        ban_tcg=banlist.get("ban_tcg") or "",      # statut éclaté en colonnes indexées
+        ban_ocg=banlist.get("ban_ocg") or "",
+        ban_goat=banlist.get("ban_goat") or "",
+        # Clés de recherche normalisées (voir YugiCall/normalize.py)
+        name_key=normalize_key(name),
+        type_key=normalize_key(ctype),
+        race_key=normalize_key(race),
+        attribute_key=normalize_key(attribute),
+    )
+
+
+def set_values(s: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Champs d'un CardSet/CardSetEN (sans la carte), ou None si l'entrée
+    n'a pas de set_code (on ne peut pas garantir l'unicité).
+    """
+    set_code = s.get("set_code")
+    if not set_code:
+        return None
+    set_price = s.get("set_price")
+    set_name = s.get("set_name") or ""
+    return dict(
+        set_code=set_code,
+        set_name=set_name,
+        set_name_key=normalize_key(set_name),
+        set_rarity=s.get("set_rarity") or "",
+        set_rarity_code=s.get("set_rarity_code") or "",
+        set_price=(set_price if set_price not in ("", None) else None),
+    )
+
+
+def iter_set_values(card: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    for s in card.get("card_sets") or []:
+        values = set_values(s)
+        if values is not None:
+            yield values
+
+
+class LoadStats:
+    """Compteurs d'un chargement (cartes + sets confondus pour les lignes)."""
+
+    def __init__(self):
+        self.cards = 0
+        self.rows_inserted = 0
+        self.rows_updated = 0
+        self.card_seconds = 0.0
+        self.set_seconds = 0.0
+        # {nom d'extension: empreinte} des impressions chargées (YugiCall/setsummary.py)
+        self.set_digests: Dict[str, int] = {}
+
+    def count(self, created: bool) -> None:
+        if created:
+            self.rows_inserted += 1
+        else:
+            self.rows_updated += 1
+
+    def add_set(self, card_id: Any, sv: Dict[str, Any]) -> None:
+        add_row(self.set_digests, sv["set_name"], card_id, sv["set_code"], sv["set_rarity"], sv["set_price"])
+
+
+# --- Chemin ORM (SQLite / par défaut) ---
+
+def orm_load(card_model, set_model, cards: Iterable[Dict[str, Any]],
+             progress: Optional[Callable[[int], None]] = None, using: Optional[str] = None,
+             stats: Optional[LoadStats] = None) -> int:
+    """Upsert ligne par ligne (update_or_create). Renvoie le nombre de cartes."""
+    cards_mgr = card_model.objects.db_manager(using)
+    sets_mgr = set_model.objects.db_manager(using)
+    stats = stats if stats is not None else LoadStats()
+    clock = time.perf_counter
+    count = 0
+    for card in cards:
+        t0 = clock()
+        values = card_values(card)
+        cid = values.pop("id")
+        obj, created = cards_mgr.update_or_create(id=cid, defaults=values)
+        stats.count(created)
+        t1 = clock()
+        for sv in iter_set_values(card):
+            stats.add_set(cid, sv)
+            set_code = sv.pop("set_code")
+            _set, created = sets_mgr.update_or_create(card=obj, set_code=set_code, defaults=sv)
+            stats.count(created)
+        stats.card_seconds += t1 - t0
+        stats.set_seconds += clock() - t1
+        count += 1
+        if progress is not None:
+            progress(count)
+    stats.cards += count
+    return count
+
+
+# --- Chemin COPY (PostgreSQL) ---
+
+def _copy_text(value: Any) -> str:
+    """Encodage d'une valeur pour COPY … FROM STDIN (format texte)."""
+    if value is None:
+        return r"\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _copy_rows(cursor, table: str, columns: List[str], rows: Iterable[Tuple]) -> None:
+    """COPY de `rows` dans `table` (psycopg 3 : cursor.copy ; psycopg2 : copy_expert)."""
+    raw = cursor.cursor
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    if hasattr(raw, "copy"):
+        with raw.copy(sql) as copy:
+            for row in rows:
+                copy.write_row(row)
+    else:
+        buf = io.StringIO()
+        for row in rows:
+            buf.write("\t".join(_copy_text(v) for v in row))
+            buf.write("\n")
+        buf.seek(0)
+        raw.copy_expert(sql, buf)
+
+
+def _upsert_counted(cursor, table: str, sql: str, stats: LoadStats) -> None:
+    """Exécute un INSERT … ON CONFLICT et répartit rowcount en insertions / mises à jour."""
+    cursor.execute(f"SELECT count(*) FROM {table}")
+    before = cursor.fetchone()[0]
+    cursor.execute(sql)
+    touched = cursor.rowcount
+    cursor.execute(f"SELECT count(*) FROM {table}")
+    inserted = cursor.fetchone()[0] - before
+    stats.rows_inserted += inserted
+    stats.rows_updated += max(0, touched - inserted)
+
+
+class RowLayout:
+    """
+    Ordre des colonnes des tuples prêts à insérer (seq en tête) pour un couple
+    de modèles : partagé par copy_load et le pipeline de synchro (les tuples
+    sont produits dans des processus séparés, d'où des noms et non des champs).
+    """
+
+    # seq d'un set = seq de sa carte * SET_SEQ_STRIDE + rang du set dans la carte
+    SET_SEQ_STRIDE = 10_000
+
+    def __init__(self, card_model, set_model):
+        card_fields = list(card_model._meta.concrete_fields)
+        set_fields = [f for f in set_model._meta.concrete_fields if not f.primary_key]
+        self.card_attnames = [f.attname for f in card_fields]
+        self.set_attnames = [f.attname for f in set_fields]
+        # Colonnes jsonb : COPY attend le texte JSON.
+        self.json_attnames = {f.attname for f in card_fields if isinstance(f, models.JSONField)}
+
+    def rows(self, cards: Iterable[Dict[str, Any]], first_seq: int = 0, json_text: bool = True,
+             digests: Optional[Dict[str, int]] = None) -> Tuple[List[Tuple], List[Tuple]]:
+        """
+        (lignes cartes, lignes sets) pour des dicts bruts de l'API. Les
+        empreintes d'extensions sont ajoutées à `digests` si fourni.
+        """
+        card_rows: List[Tuple] = []
+        set_rows: List[Tuple] = []
+        for i, card in enumerate(cards):
+            seq = first_seq + i
+            values = card_values(card)
+            if json_text:
+                for attname in self.json_attnames:
+                    if values[attname] is not None:
+                        values[attname] = json.dumps(values[attname])
+            card_rows.append((seq,) + tuple(values[a] for a in self.card_attnames))
+            for j, sv in enumerate(iter_set_values(card)):
+                if digests is not None:
+                    add_row(digests, sv["set_name"], values["id"], sv["set_code"], sv["set_rarity"], sv["set_price"])
+                sv["card_id"] = values["id"]
+                set_rows.append((seq * self.SET_SEQ_STRIDE + j,) + tuple(sv[a] for a in self.set_attnames))
+        return card_rows, set_rows
+
+
+class CopyStage:
+    """
+    Tables temporaires de COPY (PostgreSQL, dans une transaction) : copy()
+    autant de fois que voulu, puis merge() = un INSERT … ON CONFLICT DO UPDATE
+    ensembliste par table (dernière occurrence gagnante selon seq).
+    """
+
+    def __init__(self, alias: str, card_model, set_model, layout: RowLayout):
+        self.conn = connections[alias]
+        self.card_model, self.set_model, self.layout = card_model, set_model, layout
+        qn = self.conn.ops.quote_name
+        self.card_cols = [qn(card_model._meta.get_field(a).column) for a in layout.card_attnames]
+        set_fields = [set_model._meta.get_field(a) for a in layout.set_attnames]
+        self.set_cols = [qn(f.column) for f in set_fields]
+        with self.conn.cursor() as cursor:
+            card_table = qn(card_model._meta.db_table)
+            cursor.execute(f"CREATE TEMP TABLE stage_card (seq bigint, LIKE {card_table} INCLUDING DEFAULTS) ON COMMIT DROP")
+            cursor.execute(
+                "CREATE TEMP TABLE stage_set (seq bigint, "
+                + ", ".join(f"{c} {f.db_type(self.conn)}" for c, f in zip(self.set_cols, set_fields))
+                + ") ON COMMIT DROP"
+            )
+
+    def copy(self, card_rows: Iterable[Tuple], set_rows: Iterable[Tuple]) -> float:
+        """COPY d'un lot ; renvoie sa durée, comptée avec les cartes (une seule passe)."""
+        t0 = time.perf_counter()
+        with self.conn.cursor() as cursor:
+            _copy_rows(cursor, "stage_card", ["seq"] + self.card_cols, card_rows)
+            _copy_rows(cursor, "stage_set", ["seq"] + self.set_cols, set_rows)
+        return time.perf_counter() - t0
+
+    def merge(self, stats: LoadStats) -> float:
+        """Fusion dans les vraies tables ; renvoie le temps passé sur les cartes."""
+        qn = self.conn.ops.quote_name
+        card_table, set_table = qn(self.card_model._meta.db_table), qn(self.set_model._meta.db_table)
+        pk_col = qn(self.card_model._meta.pk.column)
+        fk_col = qn(self.set_model._meta.get_field("card").column)
+        code_col = qn(self.set_model._meta.get_field("set_code").column)
+        t0 = time.perf_counter()
+        with self.conn.cursor() as cursor:
+            cols = ", ".join(self.card_cols)
+            updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in self.card_cols if c != pk_col)
+            _upsert_counted(cursor, card_table, (
+                f"INSERT INTO {card_table} ({cols}) "
+                f"SELECT DISTINCT ON ({pk_col}) {cols} FROM stage_card ORDER BY {pk_col}, seq DESC "
+                f"ON CONFLICT ({pk_col}) DO UPDATE SET {updates}"
+            ), stats)
+            card_seconds = time.perf_counter() - t0
+
+            cols = ", ".join(self.set_cols)
+            updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in self.set_cols if c not in (fk_col, code_col))
+            _upsert_counted(cursor, set_table, (
+                f"INSERT INTO {set_table} ({cols}) "
+                f"SELECT DISTINCT ON ({fk_col}, {code_col}) {cols} FROM stage_set "
+                f"ORDER BY {fk_col}, {code_col}, seq DESC "
+                f"ON CONFLICT ({fk_col}, {code_col}) DO UPDATE SET {updates}"
+            ), stats)
+        return card_seconds
+
+
+def copy_load(alias: str, card_model, set_model, cards: Iterable[Dict[str, Any]],
+              stats: Optional[LoadStats] = None) -> int:
+    """
+    Chargement ensembliste PostgreSQL (à appeler dans une transaction) :
+      1. COPY des cartes et des sets dans deux tables temporaires,
+      2. un INSERT … ON CONFLICT DO UPDATE par table (dernière occurrence gagnante,
+         comme avec update_or_create).
+    Renvoie le nombre de cartes chargées.
+    """
+    stats = stats if stats is not None else LoadStats()
+    t0 = time.perf_counter()
+    layout = RowLayout(card_model, set_model)
+    card_rows, set_rows = layout.rows(cards, digests=stats.set_digests)
+    stage = CopyStage(alias, card_model, set_model, layout)
+    stage.copy(card_rows, set_rows)
+    t1 = time.perf_counter()
+    card_seconds = stage.merge(stats)
+    # COPY (cartes + sets) compté avec les cartes : c'est une seule passe sur le JSON.
+    stats.card_seconds += t1 - t0 + card_seconds
+    stats.set_seconds += time.perf_counter() - t1 - card_seconds
+    stats.cards += len(card_rows)
+    return len(card_rows)
+
+
+class BulkStage:
+    """
+    Même rôle que CopyStage pour les autres moteurs (SQLite…) : chaque lot est
+    écrit tout de suite par bulk_create(update_conflicts=True), un INSERT …
+    ON CONFLICT DO UPDATE par paquet au lieu d'un update_or_create par ligne.
+    Insertions / mises à jour déduites du nombre de lignes avant / après.
+    """
+
+    def __init__(self, alias: str, card_model, set_model, layout: RowLayout):
+        self.alias, self.layout = alias, layout
+        self.cards_mgr = card_model.objects.db_manager(alias)
+        self.sets_mgr = set_model.objects.db_manager(alias)
+        self.card_model, self.set_model = card_model, set_model
+        self.card_updates = [a for a in layout.card_attnames if a != card_model._meta.pk.attname]
+        self.set_updates = [set_model._meta.get_field(a).name for a in layout.set_attnames
+                            if a not in ("card_id", "set_code")]
+        self.before = self.cards_mgr.count() + self.sets_mgr.count()
+        self.written = 0
+
+    def copy(self, card_rows: Iterable[Tuple], set_rows: Iterable[Tuple]) -> float:
+        """Écrit un lot ; renvoie le temps passé sur les cartes."""
+        t0 = time.perf_counter()
+        cards = [self.card_model(**dict(zip(self.layout.card_attnames, row[1:]))) for row in card_rows]
+        self.cards_mgr.bulk_create(cards, update_conflicts=True,
+                                   unique_fields=[self.card_model._meta.pk.name], update_fields=self.card_updates)
+        card_seconds = time.perf_counter() - t0
+        sets = [self.set_model(**dict(zip(self.layout.set_attnames, row[1:]))) for row in set_rows]
+        self.sets_mgr.bulk_create(sets, update_conflicts=True,
+                                  unique_fields=["card", "set_code"], update_fields=self.set_updates)
+        self.written += len(cards) + len(sets)
+        return card_seconds
+
+    def merge(self, stats: LoadStats) -> float:
+        """Rien à fusionner (lots déjà écrits) : compte insertions / mises à jour."""
+        inserted = self.cards_mgr.count() + self.sets_mgr.count() - self.before
+        stats.rows_inserted += inserted
+        stats.rows_updated += max(0, self.written - inserted)
+        return 0.0
+
+
+def load_cards(alias: str, card_model, set_model, cards: Iterable[Dict[str, Any]],
+               progress: Optional[Callable[[int], None]] = None,
+               stats: Optional[LoadStats] = None) -> int:
+    """Choisit le chemin de chargement selon le moteur de la base `alias`."""
+    if connections[alias].vendor == "postgresql":
+        return copy_load(alias, card_model, set_model, cards, stats=stats)
+    return orm_load(card_model, set_model, cards, progress=progress, using=alias, stats=stats)
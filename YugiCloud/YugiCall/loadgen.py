@@ -0,0 +1,346 @@
+# YugiCall/loadgen.py
+# -*- coding: utf-8 -*-
+"""
+Générateur de charge asyncio (commande loadtest), sans dépendance externe.
+
+- Boucle ouverte : les arrivées suivent un processus de Poisson au débit
+  demandé, qu'importe la vitesse du serveur. Un serveur saturé se voit
+  donc (latences qui explosent, erreurs) au lieu de ralentir le client.
+- Latence mesurée depuis l'instant d'arrivée prévu (pas depuis l'envoi
+  effectif) : pas d'"omission coordonnée" quand le client prend du retard.
+- Au-delà de max_inflight requêtes en cours, une arrivée est comptée
+  "dropped" plutôt que mise en attente.
+- Client HTTP/1.1 minimal (Connection: close, lecture jusqu'à EOF), avec
+  le temps jusqu'au premier octet pour les pages envoyées en flux.
+
+Les requêtes reprennent le vocabulaire du catalogue synthétique
+(YugiCall/synthetic.py) : termes, archétypes, races, stats plausibles.
+"""
+
+import asyncio
+import random
+import re
+import ssl
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+from YugiCall import synthetic
+
+# Poids par défaut des scénarios (modifiables avec --mix)
+DEFAULT_MIX = {"search_fr": 30, "search_en": 30, "api_cards_fr": 15, "login": 5, "static": 20}
+
+_CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+_STYLESHEET_RE = re.compile(r'<link rel="stylesheet" href="([^"]+)"')
+
+
+class Response:
+    def __init__(self, status: int, headers: Dict[str, List[str]], body: bytes, ttfb: float):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.ttfb = ttfb
+
+    def cookies(self) -> Dict[str, str]:
+        jar = {}
+        for header in self.headers.get("set-cookie", []):
+            name, _, rest = header.partition("=")
+            jar[name.strip()] = rest.split(";", 1)[0]
+        return jar
+
+
+class HttpClient:
+    """Une connexion par requête (comme un worker gunicorn sync, sans keep-alive)."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if self.scheme == "https" else 80)
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._ssl = ssl.create_default_context() if self.scheme == "https" else None
+
+    async def request(self, method: str, path: str, body: bytes = b"",
+                      headers: Optional[Dict[str, str]] = None) -> Response:
+        return await asyncio.wait_for(self._request(method, path, body, headers or {}), self.timeout)
+
+    async def _request(self, method, path, body, headers) -> Response:
+        t0 = time.perf_counter()
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self._ssl)
+        try:
+            lines = [f"{method} {self.prefix}{path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                     "Connection: close", "Accept-Encoding: gzip, br", "User-Agent: yugicloud-loadtest"]
+            lines += [f"{k}: {v}" for k, v in headers.items()]
+            if body:
+                lines.append(f"Content-Length: {len(body)}")
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            ttfb = time.perf_counter() - t0
+            if not status_line:
+                raise ConnectionError("connexion fermée sans réponse")
+            status = int(status_line.split()[1])
+            response_headers: Dict[str, List[str]] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                response_headers.setdefault(name.strip().lower(), []).append(value.strip())
+            payload = await reader.read()
+        finally:
+            writer.close()
+        return Response(status, response_headers, payload, ttfb)
+
+
+# --- Scénarios : chacun renvoie (statut, octets, ttfb) ou lève une exception ---
+
+def _search_params(rnd: random.Random, lang: str) -> Dict[str, str]:
+    words = synthetic.WORDS[lang]
+    field = rnd.choices(
+        ["name", "archetype", "type", "race", "attribute", "atk", "level", "def_stat"],
+        weights=[50, 12, 8, 6, 6, 8, 6, 4],
+    )[0]
+    if field == "name":
+        q = rnd.choice(words)
+    elif field == "archetype":
+        q = rnd.choice([a for a in synthetic.ARCHETYPES if a])
+    elif field == "type":
+        q = rnd.choice(synthetic.MONSTER_TYPES + synthetic.SPELL_TRAP)[0].split()[0]
+    elif field == "race":
+        q = rnd.choice(synthetic.RACES)
+    elif field == "attribute":
+        q = rnd.choice(synthetic.ATTRIBUTES)
+    elif field == "level":
+        q = str(rnd.randint(1, 12))
+    else:
+        q = str(rnd.randrange(0, 41) * 100)
+    return {"field": field, "q": q}
+
+
+class Scenarios:
+    def __init__(self, client: HttpClient, username: str = "", password: str = ""):
+        self.client = client
+        self.username = username
+        self.password = password
+        self.static_paths: List[str] = []
+
+    async def discover(self) -> None:
+        """Feuilles de style servies par l'instance (noms hachés compris), lues sur l'accueil."""
+        home = await self.client.request("GET", "/")
+        html = home.body.decode("utf-8", errors="replace")
+        self.static_paths = [href for href in _STYLESHEET_RE.findall(html) if href.startswith("/")]
+
+    def available(self) -> Dict[str, Callable]:
+        scenarios = {
+            "search_fr": self.search_fr,
+            "search_en": self.search_en,
+            "api_cards_fr": self.api_cards_fr,
+        }
+        if self.username:
+            scenarios["login"] = self.login
+        if self.static_paths:
+            scenarios["static"] = self.static
+        return scenarios
+
+    async def search_fr(self, rnd):
+        return await self._get("/search/fr/?" + urlencode(_search_params(rnd, "fr")))
+
+    async def search_en(self, rnd):
+        return await self._get("/search/en/?" + urlencode(_search_params(rnd, "en")))
+
+    async def api_cards_fr(self, rnd):
+        # Archétype : servi par le catalogue local (les autres filtres iraient chez YGOPRODeck).
+        archetype = rnd.choice([a for a in synthetic.ARCHETYPES if a])
+        return await self._get("/api/cards-fr?" + urlencode({"field": "archetype", "q": archetype}), ok=(200, 404))
+
+    async def static(self, rnd):
+        return await self._get(rnd.choice(self.static_paths))
+
+    async def login(self, rnd):
+        """Page de connexion (jeton CSRF) puis POST ; une connexion réussie répond 302."""
+        page = await self.client.request("GET", "/account/login/")
+        cookies = page.cookies()
+        match = _CSRF_RE.search(page.body.decode("utf-8", errors="replace"))
+        if match is None or "csrftoken" not in cookies:
+            return 599, len(page.body), page.ttfb
+        body = urlencode({"csrfmiddlewaretoken": match.group(1), "username": self.username,
+                          "password": self.password}).encode()
+        response = await self.client.request("POST", "/account/login/", body, {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Cookie": f"csrftoken={cookies['csrftoken']}",
+        })
+        status = 200 if response.status == 302 else (response.status if response.status >= 400 else 401)
+        return status, len(page.body) + len(response.body), page.ttfb
+
+    async def _get(self, path, ok=(200,)):
+        response = await self.client.request("GET", path)
+        status = 200 if response.status in ok else response.status
+        return status, len(response.body), response.ttfb
+
+
+# --- Statistiques ---
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.ttfbs: List[float] = []
+        self.errors: Dict[str, int] = {}
+        # Erreurs sans durée mesurable (exception avant toute réponse)
+        self.unmeasured = 0
+        self.bytes = 0
+
+    def ok(self, latency: float, ttfb: float, size: int) -> None:
+        self.latencies.append(latency)
+        self.ttfbs.append(ttfb)
+        self.bytes += size
+
+    def error(self, kind: str, latency: Optional[float] = None) -> None:
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+        if latency is not None:
+            self.latencies.append(latency)
+        else:
+            self.unmeasured += 1
+
+    def report(self, elapsed: float) -> Dict:
+        count = len(self.latencies) + self.unmeasured
+        failed = sum(self.errors.values())
+        ms = lambda v: None if v is None else round(v * 1000, 2)
+        return {
+            "requests": count,
+            "throughput": round(count / elapsed, 2) if elapsed else None,
+            "errors": failed,
+            "error_rate": round(failed / count, 4) if count else None,
+            "error_kinds": dict(sorted(self.errors.items())),
+            "p50_ms": ms(percentile(self.latencies, 50)),
+            "p95_ms": ms(percentile(self.latencies, 95)),
+            "p99_ms": ms(percentile(self.latencies, 99)),
+            "ttfb_p50_ms": ms(percentile(self.ttfbs, 50)),
+            "bytes": self.bytes,
+        }
+
+
+async def run_stage(scenarios: Dict[str, Callable], mix: Dict[str, float], rate: float, duration: float,
+                    rnd: random.Random, max_inflight: int = 1000) -> Dict:
+    """Une étape à débit constant ; attend la fin des requêtes en cours avant de rendre le rapport."""
+    names = [n for n in mix if n in scenarios and mix[n] > 0]
+    if not names:
+        raise ValueError("Aucun scénario disponible dans le mélange demandé")
+    weights = [mix[n] for n in names]
+    stats = {n: EndpointStats() for n in names}
+    inflight: set = set()
+    sent = dropped = 0
+
+    async def one(name, scheduled, seed):
+        try:
+            status, size, ttfb = await scenarios[name](random.Random(seed))
+        except asyncio.TimeoutError:
+            # Les plus lentes de toutes : comptées dans les percentiles.
+            stats[name].error("timeout", time.perf_counter() - scheduled)
+            return
+        except (OSError, ValueError, IndexError) as e:
+            stats[name].error(type(e).__name__)
+            return
+        latency = time.perf_counter() - scheduled
+        if status >= 400:
+            stats[name].error(f"http_{status}", latency)
+        else:
+            stats[name].ok(latency, ttfb, size)
+
+    start = time.perf_counter()
+    next_at = start
+    while True:
+        next_at += rnd.expovariate(rate)
+        if next_at - start >= duration:
+            break
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        name = rnd.choices(names, weights)[0]
+        if len(inflight) >= max_inflight:
+            dropped += 1
+            continue
+        sent += 1
+        task = asyncio.ensure_future(one(name, next_at, rnd.getrandbits(32)))
+        inflight.add(task)
+        task.add_done_callback(inflight.discard)
+    if inflight:
+        await asyncio.gather(*inflight)
+    elapsed = time.perf_counter() - start
+
+    endpoints = {n: s.report(elapsed) for n, s in stats.items()}
+    completed = sum(e["requests"] - e["errors"] for e in endpoints.values())
+    all_latencies = [v for s in stats.values() for v in s.latencies]
+    return {
+        "target_rate": rate,
+        "duration": round(elapsed, 2),
+        "sent": sent,
+        "dropped": dropped,
+        "completed_ok": completed,
+        "throughput": round(completed / elapsed, 2),
+        "error_rate": round(1 - completed / sent, 4) if sent else None,
+        "p50_ms": None if not all_latencies else round(percentile(all_latencies, 50) * 1000, 2),
+        "p99_ms": None if not all_latencies else round(percentile(all_latencies, 99) * 1000, 2),
+        "endpoints": endpoints,
+    }
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """"search_fr=30,static=10" → {"search_fr": 30.0, "static": 10.0}"""
+    mix = {}
+    for item in text.split(","):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def saturation(stages: List[Dict], max_error_rate: float = 0.01, max_p99_ms: Optional[float] = None) -> Optional[float]:
+    """Plus haut débit demandé tenu sans dépasser le taux d'erreur (et la p99) fixés."""
+    best = None
+    for stage in stages:
+        healthy = (stage["error_rate"] or 0) <= max_error_rate and stage["dropped"] == 0
+        if max_p99_ms is not None and stage["p99_ms"] is not None:
+            healthy = healthy and stage["p99_ms"] <= max_p99_ms
+        if not healthy:
+            break
+        best = stage["target_rate"]
+    return best
+
+
+async def run(base_url: str, rates: List[float], duration: float, mix: Dict[str, float], seed: int = 0,
+              username: str = "", password: str = "", timeout: float = 30.0, max_inflight: int = 1000,
+              max_error_rate: float = 0.01, max_p99_ms: Optional[float] = None,
+              progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    client = HttpClient(base_url, timeout=timeout)
+    scenarios = Scenarios(client, username, password)
+    await scenarios.discover()
+    available = scenarios.available()
+    rnd = random.Random(seed)
+    stages = []
+    for rate in rates:
+        stage = await run_stage(available, mix, rate, duration, rnd, max_inflight)
+        stages.append(stage)
+        if progress is not None:
+            progress(stage)
+    return {
+        "target": base_url,
+        "mix": {n: w for n, w in mix.items() if n in available},
+        "skipped": sorted(n for n in mix if n not in available),
+        "static_paths": scenarios.static_paths,
+        "stages": stages,
+        "saturation_rate": saturation(stages, max_error_rate, max_p99_ms),
+    }
@@ -0,0 +1,92 @@
+# YugiCall/lookup.py
+# -*- coding: utf-8 -*-
+"""
+Résolution de cartes par id depuis le catalogue local, avec cache LRU.
+
+- Une seule requête SQL pour tous les ids manquants du cache (LEFT JOIN sur
+  les sets via values()), quel que soit le nombre de cartes demandées.
+- Cartes sérialisées au format proche de cardinfo ("def", "card_sets"…).
+- Clé de cache : (id, langue, jeton de version du catalogue).
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+
+from django.conf import settings
+
+from YugiCall.cache import LRUCache
+from YugiCall.catalog import lang_models
+from YugiCall.dbversion import cache_token
+
+# Champs carte exposés (nom du champ modèle → clé JSON, alignée sur cardinfo).
+CARD_FIELDS = [
+    ("id", "id"), ("name", "name"), ("type", "type"), ("frameType", "frameType"),
+    ("desc", "desc"), ("atk", "atk"), ("def_stat", "def"), ("level", "level"),
+    ("race", "race"), ("attribute", "attribute"), ("archetype", "archetype"),
+    ("scale", "scale"), ("linkval", "linkval"), ("linkmarkers", "linkmarkers"),
+    ("banlist_info", "banlist_info"), ("ygoprodeck_url", "ygoprodeck_url"),
+]
+SET_FIELDS = ["set_name", "set_code", "set_rarity", "set_rarity_code", "set_price"]
+
+card_cache = LRUCache(maxsize=getattr(settings, "CARD_CACHE_SIZE", 20000))
+
+
+def serialize_set(values: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    out = {name: values[prefix + name] for name in SET_FIELDS}
+    if out["set_price"] is not None:
+        out["set_price"] = str(out["set_price"])
+    return out
+
+
+def fetch_cards(ids: Iterable[int], lang: str, with_sets: bool = True) -> Dict[int, Dict[str, Any]]:
+    """
+    Charge et sérialise les cartes `ids` en UNE requête (sans cache).
+    Renvoie {id: carte} ; les ids inconnus sont simplement absents.
+    """
+    card_model, _set_model = lang_models(lang)
+    ids = list(ids)
+    if not ids:
+        return {}
+    columns = [f for f, _ in CARD_FIELDS]
+    if with_sets:
+        columns += [f"card_sets__{f}" for f in SET_FIELDS]
+    qs = card_model.objects.filter(id__in=ids)
+    if with_sets:
+        qs = qs.order_by("id", "card_sets__set_code")
+    rows = qs.values(*columns)
+
+    cards: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        card = cards.get(row["id"])
+        if card is None:
+            card = {key: row[field] for field, key in CARD_FIELDS}
+            if with_sets:
+                card["card_sets"] = []
+            cards[row["id"]] = card
+        if with_sets and row["card_sets__set_code"] is not None:
+            card["card_sets"].append(serialize_set(row, prefix="card_sets__"))
+    return cards
+
+
+def resolve_cards(ids: Iterable[int], lang: str) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Résout une liste d'ids (ordre conservé, doublons fusionnés) via le cache
+    puis, pour les absents, une seule requête. Renvoie (cartes, ids introuvables).
+    """
+    wanted = list(OrderedDict.fromkeys(int(i) for i in ids))
+    token = cache_token(lang)
+    found: Dict[int, Dict[str, Any]] = {}
+    missing: List[int] = []
+    for cid in wanted:
+        card = card_cache.get((cid, lang, token))
+        if card is None:
+            missing.append(cid)
+        else:
+            found[cid] = card
+    if missing:
+        for cid, card in fetch_cards(missing, lang).items():
+            card_cache.set((cid, lang, token), card)
+            found[cid] = card
+    cards = [found[cid] for cid in wanted if cid in found]
+    unknown = [cid for cid in wanted if cid not in found]
+    return cards, unknown
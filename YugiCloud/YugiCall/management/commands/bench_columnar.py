@@ -0,0 +1,83 @@
+# YugiCall/management/commands/bench_columnar.py
+# -*- coding: utf-8 -*-
+
+# Import standard libs
+import json
+import statistics
+import time
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+
+from YugiCall import columnar
+from YugiCall.catalog import LANGUAGES, lang_models
+
+# Requêtes mesurées : (nom, filtres (champ, opérateur, valeur), tri).
+SCENARIOS = [
+    ("atk_exact",        [("atk", "exact", 2500)],                                      "name"),
+    ("def_exact",        [("def_stat", "exact", 2000)],                                 "name"),
+    ("level_in",         [("level", "in", [4, 8])],                                     "name"),
+    ("atk_range",        [("atk", "gte", 1500), ("atk", "lte", 2500)],                  "-atk"),
+    ("combined_sorted",  [("level", "lte", 4), ("atk", "gte", 1800), ("def_stat", "lt", 1000)], "-atk"),
+]
+
+
+def _orm_ids(card_model, filters, order_by):
+    """Même requête via l'ORM (NULL en dernier, égalités départagées par nom)."""
+    lookups = {}
+    for field, op, value in filters:
+        lookups[field if op == "exact" else f"{field}__{op}"] = value
+    key = order_by.lstrip("-")
+    if key in ("name", "id"):
+        ordering = [order_by, "id"] if key == "name" else [order_by]
+    else:
+        expr = F(key).desc(nulls_last=True) if order_by.startswith("-") else F(key).asc(nulls_last=True)
+        ordering = [expr, "name", "id"]
+    return list(card_model.objects.filter(**lookups).order_by(*ordering).values_list("id", flat=True))
+
+
+def _timed(fn, repeat):
+    samples, result = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return result, round(statistics.median(samples), 3)
+
+
+class Command(BaseCommand):
+    """
+    Commande: python manage.py bench_columnar [--lang en] [--repeat 20]
+    Compare, sur le catalogue local, les filtres atk/def/niveau :
+    - "orm"      : requête SQL (ids triés),
+    - "columnar" : masques NumPy sur le store en mémoire.
+    Affiche un rapport JSON (médianes en ms, empreinte mémoire, cohérence).
+    """
+
+    help = "Benchmark des filtres numériques : ORM vs moteur colonnaire NumPy."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lang", choices=LANGUAGES, default="en", help="Langue du catalogue (défaut: %(default)s).")
+        parser.add_argument("--repeat", type=int, default=20, help="Répétitions par requête (défaut: %(default)s).")
+
+    def handle(self, *args, **options):
+        if columnar.np is None:
+            raise CommandError("NumPy n'est pas installé : pip install numpy")
+        lang, repeat = options["lang"], options["repeat"]
+        card_model, _set_model = lang_models(lang)
+
+        store, build_ms = _timed(lambda: columnar.ColumnarStore.build(lang), 1)
+        report = {"lang": lang, "store": store.stats(), "build_ms": build_ms, "results": {}}
+
+        for name, filters, order_by in SCENARIOS:
+            orm, orm_ms = _timed(lambda: _orm_ids(card_model, filters, order_by), repeat)
+            col, col_ms = _timed(lambda: store.query(filters, order_by=order_by), repeat)
+            report["results"][name] = {
+                "rows": len(col),
+                "orm_ms": orm_ms,
+                "columnar_ms": col_ms,
+                "speedup": round(orm_ms / col_ms, 1) if col_ms else None,
+                "same_ids": orm == col,
+            }
+        self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
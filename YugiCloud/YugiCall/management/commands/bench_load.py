@@ -0,0 +1,66 @@
+# YugiCall/management/commands/bench_load.py
+# -*- coding: utf-8 -*-
+
+# Import standard libs
+import json
+import time
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from YugiCall import loader, synthetic
+from YugiCall.catalog import catalog_alias
+from YugiCall.models import CardEN, CardSetEN
+
+
+class _Rollback(Exception):
+    """Annule la transaction de mesure : la base ressort inchangée."""
+
+
+class Command(BaseCommand):
+    """
+    Commande: python manage.py bench_load [--cards 13000]
+    Compare les temps de chargement du catalogue (CardEN/CardSetEN) :
+    - "orm"  : update_or_create ligne par ligne,
+    - "copy" : COPY + INSERT … ON CONFLICT (PostgreSQL uniquement).
+    Chaque mesure tourne dans une transaction annulée à la fin.
+    """
+
+    help = "Benchmark du chargement du catalogue : ORM ligne à ligne vs COPY (PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cards", type=int, default=13000, help="Cartes synthétiques (défaut: %(default)s).")
+        parser.add_argument("--database", default=None, help="Alias DB (défaut: base catalogue).")
+        parser.add_argument("--empty", action="store_true",
+                            help="Vide les tables avant chargement (import initial plutôt que mise à jour).")
+
+    def handle(self, *args, **options):
+        alias = options["database"] or catalog_alias()
+        vendor = connections[alias].vendor
+        cards = list(synthetic.generate_cards(options["cards"], seed=42))
+
+        methods = {"orm": lambda: loader.orm_load(CardEN, CardSetEN, cards, using=alias)}
+        if vendor == "postgresql":
+            methods["copy"] = lambda: loader.copy_load(alias, CardEN, CardSetEN, cards)
+
+        report = {"database": alias, "vendor": vendor, "cards": len(cards), "results": {}}
+        for name, run in methods.items():
+            self.stderr.write(f"→ {name}…")
+            elapsed = None
+            try:
+                with transaction.atomic(using=alias):
+                    if options["empty"]:
+                        CardSetEN.objects.using(alias).all().delete()
+                        CardEN.objects.using(alias).all().delete()
+                    t0 = time.perf_counter()
+                    run()
+                    elapsed = time.perf_counter() - t0
+                    raise _Rollback()
+            except _Rollback:
+                pass
+            report["results"][name] = {
+                "seconds": round(elapsed, 3),
+                "cards_per_sec": round(len(cards) / elapsed, 1) if elapsed else None,
+            }
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,131 @@
+# YugiCall/management/commands/bench_login.py
+# -*- coding: utf-8 -*-
+
+# Import standard libs
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+BENCH_PASSWORD = "bench-Login-2024!"
+# Référence : comportement d'avant (sessions en base, ModelBackend sans cache)
+BASELINE = ("baseline", "db", "django.contrib.auth.backends.ModelBackend")
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))], 1)
+
+
+class Command(BaseCommand):
+    """
+    Commande: python manage.py bench_login [--logins 20] [--concurrency 4] [--views 50]
+                                           [--engines cached_db,cache,signed_cookies]
+    Pour la référence (sessions en base + ModelBackend) puis chaque moteur de session :
+    - connexions : POST /account/login/ depuis --concurrency threads,
+      débit (connexions/s) et latences p50/p95 en ms,
+    - pages vues : GET de l'accueil en étant connecté, requêtes SQL sur la
+      base "default" (sessions + utilisateurs) par page.
+    Un utilisateur temporaire est créé puis supprimé. Rapport JSON.
+    """
+
+    help = "Benchmark du chemin connexion/session de YugiLog."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=20, help="Connexions par scénario (défaut: %(default)s).")
+        parser.add_argument("--concurrency", type=int, default=4, help="Threads clients (défaut: %(default)s).")
+        parser.add_argument("--views", type=int, default=50, help="Pages vues par scénario (défaut: %(default)s).")
+        parser.add_argument("--engines", default="cached_db,cache,signed_cookies",
+                            help="Moteurs de session comparés (clés de SESSION_ENGINES).")
+
+    def handle(self, *args, **options):
+        engines = [e.strip() for e in options["engines"].split(",") if e.strip()]
+        unknown = [e for e in engines if e not in settings.SESSION_ENGINES]
+        if unknown:
+            raise CommandError(f"Moteur(s) inconnu(s) : {', '.join(unknown)} (choix : {', '.join(settings.SESSION_ENGINES)})")
+
+        scenarios = [BASELINE] + [(e, e, "YugiLog.backends.CachedModelBackend") for e in engines]
+        User = get_user_model()
+        username = f"bench_login_{os.getpid()}"
+        User.objects.filter(username=username).delete()
+        User.objects.create_user(username, password=BENCH_PASSWORD)
+        report = {
+            "logins": options["logins"],
+            "concurrency": options["concurrency"],
+            "password_hasher": settings.PASSWORD_HASHERS[0].rsplit(".", 1)[-1],
+            "scenarios": {},
+        }
+        try:
+            for name, engine, backend in scenarios:
+                with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[engine],
+                                       AUTHENTICATION_BACKENDS=[backend],
+                                       ALLOWED_HOSTS=["testserver"]):
+                    cache.clear()
+                    report["scenarios"][name] = {
+                        "session_engine": engine,
+                        "backend": backend.rsplit(".", 1)[-1],
+                        **self.bench_logins(username, options["logins"], options["concurrency"]),
+                        **self.bench_views(username, options["views"]),
+                    }
+        finally:
+            User.objects.filter(username=username).delete()
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def bench_logins(self, username, count, concurrency):
+        login_url = reverse("YugiLog:login")
+
+        def worker(n):
+            client, samples, failures = Client(), [], 0
+            try:
+                for _ in range(n):
+                    t0 = time.perf_counter()
+                    response = client.post(login_url, {"username": username, "password": BENCH_PASSWORD})
+                    samples.append((time.perf_counter() - t0) * 1000)
+                    failures += response.status_code != 302
+            finally:
+                connections.close_all()
+            return samples, failures
+
+        shares = [count // concurrency + (i < count % concurrency) for i in range(concurrency)]
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(worker, [n for n in shares if n]))
+        elapsed = time.perf_counter() - t0
+        samples = [s for r in results for s in r[0]]
+        return {
+            "logins_per_sec": round(len(samples) / elapsed, 2),
+            "login_p50_ms": _percentile(samples, 50),
+            "login_p95_ms": _percentile(samples, 95),
+            "login_failures": sum(r[1] for r in results),
+        }
+
+    def bench_views(self, username, count):
+        client = Client()
+        if not client.login(username=username, password=BENCH_PASSWORD):
+            raise CommandError("Connexion impossible avec l'utilisateur de test.")
+        url = reverse("YugiWeb:accueil")
+        client.get(url)  # première vue : remplit les caches
+        samples, queries = [], []
+        for _ in range(count):
+            with CaptureQueriesContext(connections["default"]) as ctx:
+                t0 = time.perf_counter()
+                response = client.get(url)
+                samples.append((time.perf_counter() - t0) * 1000)
+            if response.status_code != 200 or not response.wsgi_request.user.is_authenticated:
+                raise CommandError(f"Page vue non authentifiée (HTTP {response.status_code}).")
+            queries.append(len(ctx.captured_queries))
+        return {
+            "view_p50_ms": round(statistics.median(samples), 2),
+            "default_db_queries_per_view": round(statistics.mean(queries), 2),
+        }
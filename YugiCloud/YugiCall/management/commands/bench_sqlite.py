@@ -0,0 +1,158 @@
+# YugiCall/management/commands/bench_sqlite.py
+# -*- coding: utf-8 -*-
+
+# Import standard libs
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+# Django
+from django.core.management.base import BaseCommand
+
+from YugiCall.sqlite_profile import pragma_statements
+
+
+# Schéma proche de YugiCall_card (mêmes index) : le bench ne dépend pas de l'ORM.
+SCHEMA = [
+    """CREATE TABLE card (id INTEGER PRIMARY KEY, name TEXT NOT NULL, type TEXT NOT NULL,
+       "desc" TEXT NOT NULL, atk INTEGER, def_stat INTEGER, level INTEGER,
+       race TEXT NOT NULL, attribute TEXT NOT NULL)""",
+    "CREATE INDEX card_name ON card(name)",
+    "CREATE INDEX card_type ON card(type)",
+    "CREATE INDEX card_atk ON card(atk)",
+    "CREATE INDEX card_level ON card(level)",
+]
+TYPES = ["Effect Monster", "Normal Monster", "Spell Card", "Trap Card", "XYZ Monster", "Link Monster"]
+WORDS = ["Dragon", "Magicien", "Sombre", "Blue-Eyes", "Héros", "Cyber", "Chaos", "Lumière", "Guerrier"]
+
+
+def _card_row(rnd: random.Random, cid: int):
+    name = " ".join(rnd.choice(WORDS) for _ in range(3)) + f" {cid}"
+    return (cid, name, rnd.choice(TYPES), "Effet " * rnd.randint(5, 40),
+            rnd.choice([None, 0, 1000, 1800, 2500, 3000]), rnd.choice([None, 0, 1200, 2500]),
+            rnd.choice([None, 1, 4, 7, 8]), rnd.choice(["Dragon", "Warrior", "Spellcaster"]),
+            rnd.choice(["LIGHT", "DARK", "FIRE"]))
+
+
+def _connect(path: str, profile: Optional[str], timeout: float) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    for stmt in pragma_statements(profile):
+        conn.execute(stmt)
+    return conn
+
+
+def _reader(path: str, profile: Optional[str], n_cards: int, stop, start, out) -> None:
+    """Processus lecteur : enchaîne des requêtes de recherche typiques jusqu'au signal stop."""
+    rnd = random.Random(os.getpid())
+    conn = _connect(path, profile, timeout=5.0)
+    start.wait()
+    ok = busy = 0
+    latencies: List[float] = []
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        try:
+            kind = rnd.random()
+            if kind < 0.4:
+                conn.execute("SELECT id, name FROM card WHERE name LIKE ? ORDER BY name LIMIT 50",
+                             (f"%{rnd.choice(WORDS)}%",)).fetchall()
+            elif kind < 0.7:
+                conn.execute("SELECT id, name FROM card WHERE atk = ? ORDER BY name LIMIT 50",
+                             (rnd.choice([1000, 2500, 3000]),)).fetchall()
+            else:
+                conn.execute("SELECT * FROM card WHERE id = ?", (rnd.randrange(n_cards),)).fetchall()
+            ok += 1
+            latencies.append(time.perf_counter() - t0)
+        except sqlite3.OperationalError:
+            busy += 1
+    out.put({"ok": ok, "busy": busy, "latencies": latencies})
+    conn.close()
+
+
+def _sync_pass(path: str, profile: Optional[str], n_cards: int, seed: int) -> float:
+    """Une "synchro" : upsert ligne à ligne de tout le catalogue dans une transaction."""
+    rnd = random.Random(seed)
+    conn = _connect(path, profile, timeout=60.0)
+    t0 = time.perf_counter()
+    conn.execute("BEGIN")
+    for cid in range(n_cards):
+        conn.execute("INSERT OR REPLACE INTO card VALUES (?,?,?,?,?,?,?,?,?)", _card_row(rnd, cid))
+    conn.execute("COMMIT")
+    elapsed = time.perf_counter() - t0
+    conn.close()
+    return elapsed
+
+
+def run_scenario(name: str, web: Optional[str], sync: Optional[str], n_cards: int,
+                 readers: int, passes: int) -> Dict[str, object]:
+    with tempfile.TemporaryDirectory(prefix="bench-sqlite-") as tmp:
+        path = os.path.join(tmp, "catalog.sqlite3")
+        conn = _connect(path, sync, timeout=60.0)
+        for stmt in SCHEMA:
+            conn.execute(stmt)
+        conn.close()
+        _sync_pass(path, sync, n_cards, seed=0)
+
+        stop, start = multiprocessing.Event(), multiprocessing.Event()
+        out = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_reader, args=(path, web, n_cards, stop, start, out))
+                 for _ in range(readers)]
+        for p in procs:
+            p.start()
+        start.set()
+        t0 = time.perf_counter()
+        sync_times = [_sync_pass(path, sync, n_cards, seed=i + 1) for i in range(passes)]
+        wall = time.perf_counter() - t0
+        stop.set()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+    latencies = sorted(l for r in results for l in r["latencies"])
+    ok = sum(r["ok"] for r in results)
+
+    def pct(q: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2) if latencies else 0.0
+
+    return {
+        "scenario": name,
+        "reads_per_sec_during_sync": round(ok / wall, 1) if wall else 0.0,
+        "reads_ok": ok,
+        "reads_busy": sum(r["busy"] for r in results),
+        "read_p50_ms": pct(0.50),
+        "read_p95_ms": pct(0.95),
+        "read_p99_ms": pct(0.99),
+        "sync_pass_s": round(statistics.mean(sync_times), 3),
+    }
+
+
+class Command(BaseCommand):
+    """
+    Commande: python manage.py bench_sqlite
+    Mesure le débit de lecture concurrent PENDANT des synchros, sans profil
+    (journal rollback, réglages par défaut) puis avec les profils web/sync.
+    Résultat en JSON sur la sortie standard.
+    """
+
+    help = "Benchmark : lectures concurrentes pendant une synchro, avant/après les profils SQLite."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cards", type=int, default=13000, help="Taille du catalogue (défaut: %(default)s).")
+        parser.add_argument("--readers", type=int, default=4, help="Processus lecteurs (défaut: %(default)s).")
+        parser.add_argument("--passes", type=int, default=3, help="Synchros successives mesurées (défaut: %(default)s).")
+
+    def handle(self, *args, **options):
+        scenarios = [
+            ("default", None, None),
+            ("profiles(web/sync)", "web", "sync"),
+        ]
+        report = []
+        for name, web, sync in scenarios:
+            self.stderr.write(f"→ Scénario {name}…")
+            report.append(run_scenario(name, web, sync, options["cards"], options["readers"], options["passes"]))
+        self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
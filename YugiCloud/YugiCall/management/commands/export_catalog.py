@@ -0,0 +1,49 @@
+# YugiCall/management/commands/export_catalog.py
+# -*- coding: utf-8 -*-
+
+# Import standard libs
+import os
+import time
+
+# Django
+from django.core.management.base import BaseCommand
+
+from YugiCall import dbversion, snapshot
+
+
+class Command(BaseCommand):
+    """
+    Commande: python manage.py export_catalog [--output fichier.ygcs]
+    - Écrit Card/CardSet/CardEN/CardSetEN dans un instantané colonnaire compressé.
+    - Nom par défaut : catalog-<database_version>.ygcs (un artefact par version).
+    """
+
+    help = "Exporte le catalogue local dans un instantané colonnaire compressé (.ygcs)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", default=None,
+                            help="Fichier de sortie (défaut: catalog-<database_version>.ygcs).")
+        parser.add_argument("--preset", type=int, default=6, choices=range(10),
+                            help="Niveau de compression lzma 0-9 (défaut: %(default)s).")
+
+    def handle(self, *args, **options):
+        versions = {lang: dbversion.read_marker(lang) for lang in dbversion.MARKER_FILES}
+        output = options["output"]
+        if not output:
+            ver = dbversion.version_string(versions["en"]) or dbversion.version_string(versions["fr"]) or "unknown"
+            output = f"catalog-{ver}.ygcs"
+
+        self.stdout.write(f"→ Export du catalogue vers {output}…")
+        started = time.monotonic()
+        # Écriture dans un temporaire puis rename : jamais de fichier à moitié écrit.
+        tmp = f"{output}.tmp"
+        with open(tmp, "wb") as fh:
+            header = snapshot.export_snapshot(fh, versions, preset=options["preset"])
+        os.replace(tmp, output)
+
+        for table in header["tables"]:
+            self.stdout.write(f"   {table['model']}: {table['rows']} lignes")
+        size_kb = os.path.getsize(output) / 1024
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Export terminé : {size_kb:.0f} Ko en {time.monotonic() - started:.1f}s."
+        ))
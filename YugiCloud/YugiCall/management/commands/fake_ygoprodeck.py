@@ -0,0 +1,58 @@
+# YugiCall/management/commands/fake_ygoprodeck.py
+# -*- coding: utf-8 -*-
+
+# Import standard libs
+import time
+
+# Django
+from django.core.management.base import BaseCommand
+
+from YugiCall.fake_ygoprodeck import Faults, FakeYGOPRODeck
+
+
+class Command(BaseCommand):
+    """
+    Commande: python manage.py fake_ygoprodeck [--port 8099] [--cards 13000] [--seed 0]
+              [--latency 0.2 --jitter 0.1] [--rate-limit-rate 0.05 --retry-after 2]
+              [--error-rate 0.05] [--truncate-rate 0.02] [--slow-rate 0.1 --slow-bps 50000]
+    Sert cardinfo.php / checkDBVer.php (catalogue synthétique) sous /api/v7 jusqu'à Ctrl+C.
+    Puis, dans un autre terminal :
+      YUGICLOUD_YGOPRODECK_API_BASE=http://127.0.0.1:8099/api/v7 python manage.py sync_DB_pub_en --force
+    Compteurs (requêtes, statuts, pannes injectées) : GET /stats.
+    """
+
+    help = "Serveur YGOPRODeck de remplacement (catalogue synthétique, pannes injectables)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1", help="Adresse d'écoute (défaut: %(default)s).")
+        parser.add_argument("--port", type=int, default=8099, help="Port (défaut: %(default)s).")
+        parser.add_argument("--cards", type=int, default=13000, help="Taille du catalogue (défaut: %(default)s).")
+        parser.add_argument("--seed", type=int, default=0, help="Graine du catalogue et des pannes.")
+        parser.add_argument("--db-version", default="1.0", help="database_version renvoyée par checkDBVer.")
+        parser.add_argument("--latency", type=float, default=0.0, help="Délai fixe par requête (s).")
+        parser.add_argument("--jitter", type=float, default=0.0, help="Délai aléatoire ajouté, uniforme [0, jitter] (s).")
+        parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Part des requêtes refusées en 429.")
+        parser.add_argument("--retry-after", type=int, default=1, help="Retry-After des 429 (s).")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Part des requêtes en 5xx.")
+        parser.add_argument("--truncate-rate", type=float, default=0.0, help="Part des corps coupés à mi-chemin.")
+        parser.add_argument("--slow-rate", type=float, default=0.0, help="Part des réponses envoyées lentement.")
+        parser.add_argument("--slow-bps", type=int, default=64 * 1024, help="Débit des réponses lentes (octets/s).")
+
+    def handle(self, *args, **options):
+        faults = Faults(
+            latency=options["latency"], jitter=options["jitter"],
+            rate_limit_rate=options["rate_limit_rate"], retry_after=options["retry_after"],
+            error_rate=options["error_rate"], truncate_rate=options["truncate_rate"],
+            slow_rate=options["slow_rate"], slow_bps=options["slow_bps"], seed=options["seed"],
+        )
+        fake = FakeYGOPRODeck(cards=options["cards"], seed=options["seed"], host=options["host"],
+                              port=options["port"], faults=faults, database_version=options["db_version"])
+        with fake:
+            self.stdout.write(self.style.SUCCESS(f"YGOPRODeck de remplacement sur {fake.api_base} "
+                                                 f"({options['cards']} cartes) — Ctrl+C pour arrêter"))
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
+        self.stdout.write(str(fake.stats()))
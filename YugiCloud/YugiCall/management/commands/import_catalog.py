@@ -0,0 +1,67 @@
+# YugiCall/management/commands/import_catalog.py
+# -*- coding: utf-8 -*-
+
+# Import standard libs
+import time
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from YugiCall import dbversion, setsummary, snapshot
+from YugiCall.catalog import LANGUAGES, staged_catalog
+from YugiCall.runlog import record_run
+from YugiCall.sqlite_profile import activate as activate_sqlite_profile
+from YugiCall.synclock import sync_lock
+
+
+class Command(BaseCommand):
+    """
+    Commande: python manage.py import_catalog catalog-<version>.ygcs
+    - Recharge tout le catalogue depuis un instantané, sans aucun accès réseau.
+    - Met à jour les marqueurs de version : la prochaine synchro ne refait
+      rien tant que YGOPRODeck n'a pas publié de nouvelle version.
+    """
+
+    help = "Importe un instantané .ygcs (export_catalog) dans les tables du catalogue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Fichier .ygcs à importer.")
+        parser.add_argument("--wait", type=float, default=0.0,
+                            help="Secondes d'attente si une synchronisation est en cours.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        started = time.monotonic()
+        activate_sqlite_profile("sync")
+        # Même verrou que les synchros : un import ne croise jamais un sync_DB_pub.
+        with sync_lock(wait=options["wait"]), record_run("import_catalog") as run:
+            self.stdout.write(f"→ Import de {path}…")
+            try:
+                # Chargé dans une copie du catalogue puis basculé d'un coup.
+                with open(path, "rb") as fh, staged_catalog() as alias:
+                    run.lap("prepare")
+                    header = snapshot.import_snapshot(fh, using=alias, stats=run.load)
+                    run.lap("write")
+                    # Les instantanés ne contiennent pas les résumés : reconstruction complète.
+                    with transaction.atomic(using=alias):
+                        for lang in LANGUAGES:
+                            setsummary.refresh(alias, lang)
+                    run.lap("set_summaries")
+            except OSError as e:
+                raise CommandError(f"Lecture impossible: {e}")
+            except snapshot.SnapshotError as e:
+                raise CommandError(str(e))
+
+            versions = header.get("versions") or {}
+            for lang, remote_ver in versions.items():
+                if remote_ver is not None and lang in dbversion.MARKER_FILES:
+                    dbversion.write_marker(lang, remote_ver)
+            run.lap("finalize")
+            run.run.remote_version = ", ".join(
+                f"{lang}={dbversion.version_string(v)}" for lang, v in versions.items() if v is not None)[:50]
+            run.load.cards = sum(t["rows"] for t in header["tables"] if t["model"] in ("YugiCall.Card", "YugiCall.CardEN"))
+
+        for table in header["tables"]:
+            self.stdout.write(f"   {table['model']}: {table['rows']} lignes")
+        self.stdout.write(self.style.SUCCESS(f"✓ Import terminé en {time.monotonic() - started:.1f}s."))
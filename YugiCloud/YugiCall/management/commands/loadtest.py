@@ -0,0 +1,77 @@
+# YugiCall/management/commands/loadtest.py
+# -*- coding: utf-8 -*-
+
+# Import standard libs
+import asyncio
+import json
+import sys
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+
+from YugiCall import loadgen
+
+
+class Command(BaseCommand):
+    """
+    Commande: python manage.py loadtest --url http://127.0.0.1:8000 --rates 5,10,20,40 [--duration 30]
+              [--mix search_fr=30,search_en=30,api_cards_fr=15,login=5,static=20]
+              [--user bench --password …] [--max-p99-ms 1000]
+    Charge en boucle ouverte une instance qui tourne (gunicorn, runserver…) :
+    - une étape par débit de --rates (req/s, arrivées de Poisson), --duration s chacune,
+    - par endpoint : débit, latences p50/p95/p99, temps au premier octet, erreurs,
+    - "saturation_rate" : plus haut débit tenu (erreurs ≤ --max-error-rate, p99 ≤ --max-p99-ms).
+    Le scénario "login" n'est joué qu'avec --user/--password (compte existant).
+    Rapport JSON sur la sortie standard, avancement sur la sortie d'erreur.
+    """
+
+    help = "Test de charge asyncio (boucle ouverte) des pages et API, rapport JSON par endpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Instance ciblée (défaut: %(default)s).")
+        parser.add_argument("--rates", default="5,10,20",
+                            help="Débits successifs en requêtes/s, séparés par des virgules (défaut: %(default)s).")
+        parser.add_argument("--duration", type=float, default=30.0, help="Durée de chaque étape en s (défaut: %(default)s).")
+        parser.add_argument("--mix", default=",".join(f"{k}={v}" for k, v in loadgen.DEFAULT_MIX.items()),
+                            help="Poids des scénarios (défaut: %(default)s).")
+        parser.add_argument("--user", default="", help="Compte utilisé par le scénario login.")
+        parser.add_argument("--password", default="", help="Mot de passe du compte --user.")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Délai max par requête en s (défaut: %(default)s).")
+        parser.add_argument("--max-inflight", type=int, default=1000,
+                            help="Requêtes simultanées max ; au-delà les arrivées sont comptées 'dropped'.")
+        parser.add_argument("--max-error-rate", type=float, default=0.01,
+                            help="Taux d'erreur toléré pour la saturation (défaut: %(default)s).")
+        parser.add_argument("--max-p99-ms", type=float, default=None, help="p99 tolérée pour la saturation (ms).")
+        parser.add_argument("--seed", type=int, default=0, help="Graine (mêmes requêtes d'un run à l'autre).")
+
+    def handle(self, *args, **options):
+        try:
+            rates = [float(r) for r in options["rates"].split(",") if r.strip()]
+        except ValueError:
+            raise CommandError("--rates : nombres séparés par des virgules (ex: 5,10,20)")
+        if not rates or min(rates) <= 0:
+            raise CommandError("--rates : au moins un débit strictement positif")
+        mix = loadgen.parse_mix(options["mix"])
+        unknown = [n for n in mix if n not in loadgen.DEFAULT_MIX]
+        if unknown:
+            raise CommandError(f"Scénario(s) inconnu(s) : {', '.join(unknown)} (choix : {', '.join(loadgen.DEFAULT_MIX)})")
+
+        def progress(stage):
+            # Palier sans requête envoyée : taux d'erreur et p99 valent None.
+            errors = "n/a" if stage["error_rate"] is None else f"{stage['error_rate']:.2%}"
+            p99 = "n/a" if stage["p99_ms"] is None else f"{stage['p99_ms']} ms"
+            sys.stderr.write(f"{stage['target_rate']:>7} req/s → {stage['throughput']:>7} ok/s, "
+                             f"erreurs {errors}, p99 {p99}, dropped {stage['dropped']}\n")
+
+        try:
+            report = asyncio.run(loadgen.run(
+                options["url"], rates, options["duration"], mix, seed=options["seed"],
+                username=options["user"], password=options["password"], timeout=options["timeout"],
+                max_inflight=options["max_inflight"], max_error_rate=options["max_error_rate"],
+                max_p99_ms=options["max_p99_ms"], progress=progress,
+            ))
+        except (OSError, asyncio.TimeoutError) as e:
+            raise CommandError(f"Instance injoignable ({options['url']}) : {e}")
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,42 @@
+# YugiCall/management/commands/refresh_set_summaries.py
+# -*- coding: utf-8 -*-
+
+# Import standard libs
+import time
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from YugiCall import setsummary
+from YugiCall.catalog import LANGUAGES, staged_catalog
+from YugiCall.sqlite_profile import activate as activate_sqlite_profile
+from YugiCall.synclock import sync_lock
+
+
+class Command(BaseCommand):
+    """
+    Commande: python manage.py refresh_set_summaries [--lang fr|en]
+    Reconstruit les résumés par extension (SetSummary) depuis les tables du
+    catalogue : à lancer une fois après la migration qui crée la table. Les
+    synchros les tiennent ensuite à jour seules (extensions modifiées seulement).
+    Même verrou et même bascule blue/green qu'une synchro.
+    """
+
+    help = "Reconstruit les résumés par extension (pages /sets/, API /api/sets)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lang", choices=LANGUAGES, help="Une seule langue (défaut: toutes).")
+        parser.add_argument("--wait", type=float, default=0.0,
+                            help="Secondes d'attente si une synchronisation est en cours.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        langs = [options["lang"]] if options["lang"] else list(LANGUAGES)
+        activate_sqlite_profile("sync")
+        with sync_lock(wait=options["wait"]), staged_catalog() as alias:
+            for lang in langs:
+                with transaction.atomic(using=alias):
+                    refreshed = setsummary.refresh(alias, lang)
+                self.stdout.write(f"   {lang}: {refreshed} extension(s) recalculée(s).")
+        self.stdout.write(self.style.SUCCESS(f"✓ Résumés à jour en {time.monotonic() - started:.1f}s."))
@@ -2,167 +2,40 @@
 # -*- coding: utf-8 -*-
 
 # Import standard libs
-import time                                      # pour temporiser entre les requêtes (throttling)
-from typing import Dict, Any, Iterable, Optional # annotations utiles
-
-# HTTP client
-import requests                                  # client HTTP simple et robuste
+from typing import Dict, Any, Iterable           # annotations utiles
 
 # Django
-from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.core.management.base import BaseCommand
 from django.db import transaction                 # pour grouper des écritures atomiques
 from django.utils import timezone                 # timestamps si besoin
 
 # Tes modèles
 from YugiCall.models import Card, CardSet         # modèles définis plus tôt
-
-
-# --- Constantes d'API ---
-API_BASE = "https://db.ygoprodeck.com/api/v7"     # base de l'API v7
-CHECK_DB_VER_URL = f"{API_BASE}/checkDBVer.php"   # endpoint pour savoir si la DB a changé
-CARDINFO_URL     = f"{API_BASE}/cardinfo.php"     # endpoint principal pour récupérer les cartes
-
+from YugiCall.synclock import sync_lock           # verrou partagé avec sync_daemon
+from YugiCall import dbversion                    # marqueurs .last_db_ver*.json
+from YugiCall.catalog import require_rows, staged_catalog  # base catalogue blue/green
+from YugiCall.sqlite_profile import activate as activate_sqlite_profile  # PRAGMA "sync"
+from YugiCall.loader import load_cards             # mapping API → modèles + COPY PostgreSQL
+from YugiCall.pipeline import SyncPipeline         # téléchargement / transformation / écriture en parallèle
+from YugiCall import setsummary                    # résumés par extension (pages /sets/)
+from YugiCall.runlog import record_run             # journal des synchros (SyncRun)
+from YugiCall.ygoprodeck import (                  # client YGOPRODeck partagé (limiteur inter-processus)
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_WORKERS,
+    PagedFetch,
+    download_all_cards,
+    fetch_db_version,
+)
+
+
+# --- API YGOPRODeck ---
 # D'après la doc v7:
 # - Rate limit: 20 requêtes / seconde, ban 1 heure si dépassé.
-#   On se garde une marge de sécurité : on enverra au plus 5 req/s.
+#   Le limiteur partagé (YugiCall/ygoprodeck.py) vaut pour TOUS les processus
+#   de la machine (synchros, workers web) et laisse la priorité aux recherches.
 # - Conseil: télécharger / stocker en local et limiter les appels.
 # Réf: https://ygoprodeck.com/api-guide/
-MAX_REQ_PER_SEC = 5                               # marge (<< 20/s) pour ne JAMAIS risquer le ban
-MIN_SLEEP = 1.0 / MAX_REQ_PER_SEC                 # délai minimal entre 2 appels
-
-
-def _safe_get(url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
-    """
-    Enveloppe compacte autour requests.get avec:
-    - temporisation minimale (throttle) pour respecter MAX_REQ_PER_SEC,
-    - timeout raisonnable,
-    - petite logique de retry en cas d'erreurs réseau passagères.
-    """
-    # On mémorise l'heure du dernier appel sur l'attribut de fonction (pattern simple)
-    last = getattr(_safe_get, "_last_call", 0.0)          # 0 par défaut si non défini
-    now  = time.monotonic()                               # horloge monotone (pas affectée par l'heure système)
-    dt   = now - last                                     # temps écoulé depuis le dernier appel
-
-    if dt < MIN_SLEEP:                                    # si on est "trop rapide"
-        time.sleep(MIN_SLEEP - dt)                        # on attend ce qu'il faut pour respecter le quota
-
-    # On met à jour le dernier appel tout de suite (pour les appels concurrents éventuels)
-    _safe_get._last_call = time.monotonic()               # type: ignore[attr-defined]
-
-    # Petite boucle de retry (ex: 500 ou petit raté réseau). On évite d'insister si 400.
-    for attempt in range(3):                              # 3 essais max
-        try:
-            # timeout (connect=5s, read=30s) —> évite de bloquer le worker Django
-            resp = requests.get(url, params=params, timeout=(5, 30))
-            # Si code HTTP 429 (throttling côté serveur) ou 5xx : on retente gentiment
-            if resp.status_code in (429, 500, 502, 503, 504):
-                # Backoff simple (1s puis 2s) pour laisser souffler le serveur
-                time.sleep(1 + attempt)
-                continue
-            return resp                                   # autres cas: on renvoie tel quel
-        except requests.RequestException:
-            # Erreur réseau (DNS, socket, etc.). On attend et on retente.
-            time.sleep(1 + attempt)
-
-    # Si on sort de la boucle, c’est qu’on a échoué 3 fois:
-    raise CommandError(f"Échec GET {url} après 3 tentatives")
-
-
-def fetch_db_version() -> Optional[Dict[str, Any]]:
-    """
-    Récupère la "version" de la base via /checkDBVer.php.
-    La doc précise que cette valeur change si de nouvelles cartes arrivent
-    ou si la base est mise à jour. On s'en sert pour éviter de refetch inutilement.
-    """
-    r = _safe_get(CHECK_DB_VER_URL)
-    if r.status_code != 200:
-        # v7 renvoie 400 pour les paramètres invalides — ici on n'en envoie pas.
-        raise CommandError(f"checkDBVer a répondu {r.status_code}: {r.text[:200]}")
-    return r.json()   # ex: {"database_version": "X.Y.Z", "date": "YYYY-mm-dd"}
-
-
-def fetch_all_cards(language: str = "fr") -> Dict[str, Any]:
-    """
-    Récupère *toutes* les cartes.
-    NOTE: en v7, appeler cardinfo.php **sans aucun paramètre** renvoie l’ensemble des cartes.
-    On ajoute 'language=fr' pour localiser les champs quand disponible.
-    Réf doc: "The only way to return all cards now is by having 0 parameters in the request."
-    """
-    params = {"language": language}  # on ne filtre pas → on obtient TOUT (mais localisé en FR si dispo)
-    r = _safe_get(CARDINFO_URL, params=params)
-    if r.status_code != 200:
-        raise CommandError(f"cardinfo a répondu {r.status_code}: {r.text[:200]}")
-    return r.json()   # structure: {"data": [ {card...}, ... ]}
-
-
-def upsert_card(card: Dict[str, Any]) -> Card:
-    """
-    Insère ou met à jour 1 carte (table Card) à partir d'un dict brut de l'API.
-    Ne gère PAS les card_sets ici (fait séparément).
-    """
-    # On extrait prudemment les champs (certains sont absents pour Spell/Trap).
-    cid        = card.get("id")                        # ex: 6983839
-    name       = card.get("name")                      # ex: "Tornado Dragon"
-    ctype      = card.get("type")                      # ex: "XYZ Monster"
-    frametype  = card.get("frameType")                 # ex: "xyz"
-    desc       = card.get("desc")                      # texte d'effet
-    atk        = card.get("atk")                       # peut être None
-    deff       = card.get("def")                       # DEF → 'def' côté API, on mappe vers def_stat
-    level      = card.get("level")                     # peut être None
-    race       = card.get("race")                      # ex: "Wyrm"
-    attribute  = card.get("attribute")                 # ex: "WIND"
-
-    if cid is None or name is None or ctype is None or frametype is None or desc is None:
-        # On exige ces champs minimum pour créer la Card
-        raise CommandError(f"Carte invalide (id/name/type/frameType/desc manquant): {card}")
-
-    # On fait un upsert "maison" (update_or_create)
-    obj, _created = Card.objects.update_or_create(
-        id=cid,                                       # clé primaire (vient de l'API)
-        defaults=dict(
-            name=name,
-            type=ctype,
-            frameType=frametype,
-            desc=desc,
-            atk=atk,
-            def_stat=deff,                             # 'def' API → def_stat modèle
-            level=level,
-            race=race or "",                           # race peut être absente pour Spell/Trap
-            attribute=attribute or "",                 # idem
-        ),
-    )
-    return obj
-
-
-def upsert_card_sets(card_obj: Card, card: Dict[str, Any]) -> None:
-    """
-    Insère/MAJ les éditions (CardSet) liées à une carte.
-    On applique l'unicité (card, set_code) définie dans le modèle.
-    """
-    # L’API renvoie une liste "card_sets" (peut être absente)
-    sets = card.get("card_sets") or []
-    for s in sets:
-        set_name        = s.get("set_name")        # ex: "Battles of Legend: Relentless Revenge"
-        set_code        = s.get("set_code")        # ex: "BLRR-EN084"
-        set_rarity      = s.get("set_rarity")      # ex: "Secret Rare"
-        set_rarity_code = s.get("set_rarity_code") # ex: "(ScR)" (présent quand tcgplayer_data sinon pas toujours)
-        set_price       = s.get("set_price")       # string ou nombre (on laisse DecimalField gérer)
-
-        if not set_code:
-            # Sans code, on ne peut pas garantir l'unicité; on ignore proprement.
-            continue
-
-        # Upsert sur (card, set_code)
-        CardSet.objects.update_or_create(
-            card=card_obj,
-            set_code=set_code,
-            defaults=dict(
-                set_name=set_name or "",
-                set_rarity=set_rarity or "",
-                set_rarity_code=set_rarity_code or "",
-                set_price=(set_price if set_price not in ("", None) else None),
-            ),
-        )
 
 
 class Command(BaseCommand):
@@ -188,8 +61,43 @@ class Command(BaseCommand):
             default="fr",
             help="Langue à demander à l'API (par défaut: fr).",
         )
+        # --wait : attendre (en secondes) qu'une autre synchro libère le verrou
+        parser.add_argument(
+            "--wait",
+            type=float,
+            default=0.0,
+            help="Secondes d'attente si une autre synchronisation est en cours (défaut: échec immédiat).",
+        )
+        # --page-size / --fetch-workers : téléchargement par pages (num/offset) en parallèle
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=DEFAULT_PAGE_SIZE,
+            help="Cartes par page (défaut: %(default)s). 0 = une seule requête pour tout le catalogue.",
+        )
+        parser.add_argument(
+            "--fetch-workers",
+            type=int,
+            default=DEFAULT_WORKERS,
+            help="Pages téléchargées en parallèle (défaut: %(default)s), toujours sous le limiteur partagé.",
+        )
+        # --transform-workers : pages décodées dans des processus séparés (YugiCall/pipeline.py)
+        parser.add_argument(
+            "--transform-workers",
+            type=int,
+            default=settings.SYNC_TRANSFORM_WORKERS,
+            help="Processus de décodage des pages pendant l'écriture (défaut: %(default)s). 0 = tout dans ce processus.",
+        )
 
     def handle(self, *args, **options):
+        # Connexions SQLite réglées pour les gros lots d'écriture.
+        activate_sqlite_profile("sync")
+        # Verrou inter-processus : une synchro manuelle et le démon ne se chevauchent jamais.
+        # Chaque exécution est historisée (SyncRun) avec ses temps par phase.
+        with sync_lock(wait=options["wait"]), record_run("sync_DB_pub", str(options["language"])) as run:
+            self.sync(run, **options)
+
+    def sync(self, run, **options):
         # On lit les options
         force = bool(options["force"])            # booléen: forcer le refresh
         language = str(options["language"])       # langue de l'API
@@ -197,6 +105,8 @@ class Command(BaseCommand):
         # 1) On récupère la “version” de la DB distante.
         self.stdout.write("→ Vérification de la version distante (checkDBVer)…")
         remote_ver = fetch_db_version()           # ex: {"database_version": "...", "date": "YYYY-mm-dd"}
+        run.lap("version_check")
+        run.set_version(remote_ver)
         ver_str = f"{remote_ver}"                 # toString pour logs
         self.stdout.write(f"   Version distante: {ver_str}")
 
@@ -204,50 +114,79 @@ class Command(BaseCommand):
         # Pour rester simple, on compare simplement à un "marqueur" stocké via un petit modèle,
         # ou, si tu veux éviter de créer un modèle, tu peux stocker un fichier texte dans /tmp.
         # Ici, simplicité: fichier local .last_db_ver (fonctionne en single-host).
-        import os, json
-        marker_path = os.path.join(os.getcwd(), ".last_db_ver.json")
-
-        last_ver = None
-        if os.path.exists(marker_path):
-            try:
-                with open(marker_path, "r", encoding="utf-8") as fh:
-                    last_ver = json.load(fh)
-            except Exception:
-                last_ver = None
+        marker_path = dbversion.marker_path("fr")
+        last_ver = dbversion.read_marker("fr")
 
         # Si la version n'a pas changé ET pas de --force, on s'arrête gentiment.
         if (not force) and last_ver == remote_ver:
             self.stdout.write(self.style.SUCCESS("✓ Base déjà à jour (aucune MAJ distante détectée)."))
+            run.up_to_date()
             return
 
-        # 2) On récupère toutes les cartes (1 seule requête si aucun filtre !)
-        self.stdout.write("→ Téléchargement de toutes les cartes (cardinfo)…")
-        payload = fetch_all_cards(language=language)   # {"data": [ {...}, ... ]}
-        cards: Iterable[Dict[str, Any]] = payload.get("data", [])
-        count = 0
-
-        # 3) On enregistre en base (transaction pour la cohérence)
+        # 2) On récupère toutes les cartes :
+        #    - par pages (défaut) : téléchargées pendant l'écriture, retentées une à une,
+        #    - ou en 1 seule requête si --page-size 0 (aucun filtre → tout le catalogue).
+        page_size = int(options["page_size"])
+        if page_size > 0:
+            self.stdout.write(f"→ Téléchargement par pages de {page_size} cartes (cardinfo, num/offset)…")
+            pager = PagedFetch(params={"language": language},
+                               page_size=page_size, workers=int(options["fetch_workers"]))
+            cards: Iterable[Dict[str, Any]] = pager
+        else:
+            pager = None
+            self.stdout.write("→ Téléchargement de toutes les cartes (cardinfo)…")
+            response = download_all_cards(language=language)
+            run.add_bytes(len(response.content))
+            run.lap("download")
+            payload = response.json()                      # {"data": [ {...}, ... ]}
+            cards = payload.get("data", [])
+            run.lap("parse")
+
+        # 3) On enregistre dans une copie du catalogue (transaction pour la cohérence),
+        #    vérifiée puis basculée atomiquement : les lecteurs ne voient jamais d'état intermédiaire.
         self.stdout.write("→ Écriture en base…")
-        with transaction.atomic():
-            for card in cards:
-                # Insère/MAJ la Card
-                obj = upsert_card(card)
-                # Insère/MAJ les CardSet liés
-                upsert_card_sets(obj, card)
-                count += 1
-                # (Facultatif) petits prints périodiques
-                if count % 500 == 0:
-                    self.stdout.write(f"   Traitée: {count} cartes…")
+        def progress(n: int) -> None:
+            # (Facultatif) petits prints périodiques
+            if n % 500 == 0:
+                self.stdout.write(f"   Traitée: {n} cartes…")
+
+        workers = int(options["transform_workers"])
+        with staged_catalog(verify=require_rows(Card)) as alias:
+            run.lap("prepare")   # copie du catalogue + migrations
+            pipeline = None
+            if pager is not None and workers > 0:
+                pipeline = SyncPipeline(pager, alias, Card, CardSet, workers)
+            with transaction.atomic(using=alias):
+                if pipeline is not None:
+                    # Décodage dans d'autres processus, écriture par lots ici.
+                    count = pipeline.run(stats=run.load, progress=progress)
+                else:
+                    # SQLite : upsert ligne par ligne ; PostgreSQL : COPY + fusion ensembliste.
+                    count = load_cards(alias, Card, CardSet, cards, progress=progress, stats=run.load)
+            run.lap("write")
+            # Résumés recalculés pour les seules extensions dont le contenu a changé.
+            with transaction.atomic(using=alias):
+                refreshed = setsummary.refresh(alias, "fr", run.load.set_digests)
+            run.lap("set_summaries")
+            self.stdout.write(f"   {refreshed} extension(s) recalculée(s) sur {len(run.load.set_digests)}.")
+        if pager is not None:
+            # Téléchargement recouvert par l'écriture : on ne note que l'attente réelle.
+            run.add_bytes(pager.bytes)
+            run.overlap("download_wait", pager.wait_seconds)
+            self.stdout.write(f"   {pager.pages} pages, {pager.page_retries} page(s) retentée(s).")
+        if pipeline is not None:
+            usage = ", ".join(f"{stage} {share:.0%}" for stage, share in pipeline.utilization().items())
+            self.stdout.write(f"   Occupation des étages ({workers} processus de décodage) : {usage}.")
 
         self.stdout.write(self.style.SUCCESS(f"✓ Terminé : {count} cartes synchronisées."))
 
         # 4) On met à jour le marqueur local de version (pour éviter les refetchs inutiles)
         try:
-            with open(marker_path, "w", encoding="utf-8") as fh:
-                json.dump(remote_ver, fh, ensure_ascii=False, indent=2)
+            dbversion.write_marker("fr", remote_ver)
         except Exception as e:
             # Non bloquant : on prévient juste
             self.stdout.write(self.style.WARNING(f"⚠ Impossible d’écrire {marker_path}: {e}"))
 
-        # NB: Si tu souhaites historiser la date/heure d'import, tu peux créer un modèle "ImportLog".
+        # Vérification, bascule du catalogue et marqueur de version.
+        run.lap("finalize")
         self.stdout.write(self.style.SUCCESS("✓ Marqueur de version mis à jour."))
@@ -0,0 +1,122 @@
+# YugiCall/management/commands/sync_daemon.py
+# -*- coding: utf-8 -*-
+
+# Import standard libs
+import os
+import signal
+import threading
+import time
+from typing import Any, Dict, List
+
+# Django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from YugiCall.dbversion import read_marker
+from YugiCall.management.commands.sync_DB_pub import fetch_db_version
+from YugiCall.synclock import SyncLockBusy, sync_lock, write_status
+
+
+DEFAULT_INTERVAL = 300    # secondes entre deux checkDBVer (1 requête légère)
+
+# Commandes de synchro gérées par le démon → langue de leur marqueur de version.
+SYNC_COMMANDS = [
+    ("sync_DB_pub", "fr"),
+    ("sync_DB_pub_en", "en"),
+]
+
+
+class Command(BaseCommand):
+    """
+    Commande: python manage.py sync_daemon
+    - Reste résidente (pas de démarrage Django à chaque cron).
+    - Interroge checkDBVer toutes les --interval secondes.
+    - Lance sync_DB_pub / sync_DB_pub_en seulement si la version a changé,
+      sous le verrou inter-processus partagé avec les lancements manuels.
+    - Écrit son état dans le fichier de statut (voir /api/sync-status).
+    """
+
+    help = "Démon de synchronisation : surveille checkDBVer et synchronise dès qu'une nouvelle version sort."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                            help="Secondes entre deux vérifications de version (défaut: %(default)s).")
+        parser.add_argument("--once", action="store_true",
+                            help="Une seule vérification (et synchro si besoin), puis sortie.")
+
+    def handle(self, *args, **options):
+        interval = max(1.0, float(options["interval"]))
+        stop = threading.Event()
+
+        # Arrêt propre : on termine la synchro en cours puis on sort.
+        def _stop(signum, frame):
+            self.stdout.write("→ Signal reçu, arrêt après l'itération en cours…")
+            stop.set()
+
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, _stop)
+
+        write_status(daemon_pid=os.getpid(), daemon_started=timezone.now(), state="idle",
+                     poll_interval=interval)
+        self.stdout.write(f"→ Démon de synchro démarré (intervalle {interval:.0f}s).")
+
+        while not stop.is_set():
+            self.poll_once()
+            if options["once"]:
+                break
+            stop.wait(interval)
+
+        write_status(state="stopped", daemon_pid=None)
+        self.stdout.write(self.style.SUCCESS("✓ Démon arrêté."))
+
+    def poll_once(self) -> None:
+        """Une itération : checkDBVer, puis synchro des bases en retard."""
+        checked_at = timezone.now()
+        try:
+            remote_ver = fetch_db_version()
+        except CommandError as e:
+            write_status(state="error", last_check=checked_at, last_error=str(e))
+            self.stdout.write(self.style.WARNING(f"⚠ checkDBVer: {e}"))
+            return
+
+        stale: List[str] = [cmd for cmd, lang in SYNC_COMMANDS if read_marker(lang) != remote_ver]
+        write_status(last_check=checked_at, remote_version=remote_ver)
+        if not stale:
+            write_status(state="idle")
+            return
+
+        self.stdout.write(f"→ Nouvelle version {remote_ver} : {', '.join(stale)}")
+        results: Dict[str, Dict[str, Any]] = {}
+        try:
+            # Verrou non bloquant : si une synchro manuelle tourne, on réessaiera au prochain tour.
+            with sync_lock(wait=0):
+                write_status(state="running")
+                for cmd in stale:
+                    started = time.monotonic()
+                    try:
+                        call_command(cmd, stdout=self.stdout, stderr=self.stderr)
+                        outcome, error = "ok", None
+                    except Exception as e:
+                        outcome, error = "error", str(e)
+                        self.stdout.write(self.style.ERROR(f"✗ {cmd}: {e}"))
+                    finally:
+                        # Processus long : on ne garde pas de connexion DB périmée entre deux synchros.
+                        close_old_connections()
+                    results[cmd] = {
+                        "outcome": outcome,
+                        "error": error,
+                        "duration_s": round(time.monotonic() - started, 2),
+                        "finished": timezone.now(),
+                    }
+        except SyncLockBusy as e:
+            write_status(state="busy", last_error=str(e))
+            self.stdout.write(self.style.WARNING(f"⚠ {e} On réessaiera plus tard."))
+            return
+
+        failed = [cmd for cmd, r in results.items() if r["outcome"] != "ok"]
+        if failed:
+            write_status(state="error", last_run=results, last_error=results[failed[0]]["error"])
+        else:
+            write_status(state="idle", last_run=results, last_success=timezone.now(), last_error=None)
@@ -0,0 +1,162 @@
+# YugiCall/management/commands/sync_images.py
+# -*- coding: utf-8 -*-
+
+# Import standard libs
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, List, Tuple
+
+# HTTP client
+import requests
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+
+# Stockage local des images
+from YugiCall import images
+from YugiCall.ygoprodeck import RETRY_STATUSES, backoff, fetch_all_cards, retry_after_seconds
+
+
+# Le serveur d'images YGOPRODeck est plus tolérant que l'API, mais on reste prudent.
+DEFAULT_RATE = 5          # téléchargements / seconde (tous threads confondus)
+DEFAULT_WORKERS = 4       # threads de téléchargement en parallèle
+SAVE_EVERY = 200          # on persiste l'index régulièrement (reprise après coupure)
+
+
+def _download(url: str, throttle: images.Throttle, attempts: int = 3) -> bytes:
+    """
+    GET d'une image avec throttle partagé, mêmes règles que ygoprodeck.safe_get :
+    - 429 → Retry-After appliqué à tous les threads (throttle.penalize),
+    - 5xx / erreur réseau → backoff exponentiel avec gigue,
+    puis nouvelle tentative, au plus `attempts` essais.
+    """
+    last_error = None
+    for attempt in range(attempts):
+        throttle.wait()
+        try:
+            resp = requests.get(url, timeout=(5, 30))
+        except requests.RequestException as e:
+            last_error = str(e)
+        else:
+            if resp.status_code == 429:
+                wait_for = retry_after_seconds(resp)
+                throttle.penalize(wait_for)
+                last_error = f"HTTP 429 (Retry-After {wait_for:.0f}s)"
+                continue
+            if resp.status_code not in RETRY_STATUSES:
+                try:
+                    resp.raise_for_status()
+                except requests.HTTPError as e:
+                    raise CommandError(f"Échec GET {url} ({e})")
+                return resp.content
+            last_error = f"HTTP {resp.status_code}"
+        if attempt + 1 < attempts:
+            time.sleep(backoff(attempt))
+    raise CommandError(f"Échec GET {url} après {attempts} tentatives ({last_error})")
+
+
+class Command(BaseCommand):
+    """
+    Commande: python manage.py sync_images
+    - Récupère la liste des images via cardinfo (tableau card_images).
+    - Télécharge les originaux manquants (pool de threads borné + rate limit).
+    - Génère les vignettes small/medium dans un pool de processus.
+    - Relançable à tout moment : ce qui est déjà présent (id + hash) est ignoré.
+    """
+
+    help = "Miroite localement les images de cartes YGOPRODeck et génère les vignettes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                            help="Threads de téléchargement (défaut: %(default)s).")
+        parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                            help="Téléchargements max par seconde (défaut: %(default)s).")
+        parser.add_argument("--procs", type=int, default=None,
+                            help="Processus pour les vignettes (défaut: nombre de CPU).")
+        parser.add_argument("--limit", type=int, default=None,
+                            help="Nombre max d'images à télécharger (tests / amorçage).")
+        parser.add_argument("--verify", action="store_true",
+                            help="Re-hashe les fichiers présents au lieu de se fier à l'index.")
+        parser.add_argument("--no-thumbs", action="store_true",
+                            help="Ne génère pas les vignettes.")
+
+    def handle(self, *args, **options):
+        if images.Image is None and not options["no_thumbs"]:
+            # Sans vignettes, chaque cellule de 48 px chargerait l'original 421x614.
+            raise CommandError("Pillow n'est pas installé (pip install -r requirements.txt) ; "
+                               "relancez avec --no-thumbs pour ne miroiter que les originaux.")
+        root = images.images_root()
+        root.mkdir(parents=True, exist_ok=True)
+        index = images.ImageIndex(root)
+
+        # 1) Liste des images à partir du dump EN (les artworks ne dépendent pas de la langue)
+        self.stdout.write("→ Téléchargement de la liste des cartes (cardinfo)…")
+        payload = fetch_all_cards()   # dump EN
+        wanted: List[Tuple[int, str]] = list(images.iter_card_images(payload.get("data", [])))
+        todo = [(iid, url) for iid, url in wanted if not index.has(iid, verify=options["verify"])]
+        if options["limit"] is not None:
+            todo = todo[: options["limit"]]
+        self.stdout.write(f"   {len(wanted)} images référencées, {len(todo)} à télécharger.")
+
+        # 2) Téléchargements en parallèle (borné) ; l'index est sauvé régulièrement
+        throttle = images.Throttle(options["rate"])
+        workers = max(1, options["workers"])
+        queue = deque(todo)
+        done = failed = 0
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-dl")
+        # Fenêtre bornée : jamais plus de 2 × workers téléchargements soumis d'avance,
+        # un Ctrl+C n'attend donc que ceux en cours.
+        futures: Dict = {}
+        try:
+            def fill():
+                while queue and len(futures) < workers * 2:
+                    iid, url = queue.popleft()
+                    futures[pool.submit(_download, url, throttle)] = (iid, url)
+
+            fill()
+            while futures:
+                finished, _pending = wait(futures, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    iid, url = futures.pop(fut)
+                    try:
+                        sha256 = images.store_bytes(root, fut.result())
+                    except Exception as e:
+                        failed += 1
+                        self.stdout.write(self.style.WARNING(f"⚠ Image {iid}: {e}"))
+                        continue
+                    index.set(iid, sha256, url)
+                    done += 1
+                    if done % SAVE_EVERY == 0:
+                        index.save()
+                        self.stdout.write(f"   Téléchargées: {done}/{len(todo)}…")
+                fill()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            # Même en cas de Ctrl+C, on garde la trace de ce qui est déjà sur disque.
+            index.save()
+
+        self.stdout.write(self.style.SUCCESS(f"✓ Originaux : {done} téléchargés, {failed} en échec."))
+
+        # 3) Vignettes dans un pool de processus (CPU-bound → pas de GIL)
+        if options["no_thumbs"]:
+            return
+
+        hashes = sorted({e["sha256"] for e in index.entries.values()})
+        pending = list(images.missing_thumbnails(root, hashes))
+        self.stdout.write(f"→ Génération des vignettes ({len(pending)} images)…")
+        errors = 0
+        try:
+            with ProcessPoolExecutor(max_workers=options["procs"]) as pool:
+                for sha256, err in pool.map(images.make_thumbnails, [str(root)] * len(pending),
+                                            pending, chunksize=32):
+                    if err:
+                        errors += 1
+                        self.stdout.write(self.style.WARNING(f"⚠ Vignette {sha256[:12]}: {err}"))
+        finally:
+            # Les pages lisent la liste des vignettes dans l'index (pas de stat par ligne).
+            unfinished = set(images.missing_thumbnails(root, pending))
+            index.mark_thumbnails(h for h in hashes if h not in unfinished)
+            index.save()
+
+        self.stdout.write(self.style.SUCCESS(f"✓ Vignettes : {len(pending) - errors} générées, {errors} en échec."))
@@ -0,0 +1,140 @@
+# YugiCall/management/commands/sync_runs.py
+# -*- coding: utf-8 -*-
+
+# Import standard libs
+import json
+import statistics
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+
+from YugiCall.models import SyncRun
+
+# Mesures comparées par --compare (plus haut = pire, sauf rows_per_sec)
+COMPARED = ("duration", "rows_per_sec", "bytes_downloaded", "peak_rss_kb")
+
+
+def run_dict(run: SyncRun) -> dict:
+    return {
+        "id": run.pk,
+        "command": run.command,
+        "language": run.language,
+        "started_at": run.started_at.isoformat(),
+        "outcome": run.outcome,
+        "remote_version": run.remote_version,
+        "duration": run.duration,
+        "phases": run.phases,
+        "bytes_downloaded": run.bytes_downloaded,
+        "cards": run.cards,
+        "rows_inserted": run.rows_inserted,
+        "rows_updated": run.rows_updated,
+        "rows_per_sec": run.rows_per_sec,
+        "peak_rss_kb": run.peak_rss_kb,
+        "error": run.error,
+    }
+
+
+def compare(latest: SyncRun, baseline: list) -> dict:
+    """
+    Écart relatif (%) entre un run et la médiane des runs de référence,
+    pour chaque phase et chaque mesure de COMPARED.
+    """
+    def delta(value, values):
+        values = [v for v in values if v is not None]
+        if value is None or not values:
+            return None
+        median = statistics.median(values)
+        return {
+            "value": value,
+            "median": round(median, 3),
+            "delta_pct": round((value - median) / median * 100, 1) if median else None,
+        }
+
+    report = {"run": latest.pk, "baseline_runs": [r.pk for r in baseline], "phases": {}, "metrics": {}}
+    for name, seconds in (latest.phases or {}).items():
+        report["phases"][name] = delta(seconds, [(r.phases or {}).get(name) for r in baseline])
+    for field in COMPARED:
+        report["metrics"][field] = delta(getattr(latest, field), [getattr(r, field) for r in baseline])
+    return report
+
+
+class Command(BaseCommand):
+    """
+    Commande: python manage.py sync_runs [--limit 20] [--command sync_DB_pub_en] [--json]
+              python manage.py sync_runs --compare 10 [--threshold 25]
+    - sans --compare : liste les dernières exécutions (SyncRun),
+    - --compare N    : compare le dernier run réussi à la médiane des N réussis
+      précédents (même commande) et signale les phases qui ont ralenti.
+    """
+
+    help = "Historique des synchronisations (temps par phase, débit, mémoire) et détection de régressions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20, help="Nombre de runs listés (défaut: %(default)s).")
+        parser.add_argument("--command", dest="sync_command", default=None,
+                            help="Filtre sur la commande (sync_DB_pub, sync_DB_pub_en, import_catalog).")
+        parser.add_argument("--json", action="store_true", help="Sortie JSON.")
+        parser.add_argument("--compare", type=int, default=0, metavar="N",
+                            help="Compare le dernier run réussi aux N précédents.")
+        parser.add_argument("--threshold", type=float, default=25.0,
+                            help="Écart (%%) au-delà duquel une phase est signalée (défaut: %(default)s).")
+
+    def handle(self, *args, **options):
+        runs = SyncRun.objects.all()
+        if options["sync_command"]:
+            runs = runs.filter(command=options["sync_command"])
+        if options["compare"]:
+            return self.compare(runs, options)
+
+        runs = list(runs[: options["limit"]])
+        if options["json"]:
+            self.stdout.write(json.dumps([run_dict(r) for r in runs], indent=2, ensure_ascii=False))
+            return
+        self.stdout.write(f"{'id':>5}  {'début':16}  {'commande':15} {'résultat':10} {'durée':>8} "
+                          f"{'download':>8} {'écriture':>8} {'lignes/s':>9} {'Mo':>7} {'RSS Mo':>7}")
+        for r in runs:
+            phases = r.phases or {}
+            write = sum(phases.get(p, 0) for p in ("write_cards", "write_sets", "commit", "write"))
+            self.stdout.write(
+                f"{r.pk:>5}  {r.started_at:%Y-%m-%d %H:%M}  {r.command[:15]:15} {r.outcome[:10]:10} "
+                f"{_num(r.duration):>8} {_num(phases.get('download')):>8} {_num(write or None):>8} "
+                f"{_num(r.rows_per_sec):>9} {r.bytes_downloaded / 1e6:>7.1f} "
+                f"{_num(r.peak_rss_kb / 1024 if r.peak_rss_kb else None):>7}"
+            )
+
+    def compare(self, runs, options):
+        ok = list(runs.filter(outcome=SyncRun.OUTCOME_SUCCESS)[: options["compare"] + 1])
+        if len(ok) < 2:
+            raise CommandError("Pas assez de runs réussis pour comparer.")
+        latest, baseline = ok[0], ok[1:]
+        if options["sync_command"] is None:
+            baseline = [r for r in baseline if r.command == latest.command]
+            if not baseline:
+                raise CommandError(f"Aucun run de référence pour {latest.command}.")
+        report = compare(latest, baseline)
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"Run {latest.pk} ({latest.command}, {latest.started_at:%Y-%m-%d %H:%M}) "
+                          f"vs médiane de {len(baseline)} run(s)")
+        threshold = options["threshold"]
+        rows = [(f"phase {k}", v) for k, v in report["phases"].items()] + list(report["metrics"].items())
+        for name, d in rows:
+            if d is None:
+                continue
+            pct = d["delta_pct"]
+            # rows_per_sec : une baisse est une régression ; ailleurs, une hausse.
+            worse = pct is not None and (-pct if name == "rows_per_sec" else pct) > threshold
+            line = f"  {name:22} {_num(d['value']):>12} (médiane {_num(d['median'])}, {_pct(pct)})"
+            self.stdout.write(self.style.WARNING(line + "  ⚠") if worse else line)
+
+
+def _num(value):
+    if value is None:
+        return "-"
+    return f"{value:.1f}" if isinstance(value, float) else str(value)
+
+
+def _pct(value):
+    return "n/a" if value is None else f"{value:+.1f}%"
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('YugiCall', '0002_carden_cardseten'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('command', models.CharField(db_index=True, max_length=50)),
+                ('language', models.CharField(blank=True, max_length=10)),
+                ('started_at', models.DateTimeField(db_index=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('outcome', models.CharField(choices=[('running', 'En cours'), ('success', 'Succès'), ('up_to_date', 'Déjà à jour'), ('failed', 'Échec')], db_index=True, default='running', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('remote_version', models.CharField(blank=True, max_length=50)),
+                ('phases', models.JSONField(blank=True, default=dict)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('bytes_downloaded', models.BigIntegerField(default=0)),
+                ('cards', models.PositiveIntegerField(default=0)),
+                ('rows_inserted', models.PositiveIntegerField(default=0)),
+                ('rows_updated', models.PositiveIntegerField(default=0)),
+                ('rows_per_sec', models.FloatField(blank=True, null=True)),
+                ('peak_rss_kb', models.BigIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Sync run',
+                'verbose_name_plural': 'Sync runs',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('YugiCall', '0003_syncrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='archetype',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='ban_goat',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='ban_ocg',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='ban_tcg',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='banlist_info',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='linkmarkers',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='linkval',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='scale',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='ygoprodeck_url',
+            field=models.URLField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='carden',
+            name='archetype',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='carden',
+            name='ban_goat',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='carden',
+            name='ban_ocg',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='carden',
+            name='ban_tcg',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='carden',
+            name='banlist_info',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='carden',
+            name='linkmarkers',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='carden',
+            name='linkval',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='carden',
+            name='scale',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='carden',
+            name='ygoprodeck_url',
+            field=models.URLField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:56
+
+from django.db import migrations, models, router
+
+from YugiCall.normalize import normalize_key
+
+BATCH_SIZE = 2000
+
+# {modèle: {champ source: colonne clé}} (copie figée de Model.search_keys)
+SEARCH_KEYS = {
+    'Card': {'name': 'name_key', 'type': 'type_key', 'race': 'race_key', 'attribute': 'attribute_key'},
+    'CardEN': {'name': 'name_key', 'type': 'type_key', 'race': 'race_key', 'attribute': 'attribute_key'},
+    'CardSet': {'set_name': 'set_name_key'},
+    'CardSetEN': {'set_name': 'set_name_key'},
+}
+
+
+def fill_search_keys(apps, schema_editor):
+    """
+    Remplit les clés des lignes déjà présentes. RunPython est joué sur chaque
+    base : on ne touche qu'à celle où le routeur place réellement la table.
+    """
+    alias = schema_editor.connection.alias
+    for model_name, keys in SEARCH_KEYS.items():
+        model = apps.get_model('YugiCall', model_name)
+        if not router.allow_migrate_model(alias, model):
+            continue
+        manager = model.objects.using(alias)
+        batch = []
+        for obj in manager.only('pk', *keys).order_by('pk').iterator(chunk_size=BATCH_SIZE):
+            for source, key in keys.items():
+                setattr(obj, key, normalize_key(getattr(obj, source)))
+            batch.append(obj)
+            if len(batch) >= BATCH_SIZE:
+                manager.bulk_update(batch, list(keys.values()))
+                batch = []
+        if batch:
+            manager.bulk_update(batch, list(keys.values()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('YugiCall', '0004_card_extra_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='attribute_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='name_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='race_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='type_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='carden',
+            name='attribute_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='carden',
+            name='name_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='carden',
+            name='race_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='carden',
+            name='type_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='cardset',
+            name='set_name_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='cardseten',
+            name='set_name_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_search_keys, migrations.RunPython.noop),
+    ]
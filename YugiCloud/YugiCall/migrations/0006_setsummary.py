@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:01
+
+import YugiCall.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('YugiCall', '0005_search_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SetSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lang', models.CharField(max_length=2)),
+                ('set_name', models.CharField(max_length=255)),
+                ('set_name_key', models.CharField(blank=True, default='', editable=False, max_length=255)),
+                ('code', models.CharField(blank=True, default='', max_length=50)),
+                ('card_count', models.IntegerField(default=0)),
+                ('printings', models.IntegerField(default=0)),
+                ('rarities', models.JSONField(blank=True, default=dict)),
+                ('priced', models.IntegerField(default=0)),
+                ('price_total', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('price_min', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('price_max', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('languages', models.JSONField(blank=True, default=dict)),
+                ('digest', models.CharField(blank=True, default='', max_length=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Set summary',
+                'verbose_name_plural': 'Set summaries',
+                'indexes': [models.Index(fields=['lang', 'code'], name='YugiCall_se_lang_2dd9ce_idx'), models.Index(fields=['lang', 'set_name_key'], name='YugiCall_se_lang_16530d_idx')],
+                'constraints': [models.UniqueConstraint(fields=('lang', 'set_name'), name='uniq_setsummary_lang_name')],
+            },
+            bases=(YugiCall.models.SearchKeysMixin, models.Model),
+        ),
+    ]
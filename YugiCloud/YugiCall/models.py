@@ -5,11 +5,34 @@ from django.db import models
 # On importe les classes de base pour définir des modèles Django.
 from django.db import models
 
+# Clés de recherche normalisées (sans accents ni casse), voir YugiCall/normalize.py.
+from YugiCall.normalize import normalize_key
+
+
+class SearchKeysMixin:
+    """
+    Tient à jour les colonnes *_key à chaque save() (admin, update_or_create…).
+    `search_keys` : {champ source: colonne clé}. Le chargement en masse
+    (loader, COPY) les calcule lui-même dans card_values() / set_values().
+    """
+
+    search_keys = {}
+
+    def refresh_search_keys(self):
+        for source, key in self.search_keys.items():
+            setattr(self, key, normalize_key(getattr(self, source)))
+
+    def save(self, *args, **kwargs):
+        self.refresh_search_keys()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = set(kwargs["update_fields"]) | set(self.search_keys.values())
+        super().save(*args, **kwargs)
+
 
 # ========================
 #  Modèle principal : Card
 # ========================
-class Card(models.Model):
+class Card(SearchKeysMixin, models.Model):
     """
     Représente une carte Yu-Gi-Oh! telle que renvoyée par l'API YGOPRODeck.
     Une carte est unique par son "id" (donné par l’API).
@@ -60,6 +83,39 @@ class Card(models.Model):
     # db_index=True également.
     attribute = models.CharField(max_length=50, db_index=True)
 
+    # Archétype (ex: "Blue-Eyes"). Chaîne vide si la carte n'en a pas.
+    # db_index=True : recherche par archétype servie par la base locale.
+    archetype = models.CharField(max_length=255, blank=True, default="", db_index=True)
+
+    # Échelle Pendule (0 à 13), seulement pour les monstres Pendule.
+    scale = models.IntegerField(null=True, blank=True, db_index=True)
+
+    # Link Rating et flèches Lien (ex: ["Top", "Bottom-Left"]), monstres Lien seulement.
+    linkval = models.IntegerField(null=True, blank=True, db_index=True)
+    linkmarkers = models.JSONField(default=list, blank=True)
+
+    # Page de la carte sur ygoprodeck.com.
+    ygoprodeck_url = models.URLField(max_length=255, blank=True, default="")
+
+    # Statut dans les banlists tel que renvoyé par l'API
+    # (ex: {"ban_tcg": "Limited", "ban_ocg": "Banned"}), None si la carte est libre.
+    banlist_info = models.JSONField(null=True, blank=True)
+    # Le même statut éclaté par format ("Banned", "Limited", "Semi-Limited" ou ""),
+    # en colonnes indexées pour filtrer sans lire le JSON.
+    ban_tcg = models.CharField(max_length=20, blank=True, default="", db_index=True)
+    ban_ocg = models.CharField(max_length=20, blank=True, default="", db_index=True)
+    ban_goat = models.CharField(max_length=20, blank=True, default="", db_index=True)
+
+    # Clés de recherche (normalize_key : minuscules, sans accents, ponctuation
+    # réduite) : "lumiere" trouve "LUMIÈRE", et une recherche par préfixe
+    # devient un intervalle sur l'index. Remplies par la synchro, pas éditables.
+    name_key = models.CharField(max_length=255, blank=True, default="", db_index=True, editable=False)
+    type_key = models.CharField(max_length=100, blank=True, default="", db_index=True, editable=False)
+    race_key = models.CharField(max_length=100, blank=True, default="", db_index=True, editable=False)
+    attribute_key = models.CharField(max_length=50, blank=True, default="", db_index=True, editable=False)
+
+    search_keys = {"name": "name_key", "type": "type_key", "race": "race_key", "attribute": "attribute_key"}
+
     class Meta:
         # Options de métadonnées pour le modèle.
         indexes = [
@@ -81,7 +137,7 @@ class Card(models.Model):
 # ========================
 #  Modèle secondaire : CardSet
 # ========================
-class CardSet(models.Model):
+class CardSet(SearchKeysMixin, models.Model):
     """
     Représente une "édition" ou "set" d’une carte.
     Une carte peut apparaître dans plusieurs sets différents,
@@ -113,6 +169,11 @@ class CardSet(models.Model):
     # null=True/blank=True car parfois l’API peut ne pas renvoyer de prix.
     set_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
 
+    # Nom du set normalisé (voir Card.name_key).
+    set_name_key = models.CharField(max_length=255, blank=True, default="", db_index=True, editable=False)
+
+    search_keys = {"set_name": "set_name_key"}
+
     class Meta:
         # Métadonnées pour CardSet.
         constraints = [
@@ -132,7 +193,7 @@ class CardSet(models.Model):
 # =========================
 #  Modèle principal : CardEN
 # =========================
-class CardEN(models.Model):
+class CardEN(SearchKeysMixin, models.Model):
     """
     Version EN des cartes (structure identique à Card).
     Clé primaire = id (même valeur que l'API EN).
@@ -148,6 +209,21 @@ class CardEN(models.Model):
     level = models.IntegerField(null=True, blank=True, db_index=True)
     race = models.CharField(max_length=100, db_index=True)
     attribute = models.CharField(max_length=50, db_index=True)
+    archetype = models.CharField(max_length=255, blank=True, default="", db_index=True)
+    scale = models.IntegerField(null=True, blank=True, db_index=True)
+    linkval = models.IntegerField(null=True, blank=True, db_index=True)
+    linkmarkers = models.JSONField(default=list, blank=True)
+    ygoprodeck_url = models.URLField(max_length=255, blank=True, default="")
+    banlist_info = models.JSONField(null=True, blank=True)
+    ban_tcg = models.CharField(max_length=20, blank=True, default="", db_index=True)
+    ban_ocg = models.CharField(max_length=20, blank=True, default="", db_index=True)
+    ban_goat = models.CharField(max_length=20, blank=True, default="", db_index=True)
+    name_key = models.CharField(max_length=255, blank=True, default="", db_index=True, editable=False)
+    type_key = models.CharField(max_length=100, blank=True, default="", db_index=True, editable=False)
+    race_key = models.CharField(max_length=100, blank=True, default="", db_index=True, editable=False)
+    attribute_key = models.CharField(max_length=50, blank=True, default="", db_index=True, editable=False)
+
+    search_keys = {"name": "name_key", "type": "type_key", "race": "race_key", "attribute": "attribute_key"}
 
     class Meta:
         indexes = [
@@ -169,7 +245,7 @@ class CardEN(models.Model):
 # =========================
 #  Modèle secondaire : CardSetEN
 # =========================
-class CardSetEN(models.Model):
+class CardSetEN(SearchKeysMixin, models.Model):
     """
     Version EN des sets/éditions, liée à CardEN.
     Structure identique à CardSet.
@@ -181,6 +257,9 @@ class CardSetEN(models.Model):
     set_rarity = models.CharField(max_length=100)
     set_rarity_code = models.CharField(max_length=20)
     set_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    set_name_key = models.CharField(max_length=255, blank=True, default="", db_index=True, editable=False)
+
+    search_keys = {"set_name": "set_name_key"}
 
     class Meta:
         constraints = [
@@ -195,3 +274,116 @@ class CardSetEN(models.Model):
 
     def __str__(self):
         return f"{self.card.name} — {self.set_code}"
+
+
+# =========================
+#  Résumé par extension (set)
+# =========================
+class SetSummary(SearchKeysMixin, models.Model):
+    """
+    Une ligne par (langue, nom d'extension) : agrégats précalculés à partir
+    des CardSet/CardSetEN, pour les pages /sets/ et l'API /api/sets.
+    Rafraîchie par la synchro, seulement pour les extensions dont le contenu
+    a changé (voir YugiCall/setsummary.py).
+    """
+
+    lang = models.CharField(max_length=2)
+    set_name = models.CharField(max_length=255)
+    set_name_key = models.CharField(max_length=255, blank=True, default="", editable=False)
+
+    # Préfixe des codes de l'extension ("BLRR" pour BLRR-EN084), recherché par intervalle.
+    code = models.CharField(max_length=50, blank=True, default="")
+
+    # Cartes distinctes et impressions (lignes CardSet) de l'extension.
+    card_count = models.IntegerField(default=0)
+    printings = models.IntegerField(default=0)
+
+    # {"Secret Rare": 12, "Common": 40, …}
+    rarities = models.JSONField(default=dict, blank=True)
+
+    # Agrégats de prix sur les impressions qui ont un prix (`priced`).
+    priced = models.IntegerField(default=0)
+    price_total = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    price_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    price_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    # Couverture par langue : {"fr": cartes, "en": cartes} (0 si absente d'une langue).
+    languages = models.JSONField(default=dict, blank=True)
+
+    # Empreinte du contenu (indépendante de l'ordre) : ne recalculer que si elle change.
+    digest = models.CharField(max_length=16, blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    search_keys = {"set_name": "set_name_key"}
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["lang", "set_name"], name="uniq_setsummary_lang_name"),
+        ]
+        indexes = [
+            models.Index(fields=["lang", "code"]),
+            models.Index(fields=["lang", "set_name_key"]),
+        ]
+        verbose_name = "Set summary"
+        verbose_name_plural = "Set summaries"
+
+    def __str__(self):
+        return f"{self.set_name} [{self.lang}]"
+
+
+# =========================
+#  Journal des synchronisations
+# =========================
+class SyncRun(models.Model):
+    """
+    Une exécution de sync_DB_pub / sync_DB_pub_en / import_catalog.
+    Stockée dans la base "default" (pas dans le catalogue, qui est remplacé
+    à chaque synchro) : l'historique survit aux bascules.
+    """
+
+    OUTCOME_RUNNING = "running"
+    OUTCOME_SUCCESS = "success"
+    OUTCOME_UP_TO_DATE = "up_to_date"
+    OUTCOME_FAILED = "failed"
+    OUTCOMES = [
+        (OUTCOME_RUNNING, "En cours"),
+        (OUTCOME_SUCCESS, "Succès"),
+        (OUTCOME_UP_TO_DATE, "Déjà à jour"),
+        (OUTCOME_FAILED, "Échec"),
+    ]
+
+    # Commande et langue ("sync_DB_pub", "fr")
+    command = models.CharField(max_length=50, db_index=True)
+    language = models.CharField(max_length=10, blank=True)
+
+    started_at = models.DateTimeField(db_index=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    outcome = models.CharField(max_length=20, choices=OUTCOMES, default=OUTCOME_RUNNING, db_index=True)
+    error = models.TextField(blank=True)
+
+    # "database_version" distante (checkDBVer) ou de l'instantané importé
+    remote_version = models.CharField(max_length=50, blank=True)
+
+    # Durée de chaque phase en secondes, dans l'ordre d'exécution :
+    # {"version_check": 0.3, "download": 12.1, "parse": 1.4, "prepare": 0.2,
+    #  "write_cards": 20.5, "write_sets": 31.0, "commit": 0.4, "finalize": 0.9}
+    phases = models.JSONField(default=dict, blank=True)
+    duration = models.FloatField(null=True, blank=True)
+
+    # Volumes
+    bytes_downloaded = models.BigIntegerField(default=0)
+    cards = models.PositiveIntegerField(default=0)
+    rows_inserted = models.PositiveIntegerField(default=0)
+    rows_updated = models.PositiveIntegerField(default=0)
+    # Lignes écrites (insérées + mises à jour) par seconde d'écriture
+    rows_per_sec = models.FloatField(null=True, blank=True)
+    # Pic de mémoire résidente du processus (Ko)
+    peak_rss_kb = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+        verbose_name = "Sync run"
+        verbose_name_plural = "Sync runs"
+
+    def __str__(self):
+        return f"{self.command} {self.started_at:%Y-%m-%d %H:%M} ({self.outcome})"
@@ -0,0 +1,40 @@
+# YugiCall/normalize.py
+# -*- coding: utf-8 -*-
+"""
+Clés de recherche normalisées (colonnes *_key du catalogue).
+
+normalize_key("Magicien-Sombre DES Ténèbres") → "magicien sombre des tenebres" :
+- accents retirés (décomposition NFKD, marques combinantes supprimées),
+- casse repliée (casefold : "ß" → "ss"), ligatures "œ"/"æ" développées,
+- ponctuation et espaces successifs réduits à un seul espace.
+
+La même fonction sert au chargement (loader, migration de remplissage) et
+aux termes saisis (search) : une recherche "lumiere" trouve "LUMIÈRE", et une
+recherche par préfixe devient un simple intervalle sur l'index de la clé.
+"""
+
+import re
+import unicodedata
+from typing import Any, Tuple
+
+_SEPARATORS = re.compile(r"[\W_]+")
+# Lettres que NFKD ne décompose pas.
+_LIGATURES = str.maketrans({"œ": "oe", "æ": "ae", "ø": "o", "đ": "d", "ł": "l"})
+
+
+def normalize_key(value: Any) -> str:
+    """Clé de recherche d'une valeur (chaîne vide pour None / "")."""
+    if not value:
+        return ""
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = text.casefold().translate(_LIGATURES)
+    return _SEPARATORS.sub(" ", text).strip()
+
+
+def prefix_bounds(key: str) -> Tuple[str, str]:
+    """
+    Intervalle [début, fin) des clés commençant par `key` (non vide) :
+    "dark m" → ("dark m", "dark n").
+    """
+    return key, key[:-1] + chr(ord(key[-1]) + 1)
@@ -0,0 +1,228 @@
+# YugiCall/pipeline.py
+# -*- coding: utf-8 -*-
+"""
+Synchro par pages en trois étages qui tournent en même temps :
+
+    téléchargement (threads, limiteur partagé) → corps bruts
+    transformation (processus : json.loads + card_values → tuples de lignes)
+    écriture (un seul écrivain, le processus de la commande : COPY / bulk_create)
+
+- Le décodage et le mapping coûtent autant que l'écriture : dans le chemin
+  série (PagedFetch + load_cards) ils occupent le même cœur que l'écrivain.
+  Ici l'écrivain ne fait plus qu'écrire des tuples tout prêts.
+- Contre-pression : au plus `window` pages en vol (en téléchargement, en
+  transformation ou en attente d'écriture). Une nouvelle page n'est demandée
+  qu'une fois une page écrite : la mémoire reste bornée même si la base est
+  plus lente que le réseau.
+- Page tronquée / JSON invalide (ValueError côté processus) : la page est
+  retéléchargée, jusqu'à fetch.retries fois, comme dans PagedFetch.
+- Ordre : les pages sont écrites dans l'ordre où elles arrivent, mais chaque
+  ligne garde son rang dans le catalogue (seq = offset) : sous PostgreSQL la
+  fusion reste "dernière occurrence gagnante" comme dans copy_load.
+- Processus lancés en "spawn" (pas de fork d'une connexion à la base ouverte) ;
+  chacun fait django.setup() une fois au démarrage.
+
+Après run() : utilization() → part du temps où chaque étage a travaillé.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.core.management.base import CommandError
+from django.db import connections
+
+from YugiCall.ygoprodeck import PagedFetch, decode_page
+
+# Pas d'import de YugiCall.loader / setsummary ici : ils importent les modèles,
+# et ce module est rechargé dans chaque processus avant django.setup().
+
+
+def _init_worker() -> None:
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def transform_page(raw: bytes, first_seq: int, layout, json_text: bool) -> Tuple[Any, ...]:
+    """
+    Exécutée dans un processus : (meta, lignes cartes, lignes sets, empreintes
+    d'extensions, secondes de travail). ValueError si le corps est invalide.
+    """
+    t0 = time.perf_counter()
+    payload = decode_page(raw)
+    digests: Dict[str, int] = {}
+    card_rows, set_rows = layout.rows(payload["data"], first_seq=first_seq, json_text=json_text, digests=digests)
+    return payload.get("meta") or {}, card_rows, set_rows, digests, time.perf_counter() - t0
+
+
+class SyncPipeline:
+    """
+    pipeline = SyncPipeline(pager, alias, Card, CardSet, workers=3)
+    count = pipeline.run(stats=run.load)   # dans transaction.atomic(using=alias)
+    """
+
+    def __init__(self, fetch: PagedFetch, alias: str, card_model, set_model,
+                 workers: int, window: Optional[int] = None):
+        self.fetch = fetch
+        self.alias = alias
+        self.card_model, self.set_model = card_model, set_model
+        self.workers = max(1, workers)
+        # Assez de pages pour occuper téléchargement et transformation, pas plus.
+        self.window = window or (fetch.workers + self.workers) * 2
+        self._results: "queue.Queue[Tuple[int, Any]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.download_seconds = 0.0   # somme sur les threads de téléchargement
+        self.transform_seconds = 0.0  # somme sur les processus
+        self.write_seconds = 0.0      # écrivain occupé
+        self.wait_seconds = 0.0       # écrivain en attente d'une page transformée
+        self.wall_seconds = 0.0
+
+    # --- Étages téléchargement / transformation (threads et callbacks) ---
+
+    def _download(self, offset: int, attempt: int = 0) -> None:
+        if attempt:
+            time.sleep(min(1 + attempt, 5))
+        t0 = time.perf_counter()
+        try:
+            raw = self.fetch.fetch_raw(offset)
+        except CommandError as e:
+            self._retry(offset, attempt, str(e))
+            return
+        except BaseException as e:
+            self._results.put((offset, e))
+            return
+        finally:
+            with self._lock:
+                self.download_seconds += time.perf_counter() - t0
+        if raw is None:
+            self._results.put((offset, None))
+            return
+        try:
+            future = self._procs.submit(transform_page, raw, offset, self._layout, self._json_text)
+        except RuntimeError as e:  # pool arrêté (abandon en cours)
+            self._results.put((offset, e))
+            return
+        future.add_done_callback(lambda f: self._transformed(offset, attempt, f))
+
+    def _transformed(self, offset: int, attempt: int, future: Future) -> None:
+        try:
+            result = future.result()
+        except ValueError as e:
+            # Corps tronqué / JSON invalide : on retélécharge la page
+            self._retry(offset, attempt, str(e))
+            return
+        except BaseException as e:
+            self._results.put((offset, e))
+            return
+        self._results.put((offset, result))
+
+    def _retry(self, offset: int, attempt: int, error: str) -> None:
+        if attempt >= self.fetch.retries:
+            self._results.put((offset, CommandError(
+                f"Page offset={offset} en échec après {attempt + 1} essais ({error})")))
+            return
+        with self._lock:
+            self.fetch.page_retries += 1
+        try:
+            self._threads.submit(self._download, offset, attempt + 1)
+        except RuntimeError as e:
+            self._results.put((offset, e))
+
+    def _next_result(self) -> Tuple[int, Any]:
+        t0 = time.perf_counter()
+        offset, result = self._results.get()
+        self.wait_seconds += time.perf_counter() - t0
+        if isinstance(result, BaseException):
+            raise result
+        return offset, result
+
+    # --- Étage écriture (processus appelant) ---
+
+    def run(self, stats, progress: Optional[Callable[[int], None]] = None) -> int:
+        """Télécharge, transforme et écrit tout le catalogue ; renvoie le nombre de cartes."""
+        from YugiCall.loader import BulkStage, CopyStage, RowLayout
+        from YugiCall.setsummary import merge_digests
+
+        started = time.perf_counter()
+        fetch = self.fetch
+        self._layout = RowLayout(self.card_model, self.set_model)
+        postgres = connections[self.alias].vendor == "postgresql"
+        # COPY attend le JSON en texte ; bulk_create, les objets Python.
+        self._json_text = postgres
+        stage_cls = CopyStage if postgres else BulkStage
+        stage = stage_cls(self.alias, self.card_model, self.set_model, self._layout)
+
+        self._threads = ThreadPoolExecutor(max_workers=fetch.workers, thread_name_prefix="ygopro-page")
+        self._procs = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                          mp_context=multiprocessing.get_context("spawn"))
+        count = 0
+        try:
+            # Première page seule : elle donne le nombre total de cartes.
+            self._threads.submit(self._download, 0)
+            _offset, first = self._next_result()
+            if first is None:
+                raise CommandError("Première page vide : catalogue distant indisponible ?")
+            total = int(first[0].get("total_rows") or len(first[1]))
+            fetch.total_rows = total
+            offsets = iter(range(fetch.page_size, total, fetch.page_size))
+            in_flight = 0
+            page: Optional[Tuple[Any, ...]] = first
+            while True:
+                # Contre-pression : on ne relance des pages qu'à hauteur de la fenêtre.
+                for offset in offsets:
+                    self._threads.submit(self._download, offset)
+                    in_flight += 1
+                    if in_flight >= self.window:
+                        break
+                if page is not None:
+                    count += self._write(stage, page, stats, merge_digests)
+                    fetch.pages += 1
+                    if progress is not None:
+                        progress(count)
+                if not in_flight:
+                    break
+                _offset, page = self._next_result()
+                in_flight -= 1
+
+            t0 = time.perf_counter()
+            card_seconds = stage.merge(stats)
+            merge_seconds = time.perf_counter() - t0
+            stats.card_seconds += card_seconds
+            stats.set_seconds += merge_seconds - card_seconds
+            self.write_seconds += merge_seconds
+        finally:
+            # Abandon (erreur d'écriture…) : pages en attente annulées, pas de processus orphelin.
+            self._threads.shutdown(wait=True, cancel_futures=True)
+            self._procs.shutdown(wait=True, cancel_futures=True)
+            self.wall_seconds = time.perf_counter() - started
+        fetch.wait_seconds += self.wait_seconds
+        stats.cards += count
+        return count
+
+    def _write(self, stage, page: Tuple[Any, ...], stats, merge_digests) -> int:
+        _meta, card_rows, set_rows, digests, busy = page
+        with self._lock:
+            self.transform_seconds += busy
+        t0 = time.perf_counter()
+        card_seconds = stage.copy(card_rows, set_rows)
+        elapsed = time.perf_counter() - t0
+        stats.card_seconds += card_seconds
+        stats.set_seconds += elapsed - card_seconds
+        self.write_seconds += elapsed
+        merge_digests(stats.set_digests, digests)
+        return len(card_rows)
+
+    def utilization(self) -> Dict[str, float]:
+        """Part du temps (0–1) où chaque étage a travaillé, rapportée à sa capacité."""
+        wall = self.wall_seconds or 1.0
+        return {
+            "download": round(self.download_seconds / (wall * self.fetch.workers), 3),
+            "transform": round(self.transform_seconds / (wall * self.workers), 3),
+            "write": round(self.write_seconds / wall, 3),
+            "write_wait": round(self.wait_seconds / wall, 3),
+        }
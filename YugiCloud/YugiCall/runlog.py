@@ -0,0 +1,135 @@
+# YugiCall/runlog.py
+# -*- coding: utf-8 -*-
+"""
+Journal des synchronisations (modèle SyncRun).
+
+    with record_run("sync_DB_pub", "fr") as run:
+        remote_ver = fetch_db_version()
+        run.lap("version_check")
+        ...
+        count = load_cards(alias, Card, CardSet, cards, stats=run.load)
+        run.lap("write")
+
+- La ligne est créée dès le début (outcome "running") : un processus tué
+  reste visible dans l'historique.
+- lap(name) enregistre le temps écoulé depuis le lap précédent ; la phase
+  "write" est détaillée en write_cards / write_sets / commit grâce à LoadStats.
+- overlap(name, s) : temps passé dans "write" à autre chose (attente des
+  pages téléchargées en parallèle), retiré du "commit".
+- Une exception marque le run "failed" (message conservé) puis remonte.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from django.db import DatabaseError
+from django.utils import timezone
+
+from YugiCall.dbversion import version_string
+from YugiCall.loader import LoadStats
+from YugiCall.models import SyncRun
+
+# resource n'existe pas sous Windows : pas de pic mémoire dans ce cas.
+try:
+    import resource
+except ImportError:  # pragma: no cover - dépend de la plateforme
+    resource = None
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Pic de mémoire résidente du processus, en Ko (ru_maxrss est en octets sous macOS)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class RunRecorder:
+    def __init__(self, run: SyncRun):
+        self.run = run
+        self.load = LoadStats()
+        self.phases: Dict[str, float] = {}
+        self.overlaps: Dict[str, float] = {}
+        self._started = time.perf_counter()
+        self._last = self._started
+
+    def lap(self, name: str) -> float:
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed
+        self._last = now
+        return elapsed
+
+    def overlap(self, name: str, seconds: float) -> None:
+        self.overlaps[name] = self.overlaps.get(name, 0.0) + seconds
+
+    def set_version(self, remote_ver: Any) -> None:
+        self.run.remote_version = version_string(remote_ver)[:50]
+
+    def add_bytes(self, n: int) -> None:
+        self.run.bytes_downloaded += n
+
+    def up_to_date(self) -> None:
+        self.run.outcome = SyncRun.OUTCOME_UP_TO_DATE
+
+    def _phases(self) -> Dict[str, float]:
+        phases: Dict[str, float] = {}
+        for name, seconds in self.phases.items():
+            if name == "write" and (self.load.card_seconds or self.load.set_seconds):
+                phases.update(self.overlaps)
+                phases["write_cards"] = self.load.card_seconds
+                phases["write_sets"] = self.load.set_seconds
+                accounted = self.load.card_seconds + self.load.set_seconds + sum(self.overlaps.values())
+                phases["commit"] = max(0.0, seconds - accounted)
+            else:
+                phases[name] = seconds
+        return {name: round(seconds, 3) for name, seconds in phases.items()}
+
+    def finish(self, outcome: Optional[str] = None, error: str = "") -> SyncRun:
+        run = self.run
+        if outcome is not None:
+            run.outcome = outcome
+        elif run.outcome == SyncRun.OUTCOME_RUNNING:
+            run.outcome = SyncRun.OUTCOME_SUCCESS
+        run.error = error
+        run.finished_at = timezone.now()
+        run.duration = round(time.perf_counter() - self._started, 3)
+        run.phases = self._phases()
+        run.cards = self.load.cards
+        run.rows_inserted = self.load.rows_inserted
+        run.rows_updated = self.load.rows_updated
+        rows = run.rows_inserted + run.rows_updated
+        write_seconds = self.phases.get("write")
+        run.rows_per_sec = round(rows / write_seconds, 1) if rows and write_seconds else None
+        run.peak_rss_kb = peak_rss_kb()
+        run.save()
+        return run
+
+
+@contextmanager
+def record_run(command: str, language: str = "") -> Iterator[RunRecorder]:
+    """
+    Enregistre une exécution. Le journal ne doit jamais faire échouer une
+    synchro : si la base "default" est indisponible, on continue sans.
+    """
+    run = SyncRun(command=command, language=language, started_at=timezone.now())
+    try:
+        run.save()
+    except DatabaseError:
+        pass
+    recorder = RunRecorder(run)
+    try:
+        yield recorder
+    except BaseException as e:
+        _safe_finish(recorder, SyncRun.OUTCOME_FAILED, f"{type(e).__name__}: {e}")
+        raise
+    _safe_finish(recorder)
+
+
+def _safe_finish(recorder: RunRecorder, outcome: Optional[str] = None, error: str = "") -> None:
+    try:
+        recorder.finish(outcome, error)
+    except DatabaseError:
+        pass
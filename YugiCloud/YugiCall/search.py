@@ -0,0 +1,249 @@
+# YugiCall/search.py
+# -*- coding: utf-8 -*-
+"""
+Filtres de recherche sur le catalogue local, partagés par les pages de
+recherche (YugiWeb) et l'API JSON.
+
+Une config de champs est une liste de tuples (fname, label, ftype) :
+  - fname : chemin ORM du champ,
+  - ftype : "text"   → "contient" ; sur la colonne clé normalisée quand le
+                       champ en a une (SEARCH_KEYS), __icontains sinon ;
+            "prefix" → fname est une colonne clé (name_key…) : "commence par",
+                       résolu par un intervalle sur son index ;
+            "choice" → champ à peu de valeurs distinctes (type, archétype,
+                       banlist…) : le terme est comparé ("contient") à la liste
+                       des valeurs, gardée en cache par version du catalogue,
+                       puis filtré par égalité (__in) sur l'index ;
+            "number" → égalité stricte.
+
+Les termes passent par normalize_key (comme les colonnes *_key remplies par
+la synchro) : "tenebres", "TÉNÈBRES" et "Ténèbres" donnent le même résultat.
+
+Avec le moteur colonnaire activé (settings.COLUMNAR_SEARCH + NumPy), un
+filtre numérique seul (ATK, DEF, niveau) est résolu en mémoire par
+search_ids : ids déjà triés dans l'ordre demandé, sans aller-retour SQL.
+
+Cache de résultats (search_ids / cached_ids) : la liste ordonnée des ids
+retenus est gardée par (langue, version du catalogue, champ, terme normalisé,
+tri) dans un LRU borné en nombre de recherches et en nombre total d'ids
+(settings.SEARCH_RESULT_CACHE_SIZE / SEARCH_RESULT_CACHE_IDS). Les cartes
+sont ensuite relues par clé primaire (hydrate) : une recherche fréquente ne
+coûte plus qu'une lecture par pk, jusqu'à la prochaine synchro.
+"""
+
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from YugiCall import columnar
+from YugiCall.cache import LRUCache
+from YugiCall.catalog import lang_models
+from YugiCall.dbversion import cache_token
+from YugiCall.normalize import normalize_key, prefix_bounds
+
+# Champ affiché → colonne clé normalisée (voir Card.search_keys).
+SEARCH_KEYS = {
+    "name":                "name_key",
+    "type":                "type_key",
+    "race":                "race_key",
+    "attribute":           "attribute_key",
+    "card_sets__set_name": "card_sets__set_name_key",
+}
+
+# Champs filtrables par l'API (/api/search) : mêmes noms que les modèles.
+API_FIELDS_CONFIG = [
+    ("name",                 "Nom",         "text"),
+    ("name_key",             "Nom (début)", "prefix"),
+    ("archetype",            "Archétype",   "choice"),
+    ("type",                 "Type",        "choice"),
+    ("attribute",            "Attribut",    "choice"),
+    ("race",                 "Race",        "choice"),
+    ("desc",                 "Description", "text"),
+    ("card_sets__set_name",  "Extension",   "text"),
+    ("card_sets__set_name_key", "Extension (début)", "prefix"),
+    ("card_sets__set_code",  "Code set",    "text"),
+    ("level",                "Niveau",      "number"),
+    ("atk",                  "ATK",         "number"),
+    ("def_stat",             "DEF",         "number"),
+    ("scale",                "Échelle",     "number"),
+    ("linkval",              "Lien",        "number"),
+    ("ban_tcg",              "Banlist TCG", "choice"),
+    ("ban_ocg",              "Banlist OCG", "choice"),
+]
+
+_choices_cache = LRUCache(maxsize=64)
+
+
+def config_index(fields_config: Iterable[Tuple[str, str, str]]) -> Dict[str, Tuple[str, str]]:
+    """{fname: (label, ftype)} pour valider rapidement un champ demandé."""
+    return {fname: (label, ftype) for fname, label, ftype in fields_config}
+
+
+def field_choices(model, field: str, lang: Optional[str] = None) -> List[str]:
+    """
+    Valeurs distinctes non vides d'un champ ; une requête par synchro et par
+    worker quand `lang` est connue (clé de cache liée à la version du catalogue).
+    """
+    key = (model._meta.label, field, cache_token(lang)) if lang else None
+    values = _choices_cache.get(key) if key else None
+    if values is None:
+        values = sorted(v for v in model.objects.order_by().values_list(field, flat=True).distinct() if v)
+        if key:
+            _choices_cache.set(key, values)
+    return values
+
+
+def matching_choices(model, field: str, q: str, lang: Optional[str] = None, exact: bool = False) -> List[str]:
+    """Valeurs de `field` égales (exact=True) ou contenant `q`, sans tenir compte de la casse ni des accents."""
+    needle = normalize_key(q)
+    if not needle:
+        return []
+    if exact:
+        return [v for v in field_choices(model, field, lang) if normalize_key(v) == needle]
+    return [v for v in field_choices(model, field, lang) if needle in normalize_key(v)]
+
+
+def prefix_filter(queryset, key_field: str, q: str):
+    """
+    Clés commençant par normalize_key(q) : intervalle [début, fin) sur l'index,
+    (le __startswith ne fait que revérifier les lignes de l'intervalle, pour les
+    collations PostgreSQL qui ignorent les espaces à la comparaison).
+    """
+    needle = normalize_key(q)
+    if not needle:
+        return queryset.none()
+    low, high = prefix_bounds(needle)
+    return queryset.filter(**{
+        f"{key_field}__gte": low,
+        f"{key_field}__lt": high,
+        f"{key_field}__startswith": needle,
+    })
+
+
+def filter_cards(queryset, fields_config, field: str, q: str, lang: Optional[str] = None):
+    """
+    Applique UN filtre (champ choisi + valeur saisie) sur un queryset de cartes.
+    - q vide           → queryset inchangé,
+    - champ inconnu    → aucun résultat (explicite plutôt qu'une erreur),
+    - nombre invalide  → aucun résultat.
+    `lang` (langue du queryset) sert au cache des valeurs des champs "choice".
+    """
+    if not q:
+        return queryset
+    config = config_index(fields_config)
+    if field not in config:
+        return queryset.none()
+    _label, ftype = config[field]
+    if ftype == "text":
+        key, needle = SEARCH_KEYS.get(field), normalize_key(q)
+        if key and needle:
+            # Colonne déjà en minuscules sans accents : plus de repli de casse par ligne.
+            queryset = queryset.filter(**{f"{key}__contains": needle})
+        else:
+            queryset = queryset.filter(**{f"{field}__icontains": q})
+    elif ftype == "prefix":
+        queryset = prefix_filter(queryset, field, q)
+    elif ftype == "choice":
+        # Sur la colonne clé quand elle existe : les valeurs en cache sont déjà normalisées.
+        column = SEARCH_KEYS.get(field, field)
+        values = matching_choices(queryset.model, column, q, lang)
+        if not values:
+            return queryset.none()
+        queryset = queryset.filter(**{f"{column}__in": values})
+    elif ftype == "number":
+        if not q.lstrip("-").isdigit():
+            return queryset.none()
+        queryset = queryset.filter(**{field: int(q)})
+    # Les jointures (card_sets__…) peuvent dupliquer les cartes.
+    if "__" in field:
+        queryset = queryset.distinct()
+    return queryset
+
+
+# --- Cache des ids de résultats ---
+
+result_cache = LRUCache(
+    maxsize=getattr(settings, "SEARCH_RESULT_CACHE_SIZE", 1024),
+    maxweight=getattr(settings, "SEARCH_RESULT_CACHE_IDS", 2_000_000),
+    weigh=len,
+)
+
+
+def search_term(fields_config, field: str, q: str) -> Tuple[str, str]:
+    """
+    (ftype, terme) tel que filter_cards l'interprète : deux saisies qui donnent
+    forcément le même filtre ("Ténèbres" / "tenebres", "007" / "7") partagent
+    la même entrée de cache.
+    """
+    _label, ftype = config_index(fields_config).get(field, ("", ""))
+    if not q:
+        return ftype, ""
+    if ftype == "number":
+        return ftype, str(int(q)) if q.lstrip("-").isdigit() else q
+    if ftype in ("prefix", "choice") or (ftype == "text" and SEARCH_KEYS.get(field) and normalize_key(q)):
+        return ftype, normalize_key(q)
+    return ftype, q
+
+
+def cached_ids(lang: str, key: Tuple, build: Callable[[], object]) -> Sequence[int]:
+    """
+    Ids (dans l'ordre du queryset renvoyé par `build`) pour la clé `key`,
+    complétée par la langue et le jeton de version du catalogue : une
+    nouvelle synchro rend les anciennes entrées inaccessibles (puis évincées).
+    """
+    full_key = (lang, cache_token(lang)) + tuple(key)
+    ids = result_cache.get(full_key)
+    if ids is None:
+        # array("q") : 8 octets par id, au lieu d'un objet int par id dans une liste.
+        ids = array("q", build().values_list("pk", flat=True))
+        result_cache.set(full_key, ids)
+    return ids
+
+
+# Tri du queryset → tri du moteur colonnaire (ses lignes sont rangées par nom puis id).
+COLUMNAR_ORDERS = {("name",): "name", ("name", "id"): "name", ("id",): "id", ("-id",): "-id"}
+
+
+def columnar_order(queryset, fields_config, field: str, q: str, lang: str) -> Optional[str]:
+    """
+    Tri à demander au moteur colonnaire si la recherche peut lui être confiée
+    entière (moteur actif, filtre numérique seul qu'il connaît, queryset non
+    filtré de la bonne langue, tri qu'il sait reproduire), None sinon.
+    """
+    if not (columnar.enabled() and field in columnar.NUMERIC_FIELDS and q.lstrip("-").isdigit()):
+        return None
+    if config_index(fields_config).get(field, ("", ""))[1] != "number":
+        return None
+    if queryset.query.where or queryset.model is not lang_models(lang)[0]:
+        return None
+    order = tuple(str(o) for o in queryset.query.order_by)
+    if len(order) == 1 and order[0].lstrip("-") in columnar.NUMERIC_FIELDS:
+        return order[0]
+    return COLUMNAR_ORDERS.get(order)
+
+
+def search_ids(queryset, fields_config, field: str, q: str, lang: str) -> Sequence[int]:
+    """
+    filter_cards(queryset, …) réduit à ses ids ordonnés, via le cache de
+    résultats ; directement par le moteur colonnaire quand il le peut (voir
+    columnar_order), ses ids sont alors rendus dans l'ordre du queryset.
+    """
+    order = columnar_order(queryset, fields_config, field, q, lang)
+    if order is not None:
+        return columnar.search_ids(lang, [(field, "exact", int(q))], order_by=order)
+    key = ("search", queryset.model._meta.label, field) + search_term(fields_config, field, q) \
+        + (tuple(str(o) for o in queryset.query.order_by),)
+    return cached_ids(lang, key, lambda: filter_cards(queryset, fields_config, field, q, lang=lang))
+
+
+def hydrate(model, ids: Sequence[int], chunk_size: int, prefetch: Tuple[str, ...] = ("card_sets",)) -> Iterator[List]:
+    """
+    Instances de `model` pour `ids`, dans le même ordre, par paquets de
+    `chunk_size` : une requête par clé primaire par paquet (+ une par relation
+    préchargée). Les ids disparus entre-temps sont ignorés.
+    """
+    for start in range(0, len(ids), chunk_size):
+        chunk = list(ids[start:start + chunk_size])
+        by_pk = model.objects.prefetch_related(*prefetch).in_bulk(chunk)
+        yield [by_pk[pk] for pk in chunk if pk in by_pk]
@@ -0,0 +1,230 @@
+# YugiCall/setsummary.py
+# -*- coding: utf-8 -*-
+"""
+Résumés par extension (modèle SetSummary) et recherche d'extensions.
+
+- Empreinte d'une extension : somme (modulo 2^64) des empreintes de ses
+  impressions (carte, code, rareté, prix). Elle ne dépend pas de l'ordre des
+  cartes ni des pages : le loader l'accumule au fil du chargement
+  (LoadStats.set_digests) sans rien garder d'autre en mémoire.
+- refresh(alias, lang, digests) : ne recalcule (GROUP BY sur les seules
+  extensions concernées) que les lignes dont l'empreinte a changé, puis la
+  couverture par langue de ces extensions. Les extensions résumées absentes
+  du chargement (impressions renommées) sont relues dans la table, et
+  supprimées s'il n'en reste rien. digests=None → reconstruction complète
+  (import d'instantané, commande refresh_set_summaries --full).
+- find_sets / find_printings : recherche par code ("BLRR-", "lob") résolue
+  par un intervalle sur l'index du code, ou par nom normalisé.
+"""
+
+import hashlib
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import Count, Max, Min, Q, Sum
+
+from YugiCall.catalog import LANGUAGES, lang_models
+from YugiCall.models import SetSummary
+from YugiCall.normalize import normalize_key, prefix_bounds
+
+_MASK = (1 << 64) - 1
+CHUNK = 500
+CENTS = Decimal("0.01")
+
+
+def _price_text(price: Any) -> str:
+    if price in (None, ""):
+        return ""
+    try:
+        return f"{Decimal(str(price)):.2f}"
+    except InvalidOperation:
+        return str(price)
+
+
+def row_digest(card_id: Any, set_code: str, rarity: str, price: Any) -> int:
+    raw = f"{card_id}\x1f{set_code}\x1f{rarity}\x1f{_price_text(price)}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "big")
+
+
+def add_row(digests: Dict[str, int], set_name: str, card_id: Any, set_code: str, rarity: str, price: Any) -> None:
+    """Ajoute une impression à l'empreinte de son extension."""
+    digests[set_name] = (digests.get(set_name, 0) + row_digest(card_id, set_code, rarity, price)) & _MASK
+
+
+def merge_digests(into: Dict[str, int], other: Dict[str, int]) -> None:
+    """Ajoute les empreintes `other` (une page chargée ailleurs) à `into`."""
+    for set_name, digest in other.items():
+        into[set_name] = (into.get(set_name, 0) + digest) & _MASK
+
+
+def table_digests(set_model, alias: str, names: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Empreintes calculées depuis la table : toutes les extensions
+    (reconstruction complète) ou seulement `names`.
+    """
+    digests: Dict[str, int] = {}
+    queryset = set_model.objects.using(alias).order_by()
+    filters = [{}] if names is None else [{"set_name__in": chunk} for chunk in _chunks(names, CHUNK)]
+    for lookup in filters:
+        rows = (queryset.filter(**lookup)
+                .values_list("set_name", "card_id", "set_code", "set_rarity", "set_price"))
+        for set_name, card_id, set_code, rarity, price in rows.iterator(chunk_size=5000):
+            add_row(digests, set_name, card_id, set_code, rarity, price)
+    return digests
+
+
+def code_prefix(set_code: str) -> str:
+    """Préfixe produit d'un code d'impression : "BLRR-EN084" → "BLRR"."""
+    return set_code.split("-", 1)[0].strip().upper()
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _quantize(value: Optional[Decimal]) -> Optional[Decimal]:
+    # SQLite agrège les décimaux en flottants : on revient à 2 décimales.
+    return None if value is None else Decimal(value).quantize(CENTS)
+
+
+def _aggregate(set_model, alias: str, lang: str, names: List[str], digests: Dict[str, int]) -> List[SetSummary]:
+    rows = set_model.objects.using(alias).filter(set_name__in=names).order_by()
+    rarities: Dict[str, Dict[str, int]] = {}
+    for set_name, rarity, n in rows.values_list("set_name", "set_rarity").annotate(n=Count("pk")):
+        rarities.setdefault(set_name, {})[rarity or "?"] = n
+    totals = rows.values("set_name").annotate(
+        printings=Count("pk"),
+        card_count=Count("card", distinct=True),
+        priced=Count("set_price"),
+        price_total=Sum("set_price"),
+        price_min=Min("set_price"),
+        price_max=Max("set_price"),
+        first_code=Min("set_code"),
+    )
+    summaries = []
+    for row in totals:
+        name = row["set_name"]
+        summary = SetSummary(
+            lang=lang,
+            set_name=name,
+            code=code_prefix(row["first_code"] or ""),
+            card_count=row["card_count"],
+            printings=row["printings"],
+            rarities=dict(sorted(rarities.get(name, {}).items(), key=lambda item: (-item[1], item[0]))),
+            priced=row["priced"],
+            price_total=_quantize(row["price_total"]),
+            price_min=_quantize(row["price_min"]),
+            price_max=_quantize(row["price_max"]),
+            digest=format(digests.get(name, 0), "016x"),
+        )
+        # bulk_create ne passe pas par save().
+        summary.refresh_search_keys()
+        summaries.append(summary)
+    return summaries
+
+
+UPDATE_FIELDS = ["set_name_key", "code", "card_count", "printings", "rarities", "priced",
+                 "price_total", "price_min", "price_max", "digest", "updated_at"]
+
+
+def refresh(alias: str, lang: str, digests: Optional[Dict[str, int]] = None) -> int:
+    """
+    Met à jour les résumés de `lang` dans la base `alias` (à appeler dans la
+    construction du catalogue, avant la bascule). Renvoie le nombre
+    d'extensions recalculées.
+    """
+    _card_model, set_model = lang_models(lang)
+    full = digests is None
+    if full:
+        digests = table_digests(set_model, alias)
+    manager = SetSummary.objects.using(alias)
+    stored = dict(manager.filter(lang=lang).values_list("set_name", "digest"))
+    # Extensions résumées mais absentes du chargement : impressions passées
+    # sous un autre nom (toutes ou en partie), ou extension disparue.
+    missing = [name for name in stored if name not in digests]
+    leftover = {} if full or not missing else table_digests(set_model, alias, missing)
+    digests = {**digests, **leftover}
+    changed = sorted(name for name, digest in digests.items() if stored.get(name) != format(digest, "016x"))
+
+    for names in _chunks(changed, CHUNK):
+        manager.bulk_create(
+            _aggregate(set_model, alias, lang, names, digests),
+            update_conflicts=True,
+            unique_fields=["lang", "set_name"],
+            update_fields=UPDATE_FIELDS,
+        )
+    touched = set(changed)
+    # Extensions sans plus aucune impression : leur résumé n'a plus lieu d'être.
+    gone = [name for name in missing if name not in digests]
+    for names in _chunks(gone, CHUNK):
+        manager.filter(lang=lang, set_name__in=names).delete()
+    touched.update(gone)
+    refresh_languages(alias, sorted(touched))
+    return len(changed)
+
+
+def refresh_languages(alias: str, names: List[str]) -> None:
+    """Couverture {"fr": cartes, "en": cartes} des extensions `names`, toutes langues."""
+    manager = SetSummary.objects.using(alias)
+    for chunk in _chunks(names, CHUNK):
+        summaries = list(manager.filter(set_name__in=chunk).only("pk", "set_name", "lang", "card_count"))
+        coverage: Dict[str, Dict[str, int]] = {}
+        for s in summaries:
+            coverage.setdefault(s.set_name, {lang: 0 for lang in LANGUAGES})[s.lang] = s.card_count
+        for s in summaries:
+            s.languages = coverage[s.set_name]
+        manager.bulk_update(summaries, ["languages"])
+
+
+# --- Recherche ---
+
+def _code_q(field: str, q: str) -> Optional[Q]:
+    """Intervalle [préfixe, suivant) sur un champ de code (codes en majuscules)."""
+    prefix = q.strip().upper()
+    if not prefix or " " in prefix:
+        return None
+    low, high = prefix_bounds(prefix)
+    return Q(**{f"{field}__gte": low, f"{field}__lt": high})
+
+
+def find_sets(lang: str, q: str = ""):
+    """
+    Résumés de `lang` : tous (q vide), ou ceux dont le code produit commence
+    par q ("lo" → LOB, LOD…, intervalle indexé) ou vaut le préfixe d'un code
+    complet ("blrr-", "BLRR-EN084" → BLRR), ou dont le nom contient q (sans
+    casse ni accents).
+    """
+    summaries = SetSummary.objects.filter(lang=lang).order_by("code", "set_name")
+    if not q:
+        return summaries
+    condition = Q(pk__in=[])
+    if "-" in q:
+        condition |= Q(code=code_prefix(q))
+    else:
+        code_q = _code_q("code", q)
+        if code_q is not None:
+            condition |= code_q
+    needle = normalize_key(q)
+    if needle:
+        condition |= Q(set_name_key__contains=needle)
+    return summaries.filter(condition)
+
+
+def find_printings(lang: str, code: str, limit: int = 500) -> Tuple[List, bool]:
+    """
+    Impressions dont le code commence par `code` ("BLRR-EN08" → BLRR-EN080…089),
+    par intervalle sur l'index de set_code. Renvoie (impressions, tronqué ?).
+    """
+    _card_model, set_model = lang_models(lang)
+    code_q = _code_q("set_code", code)
+    if code_q is None:
+        return [], False
+    rows = list(set_model.objects.filter(code_q).select_related("card").order_by("set_code", "card_id")[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def set_printings(summary: SetSummary):
+    """Impressions d'une extension (index sur set_name), carte jointe."""
+    _card_model, set_model = lang_models(summary.lang)
+    return set_model.objects.filter(set_name=summary.set_name).select_related("card").order_by("set_code", "card_id")
@@ -0,0 +1,266 @@
+# YugiCall/snapshot.py
+# -*- coding: utf-8 -*-
+"""
+Instantané colonnaire compact du catalogue (Card, CardSet, CardEN, CardSetEN).
+
+Format d'un fichier .ygcs :
+    MAGIC (8 octets) | longueur de l'en-tête (uint32 LE) | en-tête JSON | blobs
+
+- L'en-tête décrit la version du format, les versions checkDBVer (FR/EN),
+  et pour chaque table : nombre de lignes + colonnes (encodage, offset, taille).
+- Chaque colonne est un ou plusieurs blobs compressés (lzma) indépendamment :
+    * "int"     : array('q') little-endian (+ masque de nulls si besoin),
+    * "decimal" : même chose, valeur × 10^decimal_places,
+    * "str"     : dictionnaire (liste JSON des valeurs distinctes) + codes array('I'),
+    * "json"    : valeur sérialisée en JSON puis encodée comme "str".
+- Lignes triées par clé primaire, dictionnaires dans l'ordre d'apparition et
+  pas d'horodatage "maintenant" : même base ⇒ même fichier, octet pour octet.
+
+Les colonnes sont déduites des champs des modèles : un champ ajouté par une
+migration est exporté/importé sans toucher à ce module.
+"""
+
+import json
+import lzma
+import struct
+import sys
+from array import array
+from decimal import Decimal
+from typing import Any, BinaryIO, Dict, List, Tuple
+
+from django.db import models, transaction
+
+from YugiCall.models import Card, CardEN, CardSet, CardSetEN
+
+MAGIC = b"YGCSNAP\x00"
+FORMAT_VERSION = 1
+
+# Ordre d'import : les cartes avant leurs sets (clé étrangère).
+TABLES = [Card, CardSet, CardEN, CardSetEN]
+
+BATCH_SIZE = 2000
+
+
+class SnapshotError(Exception):
+    """Fichier illisible, format inconnu ou incohérent."""
+
+
+# --- Encodage des colonnes ---
+
+def _encoding_for(field: models.Field) -> str:
+    if isinstance(field, models.DecimalField):
+        return "decimal"
+    if isinstance(field, models.JSONField):
+        return "json"
+    if isinstance(field, (models.CharField, models.TextField)):
+        return "str"
+    if isinstance(field, (models.IntegerField, models.BooleanField, models.ForeignKey)):
+        return "int"
+    raise SnapshotError(f"Type de champ non géré: {field.__class__.__name__} ({field.name})")
+
+
+def _columns(model) -> List[models.Field]:
+    return list(model._meta.concrete_fields)
+
+
+def _int_array(values: List[Any]) -> Tuple[bytes, bytes]:
+    """(données array('q'), masque de nulls ou b"" si aucun null)."""
+    data = array("q", (0 if v is None else int(v) for v in values))
+    if sys.byteorder != "little":
+        data.byteswap()
+    nulls = b""
+    if any(v is None for v in values):
+        mask = bytearray((len(values) + 7) // 8)
+        for i, v in enumerate(values):
+            if v is None:
+                mask[i >> 3] |= 1 << (i & 7)
+        nulls = bytes(mask)
+    return data.tobytes(), nulls
+
+
+def _int_values(data: bytes, nulls: bytes, count: int) -> List[Any]:
+    arr = array("q")
+    arr.frombytes(data)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    if len(arr) != count:
+        raise SnapshotError("Colonne entière tronquée")
+    values: List[Any] = arr.tolist()
+    if nulls:
+        for i in range(count):
+            if nulls[i >> 3] & (1 << (i & 7)):
+                values[i] = None
+    return values
+
+
+def _dict_encode(values: List[Any]) -> Tuple[bytes, bytes]:
+    """(dictionnaire JSON, codes array('I'))."""
+    index: Dict[Any, int] = {}
+    codes = array("I")
+    for v in values:
+        code = index.get(v)
+        if code is None:
+            code = index[v] = len(index)
+        codes.append(code)
+    if sys.byteorder != "little":
+        codes.byteswap()
+    dictionary = json.dumps(list(index), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return dictionary, codes.tobytes()
+
+
+def _dict_decode(dictionary: bytes, codes_data: bytes, count: int) -> List[Any]:
+    words = json.loads(dictionary.decode("utf-8"))
+    codes = array("I")
+    codes.frombytes(codes_data)
+    if sys.byteorder != "little":
+        codes.byteswap()
+    if len(codes) != count:
+        raise SnapshotError("Colonne texte tronquée")
+    return [words[c] for c in codes]
+
+
+def _encode_column(field: models.Field, values: List[Any]) -> Tuple[str, List[bytes]]:
+    enc = _encoding_for(field)
+    if enc == "int":
+        return enc, list(_int_array([None if v is None else int(v) for v in values]))
+    if enc == "decimal":
+        scale = 10 ** field.decimal_places
+        scaled = [None if v is None else int(Decimal(v) * scale) for v in values]
+        return enc, list(_int_array(scaled))
+    if enc == "json":
+        values = [json.dumps(v, ensure_ascii=False, sort_keys=True) for v in values]
+    return enc, list(_dict_encode(values))
+
+
+def _decode_column(field: models.Field, enc: str, blobs: List[bytes], count: int) -> List[Any]:
+    if enc == "int":
+        return _int_values(blobs[0], blobs[1], count)
+    if enc == "decimal":
+        scale = Decimal(10) ** field.decimal_places
+        return [None if v is None else Decimal(v) / scale for v in _int_values(blobs[0], blobs[1], count)]
+    values = _dict_decode(blobs[0], blobs[1], count)
+    if enc == "json":
+        return [json.loads(v) for v in values]
+    return values
+
+
+# --- Export ---
+
+def export_snapshot(fh: BinaryIO, versions: Dict[str, Any], preset: int = 6) -> Dict[str, Any]:
+    """
+    Écrit l'instantané dans `fh` (fichier binaire) et renvoie l'en-tête.
+    `versions` = marqueurs checkDBVer par langue ({"fr": ..., "en": ...}).
+    """
+    blobs: List[bytes] = []
+    offset = 0
+    tables = []
+    for model in TABLES:
+        fields = _columns(model)
+        attnames = [f.attname for f in fields]
+        # values_list + tri par PK : lecture rapide et ordre reproductible.
+        rows = list(model.objects.order_by("pk").values_list(*attnames))
+        columns = []
+        for i, field in enumerate(fields):
+            enc, parts = _encode_column(field, [r[i] for r in rows])
+            spans = []
+            for raw in parts:
+                packed = lzma.compress(raw, preset=preset) if raw else b""
+                spans.append([offset, len(packed)])
+                blobs.append(packed)
+                offset += len(packed)
+            columns.append({"name": field.attname, "encoding": enc, "blobs": spans})
+        tables.append({"model": model._meta.label, "rows": len(rows), "columns": columns})
+
+    header = {
+        "format": FORMAT_VERSION,
+        "versions": versions,
+        "tables": tables,
+    }
+    raw_header = json.dumps(header, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    fh.write(MAGIC)
+    fh.write(struct.pack("<I", len(raw_header)))
+    fh.write(raw_header)
+    for blob in blobs:
+        fh.write(blob)
+    return header
+
+
+# --- Import ---
+
+def read_header(fh: BinaryIO) -> Tuple[Dict[str, Any], int]:
+    """Lit et valide l'en-tête ; renvoie (en-tête, position du début des blobs)."""
+    if fh.read(len(MAGIC)) != MAGIC:
+        raise SnapshotError("Ce fichier n'est pas un instantané YugiCloud")
+    try:
+        (size,) = struct.unpack("<I", fh.read(4))
+        raw_header = fh.read(size)
+        if len(raw_header) != size:
+            raise SnapshotError("En-tête tronqué")
+        header = json.loads(raw_header.decode("utf-8"))
+    except (struct.error, ValueError) as e:  # UnicodeDecodeError / JSONDecodeError : ValueError
+        raise SnapshotError(f"En-tête illisible ({e})")
+    if not isinstance(header, dict):
+        raise SnapshotError("En-tête illisible")
+    if header.get("format") != FORMAT_VERSION:
+        raise SnapshotError(f"Format {header.get('format')} non supporté (attendu {FORMAT_VERSION})")
+    return header, len(MAGIC) + 4 + size
+
+
+def _decode_tables(header: Dict[str, Any], data: bytes) -> List[Tuple[Any, int, Dict[str, List[Any]]]]:
+    """[(modèle, nombre de lignes, {colonne: valeurs})] décodés depuis les blobs."""
+    by_label = {m._meta.label: m for m in TABLES}
+    decoded = []
+    for table in header["tables"]:
+        model = by_label.get(table["model"])
+        if model is None:
+            raise SnapshotError(f"Table inconnue: {table['model']}")
+        fields = {f.attname: f for f in _columns(model)}
+        count = table["rows"]
+        columns = {}
+        for col in table["columns"]:
+            field = fields.get(col["name"])
+            if field is None:
+                # Colonne supprimée depuis l'export : on l'ignore.
+                continue
+            blobs = [lzma.decompress(data[o:o + n]) if n else b"" for o, n in col["blobs"]]
+            columns[col["name"]] = _decode_column(field, col["encoding"], blobs, count)
+        decoded.append((model, count, columns))
+    return decoded
+
+
+def import_snapshot(fh: BinaryIO, using: str = "default", stats=None) -> Dict[str, Any]:
+    """
+    Remplace le contenu des tables du catalogue par celui de l'instantané.
+    Tout se fait dans une seule transaction : en cas d'erreur, rien ne change.
+    Renvoie l'en-tête (versions + nombre de lignes par table).
+    `stats` (loader.LoadStats, optionnel) reçoit les lignes insérées.
+    """
+    header, base = read_header(fh)
+    data = fh.read()
+    try:
+        decoded = _decode_tables(header, data)
+    except (lzma.LZMAError, ValueError, KeyError, IndexError, TypeError) as e:
+        # Fichier tronqué ou abîmé : blob incomplet, JSON invalide, en-tête incohérent…
+        raise SnapshotError(f"Instantané corrompu ({type(e).__name__}: {e})")
+
+    with transaction.atomic(using=using):
+        # Suppression dans l'ordre inverse (sets avant cartes), puis rechargement.
+        for model, _count, _columns_ in reversed(decoded):
+            model.objects.using(using).all().delete()
+        for model, count, columns in decoded:
+            if stats is not None:
+                stats.rows_inserted += count
+            names = list(columns)
+            objs = (model(**dict(zip(names, vals))) for vals in zip(*(columns[n] for n in names)))
+            batch = []
+            for obj in objs:
+                # Instantanés antérieurs aux colonnes *_key : bulk_create ne passe pas par save().
+                if hasattr(obj, "refresh_search_keys"):
+                    obj.refresh_search_keys()
+                batch.append(obj)
+                if len(batch) >= BATCH_SIZE:
+                    model.objects.using(using).bulk_create(batch)
+                    batch = []
+            if batch:
+                model.objects.using(using).bulk_create(batch)
+    return header
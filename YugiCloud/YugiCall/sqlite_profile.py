@@ -0,0 +1,83 @@
+# YugiCall/sqlite_profile.py
+# -*- coding: utf-8 -*-
+"""
+Profils de connexion SQLite (PRAGMA appliqués à chaque nouvelle connexion).
+
+- "web"  : workers en lecture majoritaire (WAL, mmap, gros cache, busy_timeout court).
+- "sync" : processus de synchro qui écrit beaucoup (cache plus gros, busy_timeout long).
+
+Le profil actif vient de settings.SQLITE_PROFILE (variable d'environnement
+YUGICLOUD_SQLITE_PROFILE) ; les commandes de synchro basculent sur "sync"
+via activate(). Les valeurs sont dans settings.SQLITE_PROFILES.
+"""
+
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import connections
+
+# Ordre d'application : journal_mode d'abord (il doit passer hors transaction).
+PRAGMA_ORDER = ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store")
+
+_active: Dict[str, Optional[str]] = {"name": None}
+
+
+def profiles() -> Dict[str, Dict[str, object]]:
+    return getattr(settings, "SQLITE_PROFILES", {})
+
+
+def active_profile() -> Optional[str]:
+    return _active["name"] or getattr(settings, "SQLITE_PROFILE", None)
+
+
+def activate(name: Optional[str]) -> None:
+    """
+    Change le profil des PROCHAINES connexions de ce processus et ferme les
+    connexions déjà ouvertes pour qu'elles soient recréées avec ce profil.
+    """
+    if name is not None and name not in profiles():
+        raise ValueError(f"Profil SQLite inconnu: {name}")
+    _active["name"] = name
+    for conn in connections.all(initialized_only=True):
+        if conn.vendor == "sqlite":
+            conn.close()
+
+
+def pragma_statements(name: Optional[str]) -> Iterable[str]:
+    values = profiles().get(name or "", {})
+    for key in PRAGMA_ORDER:
+        if key in values:
+            yield f"PRAGMA {key} = {values[key]}"
+
+
+def apply_pragmas(cursor, name: Optional[str]) -> None:
+    """Applique un profil sur un curseur (Django ou sqlite3 brut)."""
+    for stmt in pragma_statements(name):
+        cursor.execute(stmt)
+
+
+def on_connection_created(sender, connection, **kwargs):
+    """Receiver du signal connection_created (branché dans YugicallConfig.ready)."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, active_profile())
+
+
+def refresh_statistics(alias: str, tables: Iterable[str] = ()) -> None:
+    """
+    Met à jour les statistiques du planificateur après une synchro
+    (ANALYZE sous SQLite et PostgreSQL). Sans `tables`, toute la base.
+    """
+    conn = connections[alias]
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            cursor.execute("ANALYZE")
+            cursor.execute("PRAGMA optimize")
+        elif conn.vendor == "postgresql":
+            names = list(tables)
+            if names:
+                for table in names:
+                    cursor.execute(f"ANALYZE {conn.ops.quote_name(table)}")
+            else:
+                cursor.execute("ANALYZE")
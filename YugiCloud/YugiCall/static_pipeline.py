@@ -0,0 +1,173 @@
+# YugiCall/static_pipeline.py
+# -*- coding: utf-8 -*-
+"""
+Fichiers statiques hachés, précompressés et servis par le processus web.
+
+Au collectstatic (STATIC_PIPELINE actif, voir settings.STORAGES) :
+- STATIC_BUNDLES : les CSS listés sont concaténés en un seul fichier
+  (css/site.css), lui aussi haché ;
+- ManifestStaticFilesStorage renomme chaque fichier avec le hash de son
+  contenu (navbar.3f2a….css) et écrit staticfiles.json ;
+- chaque fichier texte reçoit ses variantes .gz (et .br si le paquet
+  brotli est installé), gardées seulement si elles sont plus petites.
+
+À l'exécution, PrecompressedStaticMiddleware répond aux /static/… depuis
+STATIC_ROOT : variante choisie selon Accept-Encoding (br, puis gzip),
+"Cache-Control: immutable" pour un an sur les noms hachés (le nom change
+avec le contenu, le navigateur ne redemande jamais), revalidation par
+Last-Modified pour les autres.
+"""
+
+import gzip
+import mimetypes
+import os
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+# Brotli est optionnel : sans lui, seulement les variantes gzip.
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    brotli = None
+
+COMPRESSIBLE = (".css", ".js", ".svg", ".json", ".txt", ".html", ".map", ".xml")
+# (Content-Encoding, suffixe) par ordre de préférence
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=0, must-revalidate"
+
+
+def compress_variants(data: bytes) -> Dict[str, bytes]:
+    """{suffixe: contenu compressé} pour les variantes plus petites que l'original."""
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return {suffix: blob for suffix, blob in variants.items() if len(blob) < len(data)}
+
+
+class PrecompressedManifestStorage(ManifestStaticFilesStorage):
+    # Un fichier absent du manifeste garde son nom d'origine au lieu de faire
+    # planter la page (collectstatic pas encore relancé après un ajout).
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            for bundle in self._write_bundles(paths):
+                paths[bundle] = (self, bundle)
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files) | set(self.hashed_files.values()):
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                yield from self._compress(name)
+
+    def _write_bundles(self, paths):
+        for bundle, members in settings.STATIC_BUNDLES.items():
+            parts = []
+            for member in members:
+                if member not in paths:
+                    continue
+                with self.open(member) as f:
+                    parts.append(f"/* {member} */\n".encode() + f.read().rstrip() + b"\n")
+            if self.exists(bundle):
+                self.delete(bundle)
+            self._save(bundle, ContentFile(b"\n".join(parts)))
+            yield bundle
+
+    def _compress(self, name):
+        with self.open(name) as f:
+            data = f.read()
+        for suffix, blob in compress_variants(data).items():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(blob))
+            yield name + suffix, name + suffix, True
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Accept-Encoding → {codage: q}, "gzip;q=0" compris (refus explicite)."""
+    accepted = {}
+    for item in header.split(","):
+        token, _, params = item.strip().partition(";")
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip().lower()] = q
+    return accepted
+
+
+class PrecompressedStaticMiddleware:
+    """
+    À placer juste après SecurityMiddleware. Inactif si STATIC_PIPELINE est
+    désactivé ; les chemins absents de STATIC_ROOT continuent vers Django.
+    """
+
+    def __init__(self, get_response):
+        if not settings.STATIC_PIPELINE or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.prefix = "/" + settings.STATIC_URL.lstrip("/")
+        self.root = str(settings.STATIC_ROOT)
+        self._hashed: Optional[frozenset] = None
+
+    def __call__(self, request):
+        if request.method in ("GET", "HEAD") and request.path_info.startswith(self.prefix):
+            response = self.serve(request, request.path_info[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    @property
+    def hashed_names(self) -> frozenset:
+        # Lu une fois par processus : un nouveau collectstatic demande un redémarrage,
+        # comme pour les URLs générées par {% static %}.
+        if self._hashed is None:
+            self._hashed = frozenset(getattr(staticfiles_storage, "hashed_files", {}).values())
+        return self._hashed
+
+    def serve(self, request, name: str):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        immutable = name in self.hashed_names
+        stat = os.stat(path)
+        if not immutable and not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime):
+            return HttpResponseNotModified()
+
+        content_type, _ = mimetypes.guess_type(name)
+        accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        encoding, served, compressed = None, path, False
+        for token, suffix in ENCODINGS:
+            if not os.path.isfile(path + suffix):
+                continue
+            compressed = True
+            if encoding is None and accepted.get(token, 0) > 0:
+                encoding, served = token, path + suffix
+
+        response = FileResponse(open(served, "rb"), content_type=content_type or "application/octet-stream")
+        del response["Content-Disposition"]
+        if encoding:
+            response["Content-Encoding"] = encoding
+        if compressed:
+            response["Vary"] = "Accept-Encoding"
+        response["Cache-Control"] = IMMUTABLE if immutable else REVALIDATE
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        return response
@@ -0,0 +1,147 @@
+# YugiCall/synclock.py
+# -*- coding: utf-8 -*-
+"""
+Verrou inter-processus pour les synchronisations.
+
+Les commandes sync_DB_pub / sync_DB_pub_en et le démon sync_daemon prennent
+tous ce verrou : deux synchros ne se chevauchent jamais (sinon SQLite répond
+"database is locked" au milieu de l'import).
+
+- Verrou de fichier (flock sous POSIX, msvcrt sous Windows) : libéré
+  automatiquement par l'OS si le processus meurt.
+- Réentrant dans un même processus : le démon tient le verrou pendant qu'il
+  appelle les commandes de synchro, qui le reprennent sans se bloquer.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+class SyncLockBusy(CommandError):
+    """Une autre synchronisation tient déjà le verrou."""
+
+
+_state = {"fh": None, "depth": 0}
+_state_lock = threading.RLock()
+
+
+def lock_path() -> Path:
+    return Path(getattr(settings, "SYNC_LOCK_PATH", settings.BASE_DIR / ".sync.lock"))
+
+
+def status_path() -> Path:
+    return Path(getattr(settings, "SYNC_STATUS_PATH", settings.BASE_DIR / ".sync_status.json"))
+
+
+def _try_lock(fh) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:  # pragma: no cover - Windows
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fh) -> None:
+    if fcntl is not None:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    else:  # pragma: no cover - Windows
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def sync_lock(wait: Optional[float] = 0.0, poll: float = 0.5):
+    """
+    Prend le verrou exclusif de synchronisation.
+    - wait=0    : échoue tout de suite (SyncLockBusy) si le verrou est pris,
+    - wait=N    : attend au plus N secondes,
+    - wait=None : attend indéfiniment.
+    """
+    with _state_lock:
+        if _state["depth"] > 0:
+            # Déjà tenu par ce processus : simple réentrance.
+            _state["depth"] += 1
+        else:
+            path = lock_path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fh = open(path, "a+")
+            deadline = None if wait is None else time.monotonic() + wait
+            while not _try_lock(fh):
+                if deadline is not None and time.monotonic() >= deadline:
+                    fh.close()
+                    raise SyncLockBusy(f"Une synchronisation est déjà en cours (verrou {path}).")
+                time.sleep(poll)
+            # On note le PID du détenteur (purement informatif, pour le diagnostic).
+            fh.seek(0)
+            fh.truncate()
+            fh.write(str(os.getpid()))
+            fh.flush()
+            _state["fh"] = fh
+            _state["depth"] = 1
+    try:
+        yield
+    finally:
+        with _state_lock:
+            _state["depth"] -= 1
+            if _state["depth"] == 0:
+                fh = _state["fh"]
+                _state["fh"] = None
+                _state["depth"] = 0
+                if fh is not None:
+                    _unlock(fh)
+                    fh.close()
+
+
+def is_locked() -> bool:
+    """True si une synchronisation (ce processus ou un autre) tient le verrou."""
+    with _state_lock:
+        if _state["depth"] > 0:
+            return True
+    path = lock_path()
+    if not path.exists():
+        return False
+    with open(path, "a+") as fh:
+        if _try_lock(fh):
+            _unlock(fh)
+            return False
+    return True
+
+
+def write_status(**fields: Any) -> Dict[str, Any]:
+    """
+    Fusionne `fields` dans le fichier de statut (health checks) et le réécrit
+    atomiquement. Renvoie le statut complet.
+    """
+    status = read_status()
+    status.update(fields)
+    path = status_path()
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(status, fh, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp, path)
+    return status
+
+
+def read_status() -> Dict[str, Any]:
+    try:
+        with open(status_path(), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,108 @@
+# YugiCall/synthetic.py
+# -*- coding: utf-8 -*-
+"""
+Catalogue synthétique au format cardinfo (même forme que la vraie réponse).
+
+Déterministe (graine) : sert aux benchmarks et à tout ce qui doit tourner
+sans accès à YGOPRODeck.
+"""
+
+import random
+from typing import Any, Dict, Iterator, List
+
+MONSTER_TYPES = [
+    ("Effect Monster", "effect"), ("Normal Monster", "normal"), ("Fusion Monster", "fusion"),
+    ("Synchro Monster", "synchro"), ("XYZ Monster", "xyz"), ("Link Monster", "link"),
+    ("Pendulum Effect Monster", "effect_pendulum"),
+]
+SPELL_TRAP = [("Spell Card", "spell"), ("Trap Card", "trap")]
+RACES = ["Dragon", "Spellcaster", "Warrior", "Machine", "Fiend", "Zombie", "Beast", "Wyrm", "Cyberse"]
+SPELL_RACES = ["Normal", "Quick-Play", "Continuous", "Equip", "Field", "Ritual", "Counter"]
+ATTRIBUTES = ["LIGHT", "DARK", "FIRE", "WATER", "EARTH", "WIND", "DIVINE"]
+ARCHETYPES = ["Blue-Eyes", "Dark Magician", "Elemental HERO", "Cyber Dragon", "Sky Striker",
+              "Salamangreat", "Branded", "Tearlaments", None, None, None]
+LINK_MARKERS = ["Top", "Bottom", "Left", "Right", "Top-Left", "Top-Right", "Bottom-Left", "Bottom-Right"]
+RARITIES = [("Common", "(C)"), ("Rare", "(R)"), ("Super Rare", "(SR)"), ("Ultra Rare", "(UR)"),
+            ("Secret Rare", "(ScR)"), ("Starlight Rare", "(StR)")]
+SETS = [("Legend of Blue Eyes White Dragon", "LOB"), ("Battles of Legend: Relentless Revenge", "BLRR"),
+        ("Duel Devastator", "DUDE"), ("Metal Raiders", "MRD"), ("Phantom Nightmare", "PHNI"),
+        ("Rarity Collection", "RA01"), ("Maze of Memories", "MAZE"), ("Legendary Duelists", "LED2")]
+BANLIST = [None] * 12 + ["Banned", "Limited", "Semi-Limited"]
+
+WORDS = {
+    "en": ["Dragon", "Magician", "Dark", "Blue-Eyes", "Hero", "Cyber", "Chaos", "Light", "Warrior",
+           "Knight", "Storm", "Shadow", "Flame", "Ice", "Thunder", "Ancient", "Sky", "Star"],
+    "fr": ["Dragon", "Magicien", "Sombre", "aux Yeux Bleus", "Héros", "Cyber", "Chaos", "Lumière",
+           "Guerrier", "Chevalier", "Tempête", "Ténèbres", "Flamme", "Glace", "Tonnerre", "Ancien",
+           "Ciel", "Étoile"],
+}
+
+FIRST_ID = 10000000
+
+
+def generate_card(rnd: random.Random, cid: int, language: str = "en") -> Dict[str, Any]:
+    """Une carte au format cardinfo (clés absentes quand l'API les omet)."""
+    words = WORDS.get(language, WORDS["en"])
+    is_monster = rnd.random() < 0.65
+    ctype, frame = rnd.choice(MONSTER_TYPES) if is_monster else rnd.choice(SPELL_TRAP)
+    name = " ".join(rnd.sample(words, rnd.randint(2, 4)))
+    card: Dict[str, Any] = {
+        "id": cid,
+        "name": f"{name} {cid % 100000}",
+        "type": ctype,
+        "frameType": frame,
+        "desc": " ".join(rnd.choice(words).lower() for _ in range(rnd.randint(15, 80))) + ".",
+        "race": rnd.choice(RACES if is_monster else SPELL_RACES),
+        "ygoprodeck_url": f"https://ygoprodeck.com/card/card-{cid}",
+    }
+    archetype = rnd.choice(ARCHETYPES)
+    if archetype:
+        card["archetype"] = archetype
+    if is_monster:
+        card["attribute"] = rnd.choice(ATTRIBUTES)
+        card["atk"] = rnd.randrange(0, 41) * 100
+        if frame == "link":
+            markers = rnd.sample(LINK_MARKERS, rnd.randint(1, 5))
+            card["linkval"] = len(markers)
+            card["linkmarkers"] = markers
+        else:
+            card["def"] = rnd.randrange(0, 41) * 100
+            card["level"] = rnd.randint(1, 12)
+        if "pendulum" in frame:
+            card["scale"] = rnd.randint(0, 13)
+    ban = rnd.choice(BANLIST)
+    if ban:
+        card["banlist_info"] = {"ban_tcg": ban}
+
+    sets: List[Dict[str, Any]] = []
+    for set_name, prefix in rnd.sample(SETS, rnd.randint(0, 4)):
+        rarity, rarity_code = rnd.choice(RARITIES)
+        sets.append({
+            "set_name": set_name,
+            "set_code": f"{prefix}-{language.upper()}{rnd.randint(0, 120):03d}",
+            "set_rarity": rarity,
+            "set_rarity_code": rarity_code,
+            "set_price": f"{rnd.uniform(0, 80):.2f}" if rnd.random() < 0.9 else "0",
+        })
+    if sets:
+        card["card_sets"] = sets
+    card["card_images"] = [{
+        "id": cid,
+        "image_url": f"https://images.ygoprodeck.com/images/cards/{cid}.jpg",
+        "image_url_small": f"https://images.ygoprodeck.com/images/cards_small/{cid}.jpg",
+        "image_url_cropped": f"https://images.ygoprodeck.com/images/cards_cropped/{cid}.jpg",
+    }]
+    card["card_prices"] = [{"cardmarket_price": f"{rnd.uniform(0, 20):.2f}",
+                            "tcgplayer_price": f"{rnd.uniform(0, 20):.2f}"}]
+    return card
+
+
+def generate_cards(count: int, seed: int = 0, language: str = "en") -> Iterator[Dict[str, Any]]:
+    """`count` cartes déterministes (même graine ⇒ mêmes cartes, quelle que soit la langue)."""
+    for i in range(count):
+        # Une graine par carte : la carte i est identique quel que soit `count`.
+        yield generate_card(random.Random(seed * 1_000_003 + i), FIRST_ID + i * 7, language)
+
+
+def generate_payload(count: int, seed: int = 0, language: str = "en") -> Dict[str, Any]:
+    return {"data": list(generate_cards(count, seed, language))}
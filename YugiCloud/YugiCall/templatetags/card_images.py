@@ -0,0 +1,24 @@
+# YugiCall/templatetags/card_images.py
+from django import template
+from django.urls import reverse
+
+from YugiCall import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def card_image_url(card_id, size="small"):
+    """
+    URL locale (adressée par contenu) de l'image d'une carte, ou "" si elle
+    n'a pas encore été miroitée par sync_images.
+    Si la vignette demandée n'est pas notée dans l'index (pas encore générée),
+    on retombe sur l'original ; aucun accès disque par ligne.
+    Usage : {% card_image_url c.id "small" as thumb %}
+    """
+    entry = images.lookup_image(card_id)
+    if not entry:
+        return ""
+    if size != "full" and size not in entry.get("thumbs", ()):
+        size = "full"
+    return reverse("card-image", kwargs={"size": size, "sha256": entry["sha256"]})
@@ -0,0 +1,22 @@
+# YugiCall/templatetags/static_bundles.py
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def stylesheets(bundle):
+    """
+    Balises <link> d'un groupe de STATIC_BUNDLES : le fichier regroupé (et
+    haché) produit par collectstatic si le pipeline est actif, sinon un lien
+    par fichier source.
+    Usage : {% stylesheets "css/site.css" %}
+    """
+    if settings.STATIC_PIPELINE and settings.STATIC_BUNDLE_CSS:
+        names = [bundle]
+    else:
+        names = settings.STATIC_BUNDLES[bundle]
+    return format_html_join("\n    ", '<link rel="stylesheet" href="{}">', ((static(name),) for name in names))
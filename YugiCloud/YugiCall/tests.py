@@ -1,3 +1,473 @@
-from django.test import TestCase
+# YugiCall/tests.py
+# -*- coding: utf-8 -*-
+"""
+Tests du catalogue : python manage.py test YugiCall
 
-# Create your tests here.
+Les mêmes tests passent sous SQLite (défaut) et sous PostgreSQL
+(YUGICLOUD_DB_ENGINE=postgresql …) ; ceux du chemin COPY ne tournent que
+sous PostgreSQL. Les appels à YGOPRODeck partent vers FakeYGOPRODeck
+(serveur local, pannes injectées) : aucun test ne touche la vraie API.
+"""
+
+import copy
+import io
+import os
+import re
+import shutil
+import struct
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from YugiCall import catalog, setsummary, snapshot, synthetic, ygoprodeck
+from YugiCall.fake_ygoprodeck import Faults, FakeYGOPRODeck
+from YugiCall.loader import BulkStage, LoadStats, RowLayout, copy_load, load_cards, orm_load
+from YugiCall.models import Card, CardEN, CardSet, CardSetEN, SetSummary, SyncRun
+from YugiCall.normalize import normalize_key, prefix_bounds
+from YugiCall.search import prefix_filter
+
+POSTGRES = settings.DATABASES["catalog"]["ENGINE"].endswith("postgresql")
+
+
+def catalog_rows():
+    """Contenu complet des tables EN (hors pk des sets), dans un ordre stable."""
+    cards = list(CardEN.objects.order_by("id").values_list(
+        *[f.attname for f in CardEN._meta.concrete_fields]))
+    set_fields = [f.attname for f in CardSetEN._meta.concrete_fields if not f.primary_key]
+    sets = list(CardSetEN.objects.order_by("card_id", "set_code").values_list(*set_fields))
+    return cards, sets
+
+
+class NormalizeKeyTests(SimpleTestCase):
+    """Clés *_key : même résultat au chargement et pour les termes saisis."""
+
+    def test_accents_and_case_are_folded(self):
+        self.assertEqual(normalize_key("Magicien-Sombre DES Ténèbres"), "magicien sombre des tenebres")
+        self.assertEqual(normalize_key("LUMIÈRE"), normalize_key("lumiere"))
+        self.assertEqual(normalize_key("Straße"), "strasse")
+
+    def test_ligatures_are_expanded(self):
+        self.assertEqual(normalize_key("Cœur de Dragon"), "coeur de dragon")
+        self.assertEqual(normalize_key("ŒIL"), "oeil")
+
+    def test_punctuation_and_spaces_collapse(self):
+        self.assertEqual(normalize_key("  Dark -- Magician!!  Girl_"), "dark magician girl")
+        self.assertEqual(normalize_key("Sœur/Ange\t\n(Version 2)"), "soeur ange version 2")
+
+    def test_empty_input(self):
+        for value in (None, "", "  ", "--!"):
+            self.assertEqual(normalize_key(value), "")
+
+    def test_prefix_bounds(self):
+        self.assertEqual(prefix_bounds("dark m"), ("dark m", "dark n"))
+        low, high = prefix_bounds("z")
+        self.assertLess("z", high)
+        self.assertLess("zzzz", high)
+
+
+class PrefixFilterTests(TestCase):
+    """prefix_filter : intervalle sur name_key, sans déborder sur le préfixe voisin."""
+
+    databases = {"default", "catalog"}
+
+    def setUp(self):
+        names = ["Magicien Sombre", "Magicien-Sombre du Chaos", "Magicienne des Ténèbres",
+                 "Magicien Sombrf", "Magiciens", "Dragon Blanc"]
+        cards = list(synthetic.generate_cards(len(names), seed=1))
+        for card, name in zip(cards, names):
+            card["name"] = name
+        orm_load(Card, CardSet, cards, using="catalog")
+
+    def names(self, q):
+        return sorted(prefix_filter(Card.objects.using("catalog"), "name_key", q).values_list("name", flat=True))
+
+    def test_prefix_range(self):
+        self.assertEqual(self.names("magicien sombre"), ["Magicien Sombre", "Magicien-Sombre du Chaos"])
+        self.assertEqual(self.names("MAGICIEN-SOMBRE"), ["Magicien Sombre", "Magicien-Sombre du Chaos"])
+        self.assertEqual(self.names("magicienne"), ["Magicienne des Ténèbres"])
+        self.assertEqual(self.names("Magicien"), ["Magicien Sombre", "Magicien Sombrf", "Magicien-Sombre du Chaos",
+                                                  "Magicienne des Ténèbres", "Magiciens"])
+
+    def test_empty_term_matches_nothing(self):
+        self.assertEqual(self.names(" -- "), [])
+
+class LoaderTests(TestCase):
+    """Chaque chemin de chargement doit produire exactement les lignes de orm_load."""
+
+    databases = {"default", "catalog"}
+
+    def setUp(self):
+        self.cards = list(synthetic.generate_cards(60, seed=1))
+        # Mêmes ids, autre contenu : le second passage doit tout mettre à jour.
+        self.changed = list(synthetic.generate_cards(60, seed=2))
+
+    def reference(self):
+        """Lignes et empreintes obtenues par orm_load (deux passages), puis tables vidées."""
+        stats = LoadStats()
+        orm_load(CardEN, CardSetEN, self.cards, using="catalog", stats=stats)
+        orm_load(CardEN, CardSetEN, self.changed, using="catalog", stats=stats)
+        rows = catalog_rows()
+        CardSetEN.objects.all().delete()
+        CardEN.objects.all().delete()
+        return rows, stats.set_digests
+
+    def test_orm_load_counts(self):
+        stats = LoadStats()
+        self.assertEqual(orm_load(CardEN, CardSetEN, self.cards, using="catalog", stats=stats), 60)
+        printings = sum(len(c.get("card_sets", [])) for c in self.cards)
+        self.assertEqual(CardEN.objects.count(), 60)
+        self.assertEqual(CardSetEN.objects.count(), printings)
+        self.assertEqual(stats.rows_inserted, 60 + printings)
+        self.assertEqual(stats.rows_updated, 0)
+
+        stats = LoadStats()
+        orm_load(CardEN, CardSetEN, self.cards, using="catalog", stats=stats)
+        self.assertEqual(stats.rows_inserted, 0)
+        self.assertEqual(stats.rows_updated, 60 + printings)
+
+    def test_load_cards_matches_orm_load(self):
+        # Sous PostgreSQL, load_cards passe par copy_load.
+        expected, digests = self.reference()
+        stats = LoadStats()
+        load_cards("catalog", CardEN, CardSetEN, self.cards + self.changed, stats=stats)
+        self.assertEqual(catalog_rows(), expected)
+        self.assertEqual(stats.set_digests, digests)
+
+    def test_bulk_stage_matches_orm_load(self):
+        expected, _digests = self.reference()
+        layout = RowLayout(CardEN, CardSetEN)
+        stage = BulkStage("catalog", CardEN, CardSetEN, layout)
+        for batch in (self.cards, self.changed):
+            stage.copy(*layout.rows(batch, json_text=False))
+        stats = LoadStats()
+        stage.merge(stats)
+        self.assertEqual(catalog_rows(), expected)
+        self.assertEqual(stats.rows_inserted, len(expected[0]) + len(expected[1]))
+
+    @skipUnless(POSTGRES, "chemin COPY : PostgreSQL seulement (YUGICLOUD_DB_ENGINE=postgresql)")
+    def test_copy_load_matches_orm_load(self):
+        expected, digests = self.reference()
+        stats = LoadStats()
+        # Doublons dans un même COPY : la dernière occurrence gagne, comme update_or_create.
+        self.assertEqual(copy_load("catalog", CardEN, CardSetEN, self.cards + self.changed, stats=stats), 120)
+        self.assertEqual(catalog_rows(), expected)
+        self.assertEqual(stats.set_digests, digests)
+        self.assertEqual(stats.rows_inserted, len(expected[0]) + len(expected[1]))
+
+
+class StagedCatalogTests(TestCase):
+    databases = {"default", "catalog"}
+
+    @skipUnless(POSTGRES, "écriture directe (hors blue/green SQLite) : PostgreSQL seulement")
+    def test_failed_verification_rolls_back(self):
+        cards = list(synthetic.generate_cards(10, seed=1))
+
+        def verify(alias):
+            raise catalog.CatalogVerificationError("refusé")
+
+        with self.assertRaises(catalog.CatalogVerificationError):
+            with catalog.staged_catalog(verify=verify) as alias:
+                load_cards(alias, CardEN, CardSetEN, cards)
+                self.assertEqual(CardEN.objects.using(alias).count(), 10)
+        self.assertEqual(CardEN.objects.count(), 0)
+        self.assertEqual(CardSetEN.objects.count(), 0)
+
+def snapshot_rows():
+    """Contenu des quatre tables de l'instantané (hors pk des sets)."""
+    rows = {}
+    for model in snapshot.TABLES:
+        # pk des sets : auto-incrément, renuméroté à l'import
+        skip_pk = model in (CardSet, CardSetEN)
+        fields = [f.attname for f in model._meta.concrete_fields if not (skip_pk and f.primary_key)]
+        rows[model._meta.label] = sorted(model.objects.values_list(*fields))
+    return rows
+
+
+class SnapshotTests(TestCase):
+    """export_snapshot / import_snapshot : aller-retour exact, fichiers abîmés refusés."""
+
+    databases = {"default", "catalog"}
+    versions = {"fr": [{"database_version": "1.0"}], "en": [{"database_version": "1.0"}]}
+
+    def setUp(self):
+        orm_load(Card, CardSet, synthetic.generate_cards(40, seed=1, language="fr"), using="catalog")
+        orm_load(CardEN, CardSetEN, synthetic.generate_cards(40, seed=1), using="catalog")
+        self.expected = snapshot_rows()
+        buf = io.BytesIO()
+        snapshot.export_snapshot(buf, self.versions)
+        self.data = buf.getvalue()
+
+    def import_bytes(self, data):
+        return snapshot.import_snapshot(io.BytesIO(data), using="catalog", stats=LoadStats())
+
+    def test_round_trip(self):
+        for model in reversed(snapshot.TABLES):
+            model.objects.all().delete()
+        header = self.import_bytes(self.data)
+        self.assertEqual(header["versions"], self.versions)
+        self.assertEqual(snapshot_rows(), self.expected)
+        # Même base ⇒ même fichier, octet pour octet.
+        buf = io.BytesIO()
+        snapshot.export_snapshot(buf, self.versions)
+        self.assertEqual(buf.getvalue(), self.data)
+
+    def test_corrupt_files_raise_snapshot_error(self):
+        header_end = len(snapshot.MAGIC) + 4 + struct.unpack("<I", self.data[8:12])[0]
+        flipped = bytearray(self.data)
+        flipped[header_end + 20] ^= 0xFF
+        cases = {
+            "pas un instantané": b"not a snapshot",
+            "taille d'en-tête tronquée": snapshot.MAGIC + b"\x01",
+            "en-tête tronqué": self.data[:header_end - 10],
+            "en-tête non JSON": snapshot.MAGIC + struct.pack("<I", 3) + b"{x}",
+            "blobs tronqués": self.data[:len(self.data) // 2],
+            "blob abîmé": bytes(flipped),
+        }
+        for label, data in cases.items():
+            with self.subTest(label):
+                with self.assertRaises(snapshot.SnapshotError):
+                    self.import_bytes(data)
+        # Rien n'a été touché.
+        self.assertEqual(snapshot_rows(), self.expected)
+
+    def test_import_catalog_reports_corrupt_file(self):
+        tmp = Path(tempfile.mkdtemp(prefix="yc-tests-"))
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        path = tmp / "catalog.ygcs"
+        path.write_bytes(self.data[:len(self.data) // 2])
+        with override_settings(SYNC_LOCK_PATH=tmp / "sync.lock"), catalog._route_to(catalog.CATALOG_DB):
+            with self.assertRaisesMessage(CommandError, "Instantané corrompu"):
+                call_command("import_catalog", str(path), stdout=io.StringIO())
+
+class SetSummaryRefreshTests(TestCase):
+    """refresh() incrémental : seules les extensions dont l'empreinte change sont recalculées."""
+
+    databases = {"default", "catalog"}
+
+    def setUp(self):
+        self.cards = list(synthetic.generate_cards(80, seed=1))
+
+    def load(self, cards):
+        """Chargement + refresh incrémental, comme une synchro ; renvoie le nombre recalculé."""
+        stats = LoadStats()
+        orm_load(CardEN, CardSetEN, cards, using="catalog", stats=stats)
+        return setsummary.refresh("catalog", "en", stats.set_digests)
+
+    def summaries(self):
+        return {s.set_name: s for s in SetSummary.objects.filter(lang="en")}
+
+    def assert_matches_full_rebuild(self):
+        expected = {name: (s.printings, s.card_count, s.price_total, s.digest) for name, s in self.summaries().items()}
+        SetSummary.objects.all().delete()
+        setsummary.refresh("catalog", "en")
+        rebuilt = {name: (s.printings, s.card_count, s.price_total, s.digest) for name, s in self.summaries().items()}
+        self.assertEqual(expected, rebuilt)
+
+    def first_printing(self, cards):
+        return next(s for c in cards for s in c.get("card_sets") or [])
+
+    def printings_of(self, cards, set_name):
+        return [s for c in cards for s in c.get("card_sets") or [] if s["set_name"] == set_name]
+
+    def test_unchanged_sets_are_skipped(self):
+        created = self.load(self.cards)
+        self.assertEqual(created, len(self.summaries()))
+        self.assertEqual(self.load(self.cards), 0)
+
+    def test_changed_set_is_recomputed(self):
+        self.load(self.cards)
+        cards = copy.deepcopy(self.cards)
+        printing = self.first_printing(cards)
+        name = printing["set_name"]
+        printing["set_price"] = "999.99"
+        self.assertEqual(self.load(cards), 1)
+        self.assertEqual(self.summaries()[name].price_max, Decimal("999.99"))
+        self.assert_matches_full_rebuild()
+
+    def test_renamed_set_is_removed(self):
+        self.load(self.cards)
+        cards = copy.deepcopy(self.cards)
+        old = self.first_printing(cards)["set_name"]
+        for printing in self.printings_of(cards, old):
+            printing["set_name"] = "Extension renommée"
+        self.load(cards)
+        summaries = self.summaries()
+        self.assertNotIn(old, summaries)
+        self.assertEqual(summaries["Extension renommée"].printings, len(self.printings_of(self.cards, old)))
+        self.assert_matches_full_rebuild()
+
+    def test_partly_renamed_set_is_recomputed(self):
+        self.load(self.cards)
+        cards = copy.deepcopy(self.cards)
+        old = self.first_printing(cards)["set_name"]
+        moved = self.printings_of(cards, old)
+        self.assertGreater(len(moved), 1)
+        moved[0]["set_name"] = "Extension renommée"
+        self.load(cards)
+        self.assertEqual(self.summaries()[old].printings, len(moved) - 1)
+        self.assert_matches_full_rebuild()
+
+class FakeUpstreamTestCase(TestCase):
+    """
+    Base des tests contre FakeYGOPRODeck : serveur local, limiteur et
+    disjoncteur dans un dossier temporaire (aussi dossier courant, pour les
+    marqueurs .last_db_ver*.json), catalogue écrit directement dans la base
+    de test (pas de copie blue/green).
+    """
+
+    databases = {"default", "catalog"}
+    cards = 300
+    faults = None
+    upstream_settings = {}
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="yc-tests-"))
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        cwd = os.getcwd()
+        os.chdir(self.tmp)
+        self.addCleanup(os.chdir, cwd)
+
+        self.fake = FakeYGOPRODeck(cards=self.cards, seed=1, faults=self.faults).start()
+        self.addCleanup(self.fake.stop)
+        overrides = override_settings(**{
+            "YGOPRODECK_API_BASE": self.fake.api_base,
+            "YGOPRODECK_RATE_PER_SEC": 100,
+            "YGOPRODECK_BURST": 20,
+            "YGOPRODECK_BUCKET_PATH": self.tmp / "bucket.json",
+            "UPSTREAM_BREAKER_PATH": self.tmp / "breaker.json",
+            "SYNC_LOCK_PATH": self.tmp / "sync.lock",
+            **self.upstream_settings,
+        })
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        # Limiteur et disjoncteur sont créés à la demande depuis les settings.
+        ygoprodeck._bucket = ygoprodeck._breaker = None
+        self.addCleanup(setattr, ygoprodeck, "_bucket", None)
+        self.addCleanup(setattr, ygoprodeck, "_breaker", None)
+
+        # Synchro imbriquée : staged_catalog() écrit dans "catalog" tel quel.
+        routing = catalog._route_to(catalog.CATALOG_DB)
+        routing.__enter__()
+        self.addCleanup(routing.__exit__, None, None, None)
+
+
+class SyncAgainstFakeTests(FakeUpstreamTestCase):
+    """sync_DB_pub_en contre le serveur local, avec et sans pannes."""
+
+    def sync(self, *args):
+        out = io.StringIO()
+        call_command("sync_DB_pub_en", "--force", "--page-size", "100", *args, stdout=out)
+        return out.getvalue()
+
+    def page_retries(self, output):
+        return int(re.search(r"(\d+) page\(s\) retentée\(s\)", output).group(1))
+
+    def assert_full_catalog(self):
+        printings = sum(len(c.get("card_sets") or []) for c in self.fake.catalog(None))
+        self.assertEqual(CardEN.objects.count(), self.cards)
+        self.assertEqual(CardSetEN.objects.count(), printings)
+
+    def test_clean_sync_loads_every_row(self):
+        output = self.sync("--transform-workers", "0")
+        self.assert_full_catalog()
+        self.assertEqual(self.page_retries(output), 0)
+        # checkDBVer + 3 pages, sans aucune nouvelle tentative
+        self.assertEqual(self.fake.stats()["requests"], 4)
+        run = SyncRun.objects.get(command="sync_DB_pub_en")
+        self.assertEqual(run.outcome, SyncRun.OUTCOME_SUCCESS)
+        self.assertEqual(run.cards, self.cards)
+        self.assertTrue((self.tmp / ".last_db_ver_en.json").exists())
+
+    def test_pipeline_sync_loads_every_row(self):
+        self.sync("--transform-workers", "1")
+        self.assert_full_catalog()
+
+    def test_failed_pages_are_retried(self):
+        # Graine choisie pour que les 3 essais de safe_get échouent sur une page :
+        # la page entière est alors retentée.
+        self.fake.faults = Faults(error_rate=0.6, seed=8)
+        output = self.sync("--transform-workers", "0", "--fetch-workers", "1")
+        self.assert_full_catalog()
+        self.assertEqual(self.page_retries(output), 1)
+        self.assertEqual(self.fake.stats()["errors"], 4)
+
+    def test_truncated_pages_are_retried(self):
+        self.fake.faults = Faults(truncate_rate=0.3, seed=2)
+        self.sync("--transform-workers", "0", "--fetch-workers", "1")
+        self.assert_full_catalog()
+        self.assertGreater(self.fake.stats()["truncated"], 0)
+
+    def test_retry_after_is_honoured(self):
+        self.fake.faults = Faults(rate_limit_rate=0.3, retry_after=1, seed=0)
+        self.sync("--transform-workers", "0", "--fetch-workers", "1")
+        self.assert_full_catalog()
+        throttled = self.fake.stats()["rate_limited"]
+        self.assertGreater(throttled, 0)
+        # Chaque 429 a bloqué le limiteur partagé pendant Retry-After.
+        self.assertEqual(ygoprodeck.limiter().stats()["throttled_429"], throttled)
+
+    def test_sync_fails_when_upstream_stays_down(self):
+        self.fake.faults = Faults(error_rate=1.0)
+        with self.assertRaises(CommandError):
+            self.sync("--transform-workers", "0")
+        self.assertEqual(CardEN.objects.count(), 0)
+        self.assertEqual(SyncRun.objects.get(command="sync_DB_pub_en").outcome, SyncRun.OUTCOME_FAILED)
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class CardSearchFRAgainstFakeTests(FakeUpstreamTestCase):
+    """Relais /api/cards-fr : réponse normale, 429 et disjoncteur ouvert."""
+
+    upstream_settings = {"UPSTREAM_BREAKER_FAILURES": 2, "UPSTREAM_BREAKER_OPEN_SECONDS": 60.0}
+
+    def setUp(self):
+        super().setUp()
+        from YugiCall.views import upstream_cache
+        upstream_cache.clear()
+        self.addCleanup(upstream_cache.clear)
+        self.name = self.fake.catalog("fr")[0]["name"]
+
+    def search(self, q=None):
+        return self.client.get("/api/cards-fr", {"q": q or self.name, "field": "name_exact"})
+
+    def test_proxied_search(self):
+        response = self.search()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c["name"] for c in response.json()["data"]], [self.name])
+        self.assertEqual(ygoprodeck.breaker().stats()["state"], ygoprodeck.CLOSED)
+
+    def test_rate_limited_without_fallback_is_503(self):
+        # 429 + Retry-After plus long que l'attente permise aux recherches interactives.
+        self.fake.faults = Faults(rate_limit_rate=1.0, retry_after=30)
+        response = self.search()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["degraded"]["reason"], "rate_limited")
+        self.assertGreaterEqual(int(response["Retry-After"]), 25)
+        self.assertEqual(self.fake.stats()["rate_limited"], 1)
+
+    def test_open_circuit_is_503_without_calling_upstream(self):
+        self.fake.faults = Faults(error_rate=1.0, error_statuses=(503,))
+        for _ in range(2):
+            self.assertEqual(self.search().status_code, 502)
+        calls = self.fake.stats()["requests"]
+        response = self.search()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["degraded"]["reason"], "circuit_open")
+        self.assertEqual(response["X-Upstream-Breaker"], ygoprodeck.OPEN)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(self.fake.stats()["requests"], calls)
+
+    def test_stale_answer_while_circuit_open(self):
+        self.assertEqual(self.search().status_code, 200)
+        self.fake.faults = Faults(error_rate=1.0)
+        for _ in range(2):
+            self.search("introuvable")
+        response = self.search()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["degraded"]["source"], "stale")
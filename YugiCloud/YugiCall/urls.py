@@ -1,11 +1,49 @@
 # On importe la fonction path qui sert à définir les routes de l'application Django.
 from django.urls import path
 # On importe la vue que l’on vient de créer.
-from .views import CardSearchFRView
+from .views import (
+    CardBatchView,
+    CardDetailView,
+    CardSearchExportView,
+    CardSearchFRView,
+    DeckAnalyzeView,
+    SetDetailView,
+    SetListView,
+    SetPrintingsView,
+    card_cache_stats,
+    card_image,
+    search_cache_stats,
+    search_engine_stats,
+    sync_status,
+    upstream_breaker,
+    upstream_stats,
+)
 
 # On définit la liste des routes (URL patterns).
 urlpatterns = [
     # Quand quelqu’un appelle /api/cards-fr, Django déclenche CardSearchFRView.
     path("api/cards-fr", CardSearchFRView.as_view(), name="card-search-fr"),
+    # Images miroitées localement (URL adressée par contenu → cache immuable).
+    path("images/cards/<str:size>/<str:sha256>.jpg", card_image, name="card-image"),
+    # État de la synchro (démon + verrou) pour les health checks.
+    path("api/sync-status", sync_status, name="sync-status"),
+    # Limiteur de débit YGOPRODeck partagé entre processus (compteurs).
+    path("api/upstream-stats", upstream_stats, name="upstream-stats"),
+    # Disjoncteur de /api/cards-fr (état, transitions, cache de secours).
+    path("api/upstream-breaker", upstream_breaker, name="upstream-breaker"),
+    # Cartes du catalogue local par id (lot ou détail), servies via un cache LRU.
+    path("api/cards", CardBatchView.as_view(), name="card-batch"),
+    path("api/cards/<int:card_id>", CardDetailView.as_view(), name="card-detail"),
+    path("api/cards/cache-stats", card_cache_stats, name="card-cache-stats"),
+    # Recherche / export du catalogue local en flux NDJSON (ou JSON par morceaux).
+    path("api/search", CardSearchExportView.as_view(), name="card-search-export"),
+    path("api/search/engine-stats", search_engine_stats, name="search-engine-stats"),
+    path("api/search/cache-stats", search_cache_stats, name="search-cache-stats"),
+    # Extensions : résumés précalculés (nombre de cartes, raretés, prix, langues).
+    path("api/sets", SetListView.as_view(), name="set-list"),
+    path("api/sets/printings", SetPrintingsView.as_view(), name="set-printings"),
+    path("api/sets/<int:set_id>", SetDetailView.as_view(), name="set-detail"),
+    # Analyse d'un deck .ydk (cartes résolues, prix, répartitions).
+    path("api/deck", DeckAnalyzeView.as_view(), name="deck-analyze"),
     #path("api/cards-en", CardSearchENView.as_view(), name="card-search-en"),
 ]
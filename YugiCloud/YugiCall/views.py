@@ -3,11 +3,29 @@ from django.shortcuts import render
 # Create your views here.
 
 # views.py
+import json
+import re
+import threading
+import time
 import requests
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
 from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 
-API_URL = "https://db.ygoprodeck.com/api/v7/cardinfo.php"
+from . import columnar, images, setsummary, ygoprodeck
+from .cache import LRUCache
+from .catalog import LANGUAGES, lang_models
+from .deck import DeckError, analyze_deck, parse_ydk
+from .lookup import CARD_FIELDS, SET_FIELDS, card_cache, resolve_cards, serialize_set
+from .models import SetSummary
+from .search import API_FIELDS_CONFIG, cached_ids, config_index, matching_choices, normalize_key, result_cache, search_ids
+from .synclock import is_locked, read_status
+
+# Attente max d'un jeton du limiteur partagé pour une recherche utilisateur :
+# au-delà, on répond 503 tout de suite plutôt que de bloquer le worker.
+INTERACTIVE_MAX_WAIT = 2.0
 
 class CardSearchFRView(View):
     def get(self, request):
@@ -33,9 +51,9 @@ class CardSearchFRView(View):
         elif field == "set":
             params["cardset"] = q
 
-        # Archétype -> 'archetype'
+        # Archétype -> servi par le catalogue local (colonne indexée), sans appel à l'API
         elif field == "archetype":
-            params["archetype"] = q
+            return _local_archetype_search(q)
 
         # Type (ex: "Monstre à Effet", "Magie", "Piège", "XYZ Monster"… selon localisations)
         elif field == "type":
@@ -52,16 +70,479 @@ class CardSearchFRView(View):
         else:
             return JsonResponse({"error": f"Filtre inconnu: {field}"}, status=400)
 
-        # --- Appel API ---
+        # --- Appel API (limiteur partagé + disjoncteur, secours si YGOPRODeck ne répond pas) ---
+        return _proxy_search(params, field, q)
+
+
+# --- Relais YGOPRODeck : disjoncteur et réponses de secours ---
+#
+# Disjoncteur ouvert (YugiCall/ygoprodeck.CircuitBreaker), limiteur saturé ou
+# YGOPRODeck en erreur : au lieu d'attendre le timeout puis répondre 502, la
+# vue répond tout de suite avec
+#   1. la dernière réponse obtenue pour les mêmes paramètres ("stale"),
+#   2. sinon le catalogue local (FR), mêmes filtres que la recherche locale,
+# en signalant la dégradation ("degraded" dans le JSON, en-tête X-Upstream-Breaker).
+# Quand vient l'heure de la sonde et qu'une réponse en cache existe, elle est
+# servie aussitôt et la sonde part en tâche de fond (stale-while-revalidate).
+
+# Dernière réponse 200 par jeu de paramètres, bornée en octets (par worker).
+upstream_cache = LRUCache(maxsize=4096, maxweight=getattr(settings, "UPSTREAM_STALE_CACHE_BYTES", 32 * 1024 * 1024),
+                          weigh=lambda entry: entry["bytes"])
+
+# Filtre de la vue → champ de la recherche locale (API_FIELDS_CONFIG)
+LOCAL_FIELDS = {
+    "name_contains": "name",
+    "set": "card_sets__set_name",
+    "type": "type",
+    "attribute": "attribute",
+    "race": "race",
+}
+LOCAL_FALLBACK_LIMIT = 1000
+
+
+def _proxy_search(params, field, q):
+    key = tuple(sorted(params.items()))
+    try:
+        probe = ygoprodeck.breaker().allow()
+    except ygoprodeck.CircuitOpen as e:
+        return _degraded(key, field, q, "circuit_open", retry_after=e.retry_after, details=str(e))
+    if probe and upstream_cache.get(key) is not None:
+        threading.Thread(target=_revalidate, args=(params, key), name="ygopro-probe", daemon=True).start()
+        return _degraded(key, field, q, "revalidating")
+    try:
+        r, payload = _call_upstream(params, key, probe)
+        r.raise_for_status()
+    except ygoprodeck.RateLimited as e:
+        return _degraded(key, field, q, "rate_limited", retry_after=e.retry_after, details=str(e))
+    except ygoprodeck.UpstreamError as e:
+        return _degraded(key, field, q, "upstream_error", details=str(e))
+    except requests.HTTPError as e:
+        return JsonResponse({"error": "Erreur HTTP YGOPRODeck", "details": str(e), "api_body": r.text},
+                            status=r.status_code)
+    except requests.RequestException as e:
+        return _degraded(key, field, q, "network_error", details=str(e))
+    return JsonResponse(payload, status=200)
+
+
+def _call_upstream(params, key, probe):
+    """
+    Appel réel, résultat signalé au disjoncteur (erreur, ou durée pour les
+    réponses lentes). Une réponse 200 est gardée pour servir de secours.
+    Renvoie (réponse, JSON décodé ou None).
+    """
+    breaker = ygoprodeck.breaker()
+    started = time.perf_counter()
+    try:
+        r = ygoprodeck.safe_get(ygoprodeck.cardinfo_url(), params=params, priority=ygoprodeck.INTERACTIVE,
+                                timeout=10, attempts=2, max_wait=INTERACTIVE_MAX_WAIT)
+        payload = r.json() if r.status_code == 200 else None
+    except ygoprodeck.RateLimited:
+        # Aucun appel n'est parti : rien à apprendre sur la santé de YGOPRODeck.
+        raise
+    except (ygoprodeck.UpstreamError, requests.RequestException) as e:
+        breaker.record(False, time.perf_counter() - started, probe=probe, reason=str(e)[:200])
+        raise
+    # 400 "aucune carte" compris : YGOPRODeck a répondu, il est en vie.
+    breaker.record(True, time.perf_counter() - started, probe=probe)
+    if payload is not None:
+        upstream_cache.set(key, {"payload": payload, "bytes": len(r.content), "at": time.time()})
+    return r, payload
+
+
+def _revalidate(params, key):
+    """Sonde en tâche de fond : rafraîchit l'entrée du cache, ferme ou rouvre le disjoncteur."""
+    try:
+        _call_upstream(params, key, probe=True)
+    except (ygoprodeck.UpstreamError, requests.RequestException):
+        pass  # déjà compté par le disjoncteur
+
+
+def _local_search(field, q):
+    """Cartes du catalogue local pour un filtre de la vue (au plus LOCAL_FALLBACK_LIMIT) ; (cartes, tronqué ?)."""
+    card_model, _set_model = lang_models("fr")
+    if field == "name_exact":
+        needle = normalize_key(q)
+        ids = cached_ids("fr", ("name_exact", needle),
+                         lambda: card_model.objects.filter(name_key=needle).order_by("name", "id"))
+    else:
+        ids = search_ids(card_model.objects.order_by("name", "id"), API_FIELDS_CONFIG, LOCAL_FIELDS[field], q, "fr")
+    cards, _missing = resolve_cards(ids[:LOCAL_FALLBACK_LIMIT], "fr")
+    return cards, len(ids) > LOCAL_FALLBACK_LIMIT
+
+
+def _degraded(key, field, q, reason, retry_after=None, details=""):
+    """Réponse de secours (cache périmé puis catalogue local), erreur 502/503 s'il n'y a rien."""
+    info = {"reason": reason, "breaker": ygoprodeck.breaker().stats()["state"]}
+    entry = upstream_cache.get(key)
+    if entry is not None:
+        info.update(source="stale", age=round(time.time() - entry["at"], 1))
+        response = JsonResponse(dict(entry["payload"], degraded=info), status=200)
+        response["Warning"] = '110 - "Response is Stale"'
+    else:
+        cards, truncated = _local_search(field, q)
+        if cards:
+            info.update(source="local", truncated=truncated)
+            response = JsonResponse({"data": cards, "degraded": info}, status=200)
+        elif reason == "rate_limited":
+            response = JsonResponse({"error": "Trop de requêtes vers YGOPRODeck, réessayez", "details": details,
+                                     "degraded": info}, status=503)
+        else:
+            response = JsonResponse({"error": "YGOPRODeck indisponible", "details": details, "degraded": info},
+                                    status=503 if reason == "circuit_open" else 502)
+        if retry_after and response.status_code == 503:
+            response["Retry-After"] = str(max(1, int(retry_after + 0.999)))
+    response["X-Upstream-Breaker"] = info["breaker"]
+    return response
+
+
+def _local_archetype_search(q):
+    """
+    Équivalent local de cardinfo.php?archetype=…&language=fr : nom d'archétype
+    exact (sans tenir compte de la casse), cartes triées par nom, même format
+    {"data": [...]}.
+    """
+    card_model, _set_model = lang_models("fr")
+
+    def build():
+        archetypes = matching_choices(card_model, "archetype", q, lang="fr", exact=True)
+        return card_model.objects.filter(archetype__in=archetypes).order_by("name", "id")
+
+    ids = cached_ids("fr", ("archetype", normalize_key(q)), build)
+    if not ids:
+        return JsonResponse({"error": f"Aucune carte pour l'archétype « {q} »"}, status=404)
+    cards, _missing = resolve_cards(ids, "fr")
+    return JsonResponse({"data": cards}, status=200)
+
+
+# Images servies depuis le miroir local (voir la commande sync_images).
+# L'URL contient le hash du contenu : elle ne change jamais de contenu,
+# donc on peut la mettre en cache "pour toujours" côté navigateur/CDN.
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def card_image(request, size, sha256):
+    """
+    Sert une image miroitée : size = "full" (original) ou une clé de THUMB_SIZES.
+    """
+    if not _SHA256_RE.match(sha256):
+        raise Http404("Image inconnue")
+    root = images.images_root()
+    if size == "full":
+        path = images.object_path(root, sha256)
+    elif size in images.THUMB_SIZES:
+        path = images.thumb_path(root, size, sha256)
+    else:
+        raise Http404("Taille inconnue")
+    if not path.exists():
+        raise Http404("Image absente du miroir")
+
+    response = FileResponse(open(path, "rb"), content_type="image/jpeg")
+    response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    response["ETag"] = f'"{sha256}-{size}"'
+    return response
+
+
+def upstream_stats(request):
+    """Compteurs du limiteur YGOPRODeck partagé (jetons, attentes, refus, 429)."""
+    return JsonResponse(ygoprodeck.limiter().stats(), status=200)
+
+
+def upstream_breaker(request):
+    """Disjoncteur des recherches relayées : état, compteurs, dernières transitions, cache de secours."""
+    stats = ygoprodeck.breaker().stats()
+    stats["stale_cache"] = upstream_cache.stats()
+    return JsonResponse(stats, status=200)
+
+
+def sync_status(request):
+    """
+    Health check de la synchronisation : dernier état écrit par sync_daemon
+    + présence d'une synchro en cours (verrou tenu).
+    """
+    status = read_status()
+    status["sync_in_progress"] = is_locked()
+    return JsonResponse(status, status=200)
+
+
+# --- Lecture par id depuis le catalogue local (pas d'appel à YGOPRODeck) ---
+
+MAX_BATCH_IDS = 500
+
+
+def _parse_lang(request):
+    lang = (request.GET.get("lang") or "fr").strip().lower()
+    return lang if lang in LANGUAGES else None
+
+
+class CardBatchView(View):
+    """
+    GET /api/cards?ids=46986414,89631139,…&lang=fr|en
+    Résout toutes les cartes en une requête (ou zéro si tout est en cache).
+    """
+
+    def get(self, request):
+        lang = _parse_lang(request)
+        if lang is None:
+            return JsonResponse({"error": "Paramètre 'lang' invalide (fr|en)"}, status=400)
+
+        raw = ",".join(request.GET.getlist("ids"))
         try:
-            r = requests.get(API_URL, params=params, timeout=10)
-            r.raise_for_status()
-        except requests.HTTPError as e:
-            return JsonResponse(
-                {"error": "Erreur HTTP YGOPRODeck", "details": str(e), "api_body": getattr(r, "text", None)},
-                status=r.status_code if "r" in locals() else 502,
-            )
-        except requests.RequestException as e:
-            return JsonResponse({"error": "Erreur réseau", "details": str(e)}, status=502)
-
-        return JsonResponse(r.json(), status=200)
+            ids = [int(x) for x in raw.split(",") if x.strip()]
+        except ValueError:
+            return JsonResponse({"error": "Paramètre 'ids' invalide (entiers séparés par des virgules)"}, status=400)
+        if not ids:
+            return JsonResponse({"error": "Paramètre 'ids' manquant"}, status=400)
+        if len(ids) > MAX_BATCH_IDS:
+            return JsonResponse({"error": f"Au plus {MAX_BATCH_IDS} ids par requête"}, status=400)
+
+        cards, missing = resolve_cards(ids, lang)
+        return JsonResponse({"data": cards, "missing": missing}, status=200)
+
+
+class CardDetailView(View):
+    """GET /api/cards/<id>?lang=fr|en"""
+
+    def get(self, request, card_id):
+        lang = _parse_lang(request)
+        if lang is None:
+            return JsonResponse({"error": "Paramètre 'lang' invalide (fr|en)"}, status=400)
+        cards, _missing = resolve_cards([card_id], lang)
+        if not cards:
+            return JsonResponse({"error": f"Carte {card_id} introuvable"}, status=404)
+        return JsonResponse(cards[0], status=200)
+
+
+# --- Extensions (résumés précalculés, voir YugiCall/setsummary.py) ---
+
+MAX_SETS = 1000
+
+
+def _price(value):
+    return None if value is None else str(value)
+
+
+def serialize_summary(summary: SetSummary):
+    return {
+        "id": summary.pk,
+        "lang": summary.lang,
+        "set_name": summary.set_name,
+        "code": summary.code,
+        "card_count": summary.card_count,
+        "printings": summary.printings,
+        "rarities": summary.rarities,
+        "priced": summary.priced,
+        "price_total": _price(summary.price_total),
+        "price_min": _price(summary.price_min),
+        "price_max": _price(summary.price_max),
+        "languages": summary.languages,
+        "updated_at": summary.updated_at.isoformat(),
+    }
+
+
+def serialize_printing(printing):
+    return {**serialize_set({f: getattr(printing, f) for f in SET_FIELDS}),
+            "card_id": printing.card_id, "card_name": printing.card.name}
+
+
+class SetListView(View):
+    """
+    GET /api/sets?lang=fr|en&q=<code ou nom>&limit=100&offset=0
+    q : début de code produit ("LOB", "blrr-"…) ou morceau de nom d'extension.
+    """
+
+    def get(self, request):
+        lang = _parse_lang(request)
+        if lang is None:
+            return JsonResponse({"error": "Paramètre 'lang' invalide (fr|en)"}, status=400)
+        try:
+            limit = min(int(request.GET.get("limit") or 100), MAX_SETS)
+            offset = max(int(request.GET.get("offset") or 0), 0)
+        except ValueError:
+            return JsonResponse({"error": "Paramètres 'limit'/'offset' invalides"}, status=400)
+        summaries = setsummary.find_sets(lang, (request.GET.get("q") or "").strip())
+        page = [serialize_summary(s) for s in summaries[offset:offset + limit]]
+        return JsonResponse({"data": page, "total": summaries.count()}, status=200)
+
+
+class SetDetailView(View):
+    """
+    GET /api/sets/<id>?limit=500&offset=0 : résumé + une page des impressions
+    de l'extension (le total est dans "printings").
+    """
+
+    def get(self, request, set_id):
+        summary = SetSummary.objects.filter(pk=set_id).first()
+        if summary is None:
+            return JsonResponse({"error": f"Extension {set_id} introuvable"}, status=404)
+        try:
+            limit = min(int(request.GET.get("limit") or MAX_BATCH_IDS), MAX_BATCH_IDS)
+            offset = max(int(request.GET.get("offset") or 0), 0)
+        except ValueError:
+            return JsonResponse({"error": "Paramètres 'limit'/'offset' invalides"}, status=400)
+        data = serialize_summary(summary)
+        printings = setsummary.set_printings(summary)[offset:offset + limit]
+        data["card_sets"] = [serialize_printing(p) for p in printings]
+        return JsonResponse(data, status=200)
+
+
+class SetPrintingsView(View):
+    """
+    GET /api/sets/printings?lang=fr|en&code=BLRR-EN08
+    Impressions dont le code commence par `code` (intervalle sur l'index de set_code).
+    """
+
+    def get(self, request):
+        lang = _parse_lang(request)
+        if lang is None:
+            return JsonResponse({"error": "Paramètre 'lang' invalide (fr|en)"}, status=400)
+        code = (request.GET.get("code") or "").strip()
+        if not code:
+            return JsonResponse({"error": "Paramètre 'code' manquant"}, status=400)
+        printings, truncated = setsummary.find_printings(lang, code, limit=MAX_BATCH_IDS)
+        return JsonResponse({"data": [serialize_printing(p) for p in printings], "truncated": truncated}, status=200)
+
+
+def card_cache_stats(request):
+    """Statistiques du cache de cartes de ce worker."""
+    return JsonResponse(card_cache.stats(), status=200)
+
+
+def search_cache_stats(request):
+    """Statistiques du cache de résultats de recherche (listes d'ids) de ce worker."""
+    return JsonResponse(result_cache.stats(), status=200)
+
+
+def search_engine_stats(request):
+    """État du moteur colonnaire de ce worker (activé, lignes, empreinte mémoire)."""
+    return JsonResponse(columnar.stats(), status=200)
+
+
+# --- Decks .ydk ---
+
+MAX_DECK_BYTES = 64 * 1024
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class DeckAnalyzeView(View):
+    """
+    POST /api/deck?lang=fr|en
+    Corps : le contenu du .ydk (text/plain) ou un envoi de formulaire avec
+    le fichier dans le champ "deck". Renvoie le deck résolu, l'édition la
+    moins chère de chaque carte, le prix total et les répartitions
+    type/attribut/niveau. Une requête SQL au plus, quel que soit le deck.
+    """
+
+    def post(self, request):
+        lang = _parse_lang(request)
+        if lang is None:
+            return JsonResponse({"error": "Paramètre 'lang' invalide (fr|en)"}, status=400)
+
+        upload = request.FILES.get("deck")
+        if upload is not None:
+            if upload.size > MAX_DECK_BYTES:
+                return JsonResponse({"error": "Fichier .ydk trop gros"}, status=413)
+            raw = upload.read()
+        elif request.content_type in ("multipart/form-data", "application/x-www-form-urlencoded"):
+            raw = (request.POST.get("deck") or "").encode("utf-8")
+        else:
+            raw = request.body
+        if len(raw) > MAX_DECK_BYTES:
+            return JsonResponse({"error": "Fichier .ydk trop gros"}, status=413)
+
+        try:
+            sections = parse_ydk(raw.decode("utf-8-sig", errors="replace"))
+        except DeckError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        return JsonResponse(analyze_deck(sections, lang), status=200)
+
+
+# --- Export / recherche JSON en flux (NDJSON) ---
+
+EXPORT_CHUNK = 500
+EXPORT_KEYS = {key: field for field, key in CARD_FIELDS}
+
+
+def _export_rows(card_model, ids, set_model, columns, keys, with_sets, chunk_size):
+    """
+    Générateur de cartes sérialisées : `ids` (ordonnés, voir search_ids) relus
+    par clé primaire par paquets, puis, si demandé, UNE requête de sets par paquet.
+    Mémoire constante : on ne garde jamais plus d'un paquet (+ la liste d'ids).
+    """
+    for start in range(0, len(ids), chunk_size):
+        chunk = list(ids[start:start + chunk_size])
+        rows = {row[0]: row for row in card_model.objects.filter(pk__in=chunk).values_list(*columns)}
+        batch = [dict(zip(keys, rows[pk])) for pk in chunk if pk in rows]
+        yield from _with_sets(batch, set_model, with_sets)
+
+
+def _with_sets(batch, set_model, with_sets):
+    if with_sets:
+        by_card = {card["id"]: card for card in batch}
+        for card in batch:
+            card["card_sets"] = []
+        rows = (set_model.objects.filter(card_id__in=list(by_card))
+                .order_by("card_id", "set_code").values("card_id", *SET_FIELDS))
+        for row in rows:
+            by_card[row["card_id"]]["card_sets"].append(serialize_set(row))
+    return batch
+
+
+class CardSearchExportView(View):
+    """
+    GET /api/search?lang=fr|en&field=<champ>&q=<valeur>&fields=id,name,card_sets&format=ndjson|json
+    - sans q : export de tout le catalogue,
+    - fields : colonnes renvoyées (défaut : toutes) ; "card_sets" inclut les éditions,
+    - format : ndjson (une carte par ligne, défaut) ou json (tableau envoyé par morceaux).
+    La réponse part dès le premier paquet, sans jamais construire la liste complète.
+    """
+
+    def get(self, request):
+        lang = _parse_lang(request)
+        if lang is None:
+            return JsonResponse({"error": "Paramètre 'lang' invalide (fr|en)"}, status=400)
+        q = (request.GET.get("q") or "").strip()
+        field = (request.GET.get("field") or "name").strip()
+        if q and field not in config_index(API_FIELDS_CONFIG):
+            return JsonResponse({"error": f"Filtre inconnu: {field}"}, status=400)
+
+        requested = [f.strip() for f in (request.GET.get("fields") or "").split(",") if f.strip()]
+        if not requested:
+            requested = list(EXPORT_KEYS) + ["card_sets"]
+        unknown = [f for f in requested if f not in EXPORT_KEYS and f != "card_sets"]
+        if unknown:
+            return JsonResponse({"error": f"Champs inconnus: {', '.join(unknown)}"}, status=400)
+        with_sets = "card_sets" in requested
+        # "id" toujours lu (clé de jointure des sets), renvoyé seulement si demandé.
+        keys = ["id"] + [f for f in requested if f in EXPORT_KEYS and f != "id"]
+        columns = [EXPORT_KEYS[k] for k in keys]
+        drop_id = "id" not in requested
+
+        fmt = (request.GET.get("format") or "ndjson").strip().lower()
+        if fmt not in ("ndjson", "json"):
+            return JsonResponse({"error": "Paramètre 'format' invalide (ndjson|json)"}, status=400)
+
+        card_model, set_model = lang_models(lang)
+        ids = search_ids(card_model.objects.order_by("id"), API_FIELDS_CONFIG, field, q, lang)
+        cards = _export_rows(card_model, ids, set_model, columns, keys, with_sets, EXPORT_CHUNK)
+
+        def dumps(card):
+            if drop_id:
+                card.pop("id")
+            return json.dumps(card, ensure_ascii=False)
+
+        if fmt == "ndjson":
+            body = (dumps(card) + "\n" for card in cards)
+            content_type = "application/x-ndjson; charset=utf-8"
+        else:
+            def body_gen():
+                yield "["
+                for i, card in enumerate(cards):
+                    yield ("," if i else "") + dumps(card)
+                yield "]"
+            body = body_gen()
+            content_type = "application/json; charset=utf-8"
+
+        response = StreamingHttpResponse(body, content_type=content_type)
+        response["X-Accel-Buffering"] = "no"  # nginx : ne pas retenir le flux
+        return response
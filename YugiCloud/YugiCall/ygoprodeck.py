@@ -0,0 +1,571 @@
+# YugiCall/ygoprodeck.py
+# -*- coding: utf-8 -*-
+"""
+Accès à l'API YGOPRODeck partagé par les commandes de synchro et les vues.
+
+Limiteur de débit (TokenBucket) commun à TOUS les processus de la machine
+(workers gunicorn, cron, démon) : l'API bannit une heure au-delà de
+20 req/s, un throttle par processus ne suffit pas.
+- seau de jetons dans un petit fichier JSON protégé par un verrou de fichier
+  (flock sous POSIX, msvcrt sous Windows), horloge murale partagée,
+- priorités : "interactive" (recherches des utilisateurs) peut vider le
+  seau ; "bulk" (synchros) laisse toujours `reserve` jetons aux recherches,
+- un 429 bloque tout le monde jusqu'à la fin du Retry-After,
+- compteurs (attentes, refus, 429…) stockés avec l'état : lisibles par
+  n'importe quel processus (vue /api/upstream-stats).
+
+safe_get() : GET à travers le limiteur, retries avec backoff exponentiel
+et gigue pour les 5xx / erreurs réseau.
+
+CircuitBreaker : disjoncteur des recherches interactives (vue /api/cards-fr),
+partagé de la même façon. Après quelques échecs ou réponses trop lentes
+d'affilée, les appels échouent tout de suite (la vue répond depuis son cache
+ou le catalogue local) ; une sonde périodique le referme.
+
+PagedFetch : téléchargement du catalogue par pages (paramètres num/offset de
+cardinfo.php) au lieu d'une seule réponse géante.
+- la première page donne le total (meta.total_rows), les suivantes partent
+  en parallèle sur quelques threads, sous le limiteur,
+- une page en échec (HTTP, réseau, JSON tronqué) est retentée seule :
+  un réseau capricieux coûte une page, pas tout le téléchargement,
+- les cartes sont rendues au fil de l'arrivée des pages : l'écriture en
+  base commence pendant que le reste se télécharge,
+- au plus `window` pages en vol ou en attente d'écriture : mémoire bornée
+  même si l'écriture est plus lente que le réseau.
+"""
+
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import requests
+from django.conf import settings
+from django.core.management.base import CommandError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+# --- Constantes d'API ---
+DEFAULT_API_BASE = "https://db.ygoprodeck.com/api/v7"   # base de l'API v7
+
+
+def api_base() -> str:
+    """
+    Base de l'API (settings.YGOPRODECK_API_BASE) : lue à chaque appel pour
+    pouvoir viser le serveur de remplacement local (YugiCall/fake_ygoprodeck.py).
+    """
+    return str(getattr(settings, "YGOPRODECK_API_BASE", DEFAULT_API_BASE)).rstrip("/")
+
+
+def check_db_ver_url() -> str:
+    return f"{api_base()}/checkDBVer.php"   # endpoint pour savoir si la DB a changé
+
+
+def cardinfo_url() -> str:
+    return f"{api_base()}/cardinfo.php"     # endpoint principal pour récupérer les cartes
+
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = (INTERACTIVE, BULK)
+
+# Codes HTTP retentés (429 géré à part via Retry-After)
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class UpstreamError(CommandError):
+    """YGOPRODeck injoignable ou en erreur après toutes les tentatives."""
+
+
+class CircuitOpen(UpstreamError):
+    """Disjoncteur ouvert : on n'appelle pas l'API (échec immédiat)."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimited(UpstreamError):
+    """Pas de jeton disponible dans le délai accordé (ou ban en cours)."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# --- État partagé entre processus ---
+
+@contextmanager
+def locked_json(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Petit état JSON partagé par tous les processus de la machine : lu puis
+    réécrit sous verrou de fichier exclusif (flock / msvcrt). Un fichier
+    absent ou illisible repart d'un dict vide.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        else:  # pragma: no cover - Windows
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            fh.seek(0)
+            raw = fh.read()
+            try:
+                state = json.loads(raw) if raw else {}
+            except ValueError:
+                state = {}
+            yield state
+            fh.seek(0)
+            fh.truncate()
+            fh.write(json.dumps(state).encode("utf-8"))
+            fh.flush()
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:  # pragma: no cover - Windows
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# --- Limiteur partagé ---
+
+def _counters() -> Dict[str, Any]:
+    return {p: {"requests": 0, "waits": 0, "wait_seconds": 0.0, "rejections": 0} for p in PRIORITIES}
+
+
+class TokenBucket:
+    """
+    Seau de `burst` jetons rechargé à `rate` jetons/s, partagé via `path`.
+    acquire() renvoie le temps attendu ; lève RateLimited si l'attente
+    dépasserait `max_wait`.
+    """
+
+    def __init__(self, path: Path, rate: float, burst: float, reserve: float = 0.0):
+        self.path = Path(path)
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.reserve = min(float(reserve), self.burst - 1.0)
+
+    @contextmanager
+    def _locked_state(self):
+        """État lu puis réécrit sous verrou exclusif (section critique de quelques µs)."""
+        with locked_json(self.path) as state:
+            now = time.time()
+            state.setdefault("tokens", self.burst)
+            state.setdefault("updated", now)
+            state.setdefault("blocked_until", 0.0)
+            state.setdefault("throttled_429", 0)
+            state.setdefault("counters", _counters())
+            # Recharge depuis la dernière écriture (quel que soit le processus)
+            elapsed = max(0.0, now - state["updated"])
+            state["tokens"] = min(self.burst, state["tokens"] + elapsed * self.rate)
+            state["updated"] = now
+            yield state, now
+
+    def acquire(self, priority: str = BULK, max_wait: Optional[float] = None) -> float:
+        floor = 1.0 if priority == INTERACTIVE else 1.0 + self.reserve
+        waited = 0.0
+        while True:
+            rejected = False
+            with self._locked_state() as (state, now):
+                counters = state["counters"].setdefault(priority, _counters()[priority])
+                if now < state["blocked_until"]:
+                    delay = state["blocked_until"] - now
+                elif state["tokens"] >= floor:
+                    state["tokens"] -= 1.0
+                    counters["requests"] += 1
+                    if waited:
+                        counters["waits"] += 1
+                        counters["wait_seconds"] = round(counters["wait_seconds"] + waited, 3)
+                    return waited
+                else:
+                    delay = (floor - state["tokens"]) / self.rate
+                if max_wait is not None and waited + delay > max_wait:
+                    # Compteur écrit avec l'état : on lève seulement après la sortie du verrou.
+                    counters["rejections"] += 1
+                    rejected = True
+            if rejected:
+                raise RateLimited(
+                    f"Limite de débit YGOPRODeck : attente estimée {waited + delay:.1f}s", retry_after=delay)
+            # On dort hors verrou ; petite gigue pour ne pas réveiller tout le monde ensemble.
+            delay = delay * random.uniform(1.0, 1.2)
+            time.sleep(delay)
+            waited += delay
+
+    def penalize(self, retry_after: float) -> None:
+        """429 reçu : plus personne n'appelle l'API avant `retry_after` secondes."""
+        with self._locked_state() as (state, now):
+            state["blocked_until"] = max(state["blocked_until"], now + retry_after)
+            state["tokens"] = 0.0
+            state["throttled_429"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._locked_state() as (state, now):
+            return {
+                "rate_per_sec": self.rate,
+                "burst": self.burst,
+                "interactive_reserve": self.reserve,
+                "tokens": round(state["tokens"], 3),
+                "blocked_for": round(max(0.0, state["blocked_until"] - now), 3),
+                "throttled_429": state["throttled_429"],
+                "counters": state["counters"],
+            }
+
+
+_bucket: Optional[TokenBucket] = None
+
+
+def limiter() -> TokenBucket:
+    global _bucket
+    if _bucket is None:
+        _bucket = TokenBucket(
+            path=getattr(settings, "YGOPRODECK_BUCKET_PATH", settings.BASE_DIR / ".ygoprodeck_bucket.json"),
+            rate=getattr(settings, "YGOPRODECK_RATE_PER_SEC", 5),
+            burst=getattr(settings, "YGOPRODECK_BURST", 5),
+            reserve=getattr(settings, "YGOPRODECK_INTERACTIVE_RESERVE", 2),
+        )
+    return _bucket
+
+
+# --- Disjoncteur (recherches interactives) ---
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _breaker_counters() -> Dict[str, int]:
+    return {"calls": 0, "failures": 0, "slow": 0, "rejected": 0, "probes": 0}
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur partagé via `path` (même principe que TokenBucket) :
+    - fermé : les appels passent ; `failures` échecs d'affilée (erreur ou
+      réponse plus lente que `slow_seconds`) l'ouvrent,
+    - ouvert : allow() lève CircuitOpen sans rien appeler pendant `open_seconds`,
+    - ensuite un seul appel "sonde" passe (semi-ouvert) : succès → fermé,
+      échec → rouvert pour deux fois plus longtemps (jusqu'à `max_open_seconds`).
+    Les dernières transitions sont gardées avec l'état (stats()).
+    """
+
+    KEEP_TRANSITIONS = 20
+
+    def __init__(self, path: Path, failures: int = 5, slow_seconds: float = 4.0,
+                 open_seconds: float = 30.0, max_open_seconds: float = 300.0, probe_seconds: float = 15.0):
+        self.path = Path(path)
+        self.failures = max(1, int(failures))
+        self.slow_seconds = float(slow_seconds)
+        self.open_seconds = float(open_seconds)
+        self.max_open_seconds = max(self.open_seconds, float(max_open_seconds))
+        # Sonde sans nouvelles au-delà de ce délai (worker tué…) : une autre peut partir.
+        self.probe_seconds = float(probe_seconds)
+
+    @contextmanager
+    def _locked_state(self):
+        with locked_json(self.path) as state:
+            state.setdefault("state", CLOSED)
+            state.setdefault("consecutive_failures", 0)
+            state.setdefault("open_until", 0.0)
+            state.setdefault("probe_until", 0.0)
+            state.setdefault("cooldown", self.open_seconds)
+            state.setdefault("transitions", [])
+            state.setdefault("counters", _breaker_counters())
+            yield state, time.time()
+
+    def _move(self, state: Dict[str, Any], now: float, to: str, reason: str) -> None:
+        state["transitions"].append({"at": round(now, 3), "from": state["state"], "to": to, "reason": reason})
+        del state["transitions"][:-self.KEEP_TRANSITIONS]
+        state["state"] = to
+
+    def allow(self) -> bool:
+        """
+        True si l'appel est la sonde de fermeture, False pour un appel normal ;
+        CircuitOpen si le disjoncteur est ouvert (ou une sonde déjà en cours).
+        """
+        with self._locked_state() as (state, now):
+            counters = state["counters"]
+            if state["state"] == CLOSED:
+                counters["calls"] += 1
+                return False
+            if state["state"] == OPEN and now >= state["open_until"]:
+                self._move(state, now, HALF_OPEN, "fin du délai d'ouverture")
+            if state["state"] == HALF_OPEN and now >= state["probe_until"]:
+                state["probe_until"] = now + self.probe_seconds
+                counters["calls"] += 1
+                counters["probes"] += 1
+                return True
+            counters["rejected"] += 1
+            retry_after = max(state["open_until"], state["probe_until"]) - now
+        raise CircuitOpen("YGOPRODeck indisponible (disjoncteur ouvert)", retry_after=max(1.0, retry_after))
+
+    def record(self, ok: bool, elapsed: float, probe: bool = False, reason: str = "") -> None:
+        """Résultat d'un appel autorisé par allow() (durée en secondes)."""
+        slow = ok and elapsed > self.slow_seconds
+        with self._locked_state() as (state, now):
+            counters = state["counters"]
+            if slow:
+                counters["slow"] += 1
+                reason = f"réponse lente ({elapsed:.1f}s)"
+            if ok and not slow:
+                state["consecutive_failures"] = 0
+                if probe and state["state"] == HALF_OPEN:
+                    state["cooldown"] = self.open_seconds
+                    state["probe_until"] = 0.0
+                    self._move(state, now, CLOSED, "sonde réussie")
+                return
+            counters["failures"] += 1
+            state["consecutive_failures"] += 1
+            if probe and state["state"] == HALF_OPEN:
+                state["cooldown"] = min(self.max_open_seconds, state["cooldown"] * 2)
+            elif state["state"] != CLOSED or state["consecutive_failures"] < self.failures:
+                # Appel parti avant l'ouverture : déjà compté, rien à basculer.
+                return
+            state["open_until"] = now + state["cooldown"]
+            state["probe_until"] = 0.0
+            self._move(state, now, OPEN, reason or "échec")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._locked_state() as (state, now):
+            return {
+                "state": state["state"],
+                "consecutive_failures": state["consecutive_failures"],
+                "retry_in": round(max(0.0, state["open_until"] - now), 3) if state["state"] == OPEN else 0.0,
+                "cooldown": state["cooldown"],
+                "failure_threshold": self.failures,
+                "slow_seconds": self.slow_seconds,
+                "counters": state["counters"],
+                "transitions": state["transitions"],
+            }
+
+
+_breaker: Optional[CircuitBreaker] = None
+
+
+def breaker() -> CircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        _breaker = CircuitBreaker(
+            path=getattr(settings, "UPSTREAM_BREAKER_PATH", settings.BASE_DIR / ".ygoprodeck_breaker.json"),
+            failures=getattr(settings, "UPSTREAM_BREAKER_FAILURES", 5),
+            slow_seconds=getattr(settings, "UPSTREAM_BREAKER_SLOW_SECONDS", 4.0),
+            open_seconds=getattr(settings, "UPSTREAM_BREAKER_OPEN_SECONDS", 30.0),
+            max_open_seconds=getattr(settings, "UPSTREAM_BREAKER_MAX_OPEN_SECONDS", 300.0),
+        )
+    return _breaker
+
+
+def retry_after_seconds(resp: requests.Response, default: float = 60.0) -> float:
+    """Retry-After en secondes (entier ou date HTTP), `default` s'il est absent/illisible."""
+    value = (resp.headers.get("Retry-After") or "").strip()
+    if not value:
+        return default
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+def backoff(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Backoff exponentiel avec gigue ("full jitter") : uniforme dans [0, base * 2^attempt]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def safe_get(url: str, params: Optional[Dict[str, Any]] = None, priority: str = BULK,
+             timeout=(5, 30), attempts: int = 3, max_wait: Optional[float] = None) -> requests.Response:
+    """
+    GET à travers le limiteur partagé :
+    - un jeton par tentative (priorité `priority`, attente bornée par `max_wait`),
+    - 429 → Retry-After appliqué à tous les processus, puis nouvelle tentative,
+    - 5xx / erreur réseau → backoff exponentiel avec gigue.
+    Les autres réponses (200, 400…) sont renvoyées telles quelles.
+    Lève UpstreamError après `attempts` échecs, RateLimited si le jeton n'arrive pas à temps.
+    """
+    bucket = limiter()
+    error = ""
+    for attempt in range(attempts):
+        bucket.acquire(priority, max_wait=max_wait)
+        try:
+            resp = requests.get(url, params=params, timeout=timeout)
+        except requests.RequestException as e:
+            error = str(e)
+        else:
+            if resp.status_code == 429:
+                wait_for = retry_after_seconds(resp)
+                bucket.penalize(wait_for)
+                error = f"HTTP 429 (Retry-After {wait_for:.0f}s)"
+                continue
+            if resp.status_code not in RETRY_STATUSES:
+                return resp
+            error = f"HTTP {resp.status_code}"
+        if attempt + 1 < attempts:
+            delay = backoff(attempt)
+            if max_wait is not None:
+                delay = min(delay, max_wait)
+            time.sleep(delay)
+    raise UpstreamError(f"Échec GET {url} après {attempts} tentatives ({error})")
+
+
+def fetch_db_version() -> Any:
+    """
+    Récupère la "version" de la base via /checkDBVer.php.
+    Cette valeur change si de nouvelles cartes arrivent ou si la base est mise à jour.
+    """
+    r = safe_get(check_db_ver_url())
+    if r.status_code != 200:
+        # v7 renvoie 400 pour les paramètres invalides — ici on n'en envoie pas.
+        raise CommandError(f"checkDBVer a répondu {r.status_code}: {r.text[:200]}")
+    return r.json()   # ex: [{"database_version": "X.Y", "last_update": "YYYY-mm-dd HH:MM:SS"}]
+
+
+def download_all_cards(language: Optional[str] = None) -> requests.Response:
+    """
+    Télécharge *toutes* les cartes en une requête (réponse brute, pas encore décodée).
+    NOTE: en v7, appeler cardinfo.php sans filtre renvoie l'ensemble des cartes ;
+    `language` (fr, de…) localise les champs, None = anglais (langue par défaut).
+    """
+    params = {"language": language} if language else None
+    r = safe_get(cardinfo_url(), params=params)
+    if r.status_code != 200:
+        raise CommandError(f"cardinfo a répondu {r.status_code}: {r.text[:200]}")
+    return r
+
+
+def fetch_all_cards(language: Optional[str] = None) -> Dict[str, Any]:
+    """Comme download_all_cards, décodé : {"data": [ {card...}, ... ]}."""
+    return download_all_cards(language).json()
+
+
+# Taille de page par défaut : ~14 requêtes pour le catalogue complet.
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_WORKERS = 4
+
+
+def decode_page(raw: bytes) -> Dict[str, Any]:
+    """Page cardinfo décodée ; ValueError si le JSON est invalide ou sans 'data'."""
+    try:
+        payload = json.loads(raw)
+    except ValueError:
+        raise ValueError("réponse JSON invalide")
+    if not isinstance(payload, dict) or not isinstance(payload.get("data"), list):
+        raise ValueError("réponse sans 'data'")
+    return payload
+
+
+class PagedFetch:
+    """
+    Itérable de cartes (dicts cardinfo). `get(url, params)` doit renvoyer une
+    réponse requests (limiteur + retries réseau inclus, safe_get par défaut).
+    Après itération : bytes, pages, page_retries, wait_seconds, total_rows.
+    """
+
+    def __init__(self, url: Optional[str] = None, params: Optional[Dict[str, Any]] = None,
+                 page_size: int = DEFAULT_PAGE_SIZE, workers: int = DEFAULT_WORKERS,
+                 retries: int = 3, window: Optional[int] = None,
+                 get: Callable[..., Any] = safe_get):
+        if page_size <= 0:
+            raise ValueError("page_size doit être > 0")
+        self.get = get
+        self.url = url or cardinfo_url()
+        self.params = dict(params or {})
+        self.page_size = page_size
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.window = window or self.workers * 2
+        self.bytes = 0
+        self.pages = 0
+        self.page_retries = 0
+        self.wait_seconds = 0.0   # temps passé par le consommateur à attendre une page
+        self.total_rows: Optional[int] = None
+        # Compteurs incrémentés par plusieurs threads de téléchargement
+        self._lock = threading.Lock()
+
+    def fetch_page(self, offset: int) -> Dict[str, Any]:
+        """Une page décodée ({"data": [...], "meta": {...}}), retentée jusqu'à `retries` fois."""
+        error = ""
+        for attempt in range(self.retries + 1):
+            if attempt:
+                with self._lock:
+                    self.page_retries += 1
+                time.sleep(min(1 + attempt, 5))
+            try:
+                raw = self.fetch_raw(offset)
+            except CommandError as e:
+                error = str(e)
+                continue
+            if raw is None:
+                return {"data": [], "meta": {}}
+            try:
+                payload = decode_page(raw)
+            except ValueError as e:
+                # Corps tronqué / JSON invalide : on retente la page
+                error = str(e)
+                continue
+            with self._lock:
+                self.pages += 1
+            return payload
+        raise CommandError(f"Page offset={offset} en échec après {self.retries + 1} essais ({error})")
+
+    def fetch_raw(self, offset: int) -> Optional[bytes]:
+        """
+        Corps brut (non décodé) d'une page, ou None au-delà de la dernière
+        carte. Une seule tentative : CommandError si la réponse n'est pas 200.
+        Utilisé tel quel par le pipeline de synchro (décodage dans un autre processus).
+        """
+        params = dict(self.params, num=self.page_size, offset=offset)
+        # safe_get a déjà ses propres tentatives (réseau, 429, 5xx)
+        resp = self.get(self.url, params=params)
+        if resp.status_code == 400 and offset > 0:
+            # Au-delà de la dernière carte, l'API répond 400 ("No card matching…")
+            return None
+        if resp.status_code != 200:
+            raise CommandError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+        with self._lock:
+            self.bytes += len(resp.content)
+        return resp.content
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        first = self.fetch_page(0)
+        meta = first.get("meta") or {}
+        self.total_rows = int(meta.get("total_rows") or len(first["data"]))
+        yield from first["data"]
+
+        offsets = deque(range(self.page_size, self.total_rows, self.page_size))
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ygopro-page")
+        pending = set()
+        try:
+            def fill():
+                while offsets and len(pending) < self.window:
+                    pending.add(pool.submit(self.fetch_page, offsets.popleft()))
+
+            fill()
+            while pending:
+                t0 = time.perf_counter()
+                done, _not_done = wait(pending, return_when=FIRST_COMPLETED)
+                self.wait_seconds += time.perf_counter() - t0
+                for future in done:
+                    pending.discard(future)
+                    cards: List[Dict[str, Any]] = future.result()["data"]
+                    fill()
+                    yield from cards
+        finally:
+            # Arrêt anticipé (erreur d'écriture…) : on n'attend que les pages en vol.
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
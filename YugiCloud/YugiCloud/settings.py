@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +46,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'YugiCall.static_pipeline.PrecompressedStaticMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -76,12 +78,109 @@ WSGI_APPLICATION = 'YugiCloud.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+def _env_database(prefix, sqlite_name, fallback=None):
+    """
+    Configuration d'une base depuis l'environnement (<prefix>_ENGINE, _NAME, _USER,
+    _PASSWORD, _HOST, _PORT, _CONN_MAX_AGE). ENGINE = sqlite3 (défaut) ou postgresql
+    (PostgreSQL nécessite le paquet psycopg, non installé par défaut).
+    `fallback` : préfixe dont on reprend les valeurs non définies (sauf NAME).
+    """
+    def env(key, default=None):
+        value = os.environ.get(f'{prefix}_{key}')
+        if value is None and fallback and key != 'NAME':
+            value = os.environ.get(f'{fallback}_{key}')
+        return default if value is None else value
+
+    engine = env('ENGINE', 'sqlite3')
+    if engine in ('postgres', 'postgresql'):
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': env('NAME', 'yugicloud'),
+            'USER': env('USER', ''),
+            'PASSWORD': env('PASSWORD', ''),
+            'HOST': env('HOST', ''),
+            'PORT': env('PORT', ''),
+            # Connexions persistantes + vérification avant réutilisation.
+            'CONN_MAX_AGE': int(env('CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    # SQLite : CONN_MAX_AGE reste à 0, sinon un worker garderait l'ancienne
+    # génération du catalogue après une bascule blue/green.
+    return {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': env('NAME', BASE_DIR / sqlite_name),
     }
+
+
+DATABASES = {
+    'default': _env_database('YUGICLOUD_DB', 'db.sqlite3'),
+    # Catalogue de cartes (Card, CardSet, CardEN, CardSetEN), séparé des comptes/sessions.
+    # Sous SQLite, ce chemin est un lien vers la génération en service (voir YugiCall/catalog.py).
+    # Sous PostgreSQL, utiliser une base distincte (YUGICLOUD_CATALOG_DB_NAME, défaut: <nom>_catalog).
+    'catalog': _env_database('YUGICLOUD_CATALOG_DB', 'catalog.sqlite3', fallback='YUGICLOUD_DB'),
+}
+if DATABASES['catalog']['ENGINE'].endswith('postgresql') and 'YUGICLOUD_CATALOG_DB_NAME' not in os.environ:
+    DATABASES['catalog']['NAME'] = f"{DATABASES['default']['NAME']}_catalog"
+
+DATABASE_ROUTERS = ['YugiCall.catalog.CatalogRouter']
+
+# Profils SQLite appliqués à chaque connexion (voir YugiCall/sqlite_profile.py).
+# - web  : lectures concurrentes pendant les synchros (WAL), mmap + gros cache.
+# - sync : gros lots d'écritures, attend patiemment les verrous.
+SQLITE_PROFILES = {
+    'web': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,          # ms
+        'cache_size': -32768,          # KiB (valeur négative) → 32 Mio
+        'mmap_size': 268435456,        # 256 Mio
+        'temp_store': 'MEMORY',
+    },
+    'sync': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 60000,
+        'cache_size': -262144,         # 256 Mio
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+    },
+}
+SQLITE_PROFILE = os.environ.get('YUGICLOUD_SQLITE_PROFILE', 'web')
+
+
+# Cache Django (sessions "cache"/"cached_db", utilisateurs connectés de YugiLog/backends.py).
+# Par défaut : mémoire locale au worker. Avec plusieurs workers, pointer
+# YUGICLOUD_CACHE_BACKEND / YUGICLOUD_CACHE_LOCATION vers un cache partagé, par ex.
+# django.core.cache.backends.redis.RedisCache + redis://127.0.0.1:6379/1 (paquet redis).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('YUGICLOUD_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('YUGICLOUD_CACHE_LOCATION', 'yugicloud'),
+    },
+}
+
+# Stockage des sessions (YUGICLOUD_SESSION_ENGINE) :
+# - cached_db      : cache + écriture dans la base (défaut) ; lecture en cache,
+#                    la base ne sert qu'en cas d'absence dans le cache ;
+# - cache          : cache seul, aucun accès base (cache partagé obligatoire
+#                    avec plusieurs workers, sessions perdues au redémarrage) ;
+# - signed_cookies : session dans un cookie signé par SECRET_KEY, rien côté serveur ;
+# - db             : comportement historique, une ligne django_session par session.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
 }
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('YUGICLOUD_SESSION_ENGINE', 'cached_db')]
+
+# Authentification : utilisateur connecté mis en cache, hachage des mots de passe
+# dans un pool borné (YugiLog/backends.py, YugiLog/hashing.py).
+AUTHENTICATION_BACKENDS = ['YugiLog.backends.CachedModelBackend']
+AUTH_USER_CACHE_TIMEOUT = 300  # s
+# Hachages simultanés par processus, et hachages en attente avant de répondre 429
+PASSWORD_HASH_WORKERS = int(os.environ.get('YUGICLOUD_PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_QUEUE = 16
 
 
 # Password validation
@@ -126,6 +225,77 @@ STATICFILES_DIRS = [
     BASE_DIR / 'YugiWeb' / 'static',
 ]
 
+# Pipeline statique (YugiCall/static_pipeline.py) : noms hachés, variantes .gz/.br
+# produites par `manage.py collectstatic` dans STATIC_ROOT, servies par le processus
+# web avec Cache-Control immutable. Actif par défaut hors DEBUG (collectstatic requis).
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STATIC_PIPELINE = os.environ.get('YUGICLOUD_STATIC_PIPELINE', '0' if DEBUG else '1') == '1'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': 'YugiCall.static_pipeline.PrecompressedManifestStorage' if STATIC_PIPELINE
+        else 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+# Feuilles de style regroupées en un fichier au collectstatic ({% stylesheets %},
+# YugiCall/templatetags/static_bundles.py). Sans pipeline, chaque fichier est lié séparément.
+STATIC_BUNDLES = {
+    'css/site.css': ['css/global.css', 'css/navbar.css', 'css/index.css', 'css/footer.css'],
+}
+STATIC_BUNDLE_CSS = os.environ.get('YUGICLOUD_STATIC_BUNDLE', '1') == '1'
+
+# Miroir local des images de cartes (commande sync_images)
+CARD_IMAGES_ROOT = BASE_DIR / 'media' / 'cards'
+
+# Nombre max de cartes sérialisées gardées en mémoire par worker (YugiCall/lookup.py)
+CARD_CACHE_SIZE = 20000
+
+# Nombre max d'analyses de decks .ydk gardées en mémoire par worker (YugiCall/deck.py)
+DECK_CACHE_SIZE = 2000
+
+# Limiteur de débit YGOPRODeck commun à tous les processus de la machine
+# (YugiCall/ygoprodeck.py). L'API bannit 1 h au-delà de 20 req/s.
+# Marge de sécurité (<< 20/s) pour ne JAMAIS risquer le ban : 5 req/s au total.
+YGOPRODECK_RATE_PER_SEC = float(os.environ.get('YUGICLOUD_YGOPRODECK_RATE', 5))
+YGOPRODECK_BURST = 5
+# Jetons que les synchros laissent toujours aux recherches interactives
+YGOPRODECK_INTERACTIVE_RESERVE = 2
+YGOPRODECK_BUCKET_PATH = BASE_DIR / '.ygoprodeck_bucket.json'
+# Base de l'API : pointer vers le serveur de remplacement local pour tester hors ligne
+# (python manage.py fake_ygoprodeck → YUGICLOUD_YGOPRODECK_API_BASE=http://127.0.0.1:8099/api/v7).
+YGOPRODECK_API_BASE = os.environ.get('YUGICLOUD_YGOPRODECK_API_BASE', 'https://db.ygoprodeck.com/api/v7')
+
+# Disjoncteur des recherches relayées à YGOPRODeck (/api/cards-fr, YugiCall/ygoprodeck.py),
+# partagé par tous les processus : ouvert après N échecs ou réponses plus lentes que
+# SLOW_SECONDS d'affilée ; la vue répond alors depuis son cache ou le catalogue local.
+UPSTREAM_BREAKER_FAILURES = int(os.environ.get('YUGICLOUD_UPSTREAM_BREAKER_FAILURES', 5))
+UPSTREAM_BREAKER_SLOW_SECONDS = float(os.environ.get('YUGICLOUD_UPSTREAM_BREAKER_SLOW', 4.0))
+UPSTREAM_BREAKER_OPEN_SECONDS = 30.0       # premier délai avant sonde, doublé à chaque sonde ratée
+UPSTREAM_BREAKER_MAX_OPEN_SECONDS = 300.0
+UPSTREAM_BREAKER_PATH = BASE_DIR / '.ygoprodeck_breaker.json'
+# Dernières réponses YGOPRODeck gardées par worker pour les servir (périmées) pendant une panne.
+UPSTREAM_STALE_CACHE_BYTES = int(os.environ.get('YUGICLOUD_UPSTREAM_STALE_CACHE_BYTES', 32 * 1024 * 1024))
+
+# Processus de décodage / transformation des pages pendant une synchro par pages
+# (YugiCall/pipeline.py) : téléchargement, transformation et écriture en parallèle.
+# 0 = chemin série (décodage dans le processus qui écrit), défaut sur une machine à 1 cœur.
+SYNC_TRANSFORM_WORKERS = int(os.environ.get('YUGICLOUD_SYNC_TRANSFORM_WORKERS', min(7, (os.cpu_count() or 1) - 1)))
+
+# Pages de recherche rendues en streaming (YugiWeb/streaming.py) : premier octet
+# immédiat, lignes envoyées par paquets de SEARCH_STREAM_CHUNK cartes.
+SEARCH_STREAM_HTML = os.environ.get('YUGICLOUD_SEARCH_STREAM_HTML', '1') == '1'
+SEARCH_STREAM_CHUNK = 200
+
+# Cache des résultats de recherche par worker (YugiCall/search.py) : listes d'ids par
+# (langue, filtre, tri, version du catalogue). Bornes : nombre de recherches gardées et
+# nombre total d'ids (8 octets chacun, ~16 Mo pour 2 millions). 0 recherche = désactivé.
+SEARCH_RESULT_CACHE_SIZE = int(os.environ.get('YUGICLOUD_SEARCH_RESULT_CACHE_SIZE', 1024))
+SEARCH_RESULT_CACHE_IDS = 2_000_000
+
+# Moteur colonnaire en mémoire (NumPy) pour les filtres atk/def/niveau (YugiCall/columnar.py).
+# Sans NumPy installé, ce réglage est ignoré et la recherche reste en SQL.
+COLUMNAR_SEARCH = os.environ.get('YUGICLOUD_COLUMNAR_SEARCH', '0') == '1'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class YugilogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'YugiLog'
+
+    def ready(self):
+        # Invalide le cache d'utilisateurs de YugiLog/backends.py.
+        from django.contrib.auth import get_user_model
+        from django.db.models.signals import post_delete, post_save
+
+        from YugiLog.backends import forget_user
+
+        User = get_user_model()
+        post_save.connect(forget_user, sender=User, dispatch_uid="yugilog_forget_user_save")
+        post_delete.connect(forget_user, sender=User, dispatch_uid="yugilog_forget_user_delete")
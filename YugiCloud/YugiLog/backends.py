@@ -0,0 +1,69 @@
+# YugiLog/backends.py
+# -*- coding: utf-8 -*-
+"""
+Backend d'authentification de YugiCloud (AUTHENTICATION_BACKENDS).
+
+- authenticate : hachage du mot de passe délégué à YugiLog/hashing.py ;
+  la lecture de l'utilisateur reste sur le thread de la requête.
+- get_user : appelé à chaque page vue par un utilisateur connecté
+  (AuthenticationMiddleware). L'utilisateur est gardé dans le cache Django
+  (AUTH_USER_CACHE_TIMEOUT secondes) : plus de SELECT auth_user par requête.
+  Toute sauvegarde/suppression d'un User invalide l'entrée (signaux branchés
+  dans YugiLog/apps.py) ; un changement de mot de passe invalide donc aussi
+  les sessions, comme avec ModelBackend. Les mises à jour en masse
+  (queryset.update) ne passent pas par les signaux : le délai d'expiration
+  borne alors le retard.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from YugiLog import hashing
+
+UserModel = get_user_model()
+
+
+def user_cache_key(user_id) -> str:
+    return f"yugilog:user:{user_id}"
+
+
+def forget_user(sender, instance, **kwargs):
+    """Receveur post_save / post_delete sur le modèle User."""
+    cache.delete(user_cache_key(instance.pk))
+
+
+class CachedModelBackend(ModelBackend):
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Même coût qu'un vrai essai : le temps de réponse ne doit pas
+            # révéler si le nom d'utilisateur existe.
+            hashing.make_password(password)
+            return None
+
+        is_correct, must_update = hashing.verify_password(password, user.password)
+        if not is_correct or not self.user_can_authenticate(user):
+            return None
+        if must_update:
+            # Hasher par défaut changé (ou itérations augmentées) : on ré-encode.
+            user.password = hashing.make_password(password)
+            user.save(update_fields=["password"])
+        return user
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
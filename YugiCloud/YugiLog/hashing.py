@@ -0,0 +1,60 @@
+# YugiLog/hashing.py
+# -*- coding: utf-8 -*-
+"""
+Hachage des mots de passe hors du thread de la requête.
+
+PBKDF2 coûte plusieurs centaines de ms de CPU par appel (c'est voulu). Sans
+limite, une rafale de connexions occupe tous les cœurs et les pages des
+autres visiteurs attendent. Ici :
+- les hachages passent par un petit pool de threads dédié
+  (PASSWORD_HASH_WORKERS), hashlib relâchant le GIL pendant le calcul ;
+- au plus PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE hachages en cours ou
+  en attente par processus : au-delà, HashingBusy est levée tout de suite
+  (la vue répond 429) au lieu d'empiler les requêtes.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class HashingBusy(Exception):
+    """Trop de hachages en cours dans ce processus."""
+
+
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_slots: Optional[threading.BoundedSemaphore] = None
+
+
+def _pool() -> Tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = max(1, settings.PASSWORD_HASH_WORKERS)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+            _slots = threading.BoundedSemaphore(workers + max(0, settings.PASSWORD_HASH_QUEUE))
+        return _executor, _slots
+
+
+def run(fn: Callable, *args):
+    """Exécute fn(*args) dans le pool et attend le résultat (HashingBusy si saturé)."""
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def make_password(password: str) -> str:
+    return run(hashers.make_password, password)
+
+
+def verify_password(password: str, encoded: str) -> Tuple[bool, bool]:
+    """(mot de passe correct, hash à mettre à jour vers le hasher préféré)"""
+    return run(hashers.verify_password, password, encoded)
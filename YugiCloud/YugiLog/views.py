@@ -2,11 +2,18 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.models import User
 
+from YugiLog import hashing
+
+BUSY_MESSAGE = 'Trop de connexions en cours, réessayez dans quelques secondes.'
+
 def login_user(request):
 	if request.method == 'POST':
 		username = request.POST.get('username')
 		password = request.POST.get('password')
-		user = authenticate(request, username=username, password=password)
+		try:
+			user = authenticate(request, username=username, password=password)
+		except hashing.HashingBusy:
+			return render(request, 'page/login.html', {'message': BUSY_MESSAGE}, status=429)
 
 		if user is not None:
 			login(request, user)
@@ -27,7 +34,12 @@ def register_user(request):
 		password = request.POST.get('password')
 		rep_password = request.POST.get('rep_password')
 		if rep_password == password:
-			User.objects.create_user(username, password=password)
+			# Équivalent de User.objects.create_user, hachage hors du thread de la requête
+			try:
+				encoded = hashing.make_password(password)
+			except hashing.HashingBusy:
+				return render(request, 'page/register.html', {'message': BUSY_MESSAGE}, status=429)
+			User.objects.create(username=User.normalize_username(username), password=encoded)
 			return redirect('YugiLog:login')
 		else:
 			return render(request, 'page/register.html', {'message': 'Les mots de passes ne sont pas identiques !'})
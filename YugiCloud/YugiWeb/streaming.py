@@ -0,0 +1,70 @@
+# YugiWeb/streaming.py
+# -*- coding: utf-8 -*-
+"""
+Rendu progressif des pages de recherche (settings.SEARCH_STREAM_HTML).
+
+La page est rendue une première fois avec des marqueurs (contexte "stream")
+autour du tableau, à la place de ses lignes et du nombre de résultats, et
+autour du message "Aucun résultat". On envoie tout de suite ce qui précède
+le tableau (en-tête, formulaire), puis, au premier paquet non vide, le début
+du tableau (<thead>) et les lignes par paquets de SEARCH_STREAM_CHUNK cartes,
+relues par clé primaire (YugiCall.search.hydrate) et rendues avec
+page/_search_rows.html ; enfin la fin du tableau avec le nombre de résultats,
+ou le message "Aucun résultat" s'il n'y a eu aucune ligne, et la fin de page.
+
+- le premier octet part avant toute requête SQL (y compris la recherche des
+  ids, quand elle n'est pas dans le cache de résultats) : il ne dépend plus
+  du nombre de résultats ;
+- le worker ne garde en mémoire qu'un paquet de cartes (+ leurs sets,
+  préchargés par paquet) au lieu de toute la page.
+"""
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+from YugiCall.search import hydrate
+
+TABLE_MARKER = mark_safe("<!--yc:table-->")
+ROWS_MARKER = mark_safe("<!--yc:rows-->")
+COUNT_MARKER = mark_safe("<!--yc:count-->")
+EMPTY_MARKER = mark_safe("<!--yc:empty-->")
+END_MARKER = mark_safe("<!--yc:end-->")
+ROWS_TEMPLATE = "page/_search_rows.html"
+
+STREAM_MARKERS = {"table": TABLE_MARKER, "rows": ROWS_MARKER, "count": COUNT_MARKER,
+                  "empty": EMPTY_MARKER, "end": END_MARKER}
+
+
+def stream_search_page(request, template_name, context, card_model, get_ids):
+    """
+    StreamingHttpResponse de `template_name` ; `get_ids()` renvoie les ids des
+    cartes à afficher, dans l'ordre (appelée une fois l'en-tête envoyé).
+    """
+    page = render_to_string(template_name, {**context, "stream": STREAM_MARKERS}, request)
+    head, _, rest = page.partition(TABLE_MARKER)
+    table_head, _, rest = rest.partition(ROWS_MARKER)
+    table_tail, _, rest = rest.partition(EMPTY_MARKER)
+    empty, _, tail = rest.partition(END_MARKER)
+    rows_template = get_template(ROWS_TEMPLATE)
+    chunk_size = settings.SEARCH_STREAM_CHUNK
+
+    def content():
+        yield head
+        count = 0
+        for chunk in hydrate(card_model, get_ids(), chunk_size):
+            if not chunk:
+                continue
+            if not count:
+                # Tableau ouvert seulement s'il y a au moins une ligne.
+                yield table_head
+            count += len(chunk)
+            yield rows_template.render({"cards": chunk}, request)
+        yield table_tail.replace(COUNT_MARKER, str(count)) if count else empty
+        yield tail
+
+    response = StreamingHttpResponse(content(), content_type="text/html; charset=utf-8")
+    # Désactive la mise en tampon de nginx : chaque paquet part dès qu'il est rendu.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -1,3 +1,43 @@
-from django.test import TestCase
+from urllib.parse import urlencode
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+
+from YugiCall import synthetic
+from YugiCall.loader import orm_load
+from YugiCall.models import Card, CardSet
+
+
+@override_settings(SEARCH_STREAM_HTML=True)
+class StreamedSearchPageTests(TestCase):
+    """Page de recherche rendue par paquets (YugiWeb/streaming.py)."""
+
+    databases = {"default", "catalog"}
+
+    def get_body(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_no_result_shows_empty_state(self):
+        body = self.get_body("/search/fr/?field=name&q=zzzzqqq")
+        self.assertIn("Aucun résultat", body)
+        self.assertNotIn("<table", body)
+
+    def test_head_is_sent_before_any_catalog_query(self):
+        response = self.client.get("/search/en/?field=name&q=zzzzqqq")
+        chunks = iter(response.streaming_content)
+        with self.assertNumQueries(0, using="catalog"):
+            first = next(chunks).decode()
+        self.assertIn("<form", first)
+        self.assertNotIn("<table", first)
+        rest = b"".join(chunks).decode()
+        self.assertIn("No results", rest)
+        self.assertNotIn("<table", rest)
+
+    def test_results_are_streamed_in_table(self):
+        cards = list(synthetic.generate_cards(5, seed=1))
+        orm_load(Card, CardSet, cards, using="catalog")
+        body = self.get_body("/search/fr/?" + urlencode({"field": "name", "q": cards[0]["name"]}))
+        self.assertIn("<table", body)
+        self.assertIn("1 résultat(s)", body)
+        self.assertNotIn("Aucun résultat", body)
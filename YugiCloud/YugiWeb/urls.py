@@ -7,4 +7,6 @@ urlpatterns = [
     path('', views.accueil, name="accueil"),
 	path('search/fr/', views.recherche_BDD, name="search_fr"),
 	path('search/en/', views.recherche_BDD_en, name="search_en"),
+	path('sets/', views.extensions, name="sets"),
+	path('sets/<int:set_id>/', views.extension_detail, name="set_detail"),
 ]
\ No newline at end of file
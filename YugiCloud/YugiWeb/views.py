@@ -16,22 +16,39 @@ from YugiCall.models import Card  # ← adapte le chemin si nécessaire
 
 from .views import Card
 
+# Filtres partagés avec l'API JSON, résultats mis en cache (ids) par version du catalogue.
+from functools import partial
+from YugiCall.search import hydrate, search_ids
+
+from django.conf import settings
+
+# Rendu progressif des tableaux de résultats (voir YugiWeb/streaming.py).
+from .streaming import stream_search_page
+
 
 # Déclare les champs autorisés dans la liste déroulante :
 # - tuple (fname, label, ftype)
 #   - fname  : chemin ORM du champ (peut inclure des jointures via "__")
 #   - label  : texte affiché dans <option>
 #   - ftype  : "text" => on fera __icontains ; "number" => on comparera par égalité (=)
+#              "choice" => peu de valeurs distinctes : égalité indexée sur les valeurs
+#              qui contiennent le terme (voir YugiCall/search.py)
+#              "prefix" => "commence par" sur une colonne clé (name_key) via son index
+#   Texte, préfixe et choix ignorent la casse et les accents ("tenebres" → "Ténèbres").
 FIELDS_CONFIG = [
     ("name",      "Nom",       "text"),    # Card.name : champ texte
-    ("archetype", "Archétype", "text"),    # Card.archetype : champ texte
-    ("type",      "Type",      "text"),    # Card.type : champ texte
-    ("attribute", "Attribut",  "text"),    # Card.attribute : champ texte
-    ("race",      "Race",      "text"),    # Card.race : champ texte
+    ("name_key",  "Nom (commence par)", "prefix"),  # Card.name_key : nom normalisé indexé
+    ("archetype", "Archétype", "choice"),  # Card.archetype : champ texte indexé
+    ("type",      "Type",      "choice"),  # Card.type : champ texte indexé
+    ("attribute", "Attribut",  "choice"),  # Card.attribute : champ texte indexé
+    ("race",      "Race",      "choice"),  # Card.race : champ texte indexé
     ("desc",     "Description", "text"),
     ("level",     "Niveau",    "number"),  # Card.level : champ entier
     ("atk",       "ATK",       "number"),  # Card.atk : champ entier
-    ("def",       "DEF",       "number"),  # Card.def : champ entier
+    ("def_stat",  "DEF",       "number"),  # Card.def_stat : champ entier ('def' est réservé en Python)
+    ("scale",     "Échelle Pendule", "number"),  # Card.scale : monstres Pendule
+    ("linkval",   "Lien",      "number"),  # Card.linkval : Link Rating
+    ("ban_tcg",   "Banlist TCG", "choice"),  # Card.ban_tcg : Banned / Limited / Semi-Limited
     # Exemple de FK/M2M : décommente si tu as une relation vers CardSet
     # ("cardset__name", "Extension (nom du set)", "text"),
 ]
@@ -59,53 +76,30 @@ def recherche_BDD(request):
     # - .order_by("name") : tri par nom pour un affichage stable
     cards = Card.objects.all().order_by("name")
 
-    # Si l’utilisateur a saisi quelque chose, on tente d’appliquer le filtre
-    if q:
-        # Construis un index {fname: (label, ftype)} pour valider rapidement le champ
-        config_by_field = {fname: (label, ftype) for fname, label, ftype in FIELDS_CONFIG}
-
-        # Vérifie que le champ demandé existe dans la config
-        if field in config_by_field:
-            label, ftype = config_by_field[field]
-
-            # Cas champ texte : on utilise le lookup __icontains (contient, insensible à la casse)
-            if ftype == "text":
-                # .filter(**{f"{field}__icontains": q})
-                # - **{...} : passe un dict comme arguments nommés (clé = "champ__lookup")
-                # - f"{field}__icontains" : ex. "name__icontains"
-                # - q : la valeur saisie
-                cards = cards.filter(**{f"{field}__icontains": q})
-
-            # Cas champ numérique : on applique une égalité stricte, mais seulement si q est entier valide
-            elif ftype == "number":
-                # q.lstrip("-").isdigit() : True si "123" ou "-123" (évite ValueError à la conversion)
-                if q.lstrip("-").isdigit():
-                    cards = cards.filter(**{field: int(q)})  # ex. {"atk": 2500}
-                else:
-                    # Si l’utilisateur tape "dragon" sur un champ numérique, on choisit de renvoyer 0 résultat
-                    cards = cards.none()
-        else:
-            # Champ inconnu (ex. modification côté front non prévue) → 0 résultat pour rester explicite
-            cards = cards.none()
-
-    # .distinct() : utile si tu ajoutes des jointures (FK/M2M) pouvant créer des doublons
-    cards = cards.distinct()
-
-    # Rend le template avec le contexte :
-    # - "cards" : queryset filtrée
+    # Applique le filtre choisi (texte → "contient", nombre → égalité ;
+    # champ inconnu ou nombre invalide → 0 résultat). Voir YugiCall/search.py :
+    # les filtres numériques peuvent y passer par le moteur colonnaire, et la
+    # liste des ids retenus est gardée en cache jusqu'à la prochaine synchro.
+    get_ids = partial(search_ids, cards, FIELDS_CONFIG, field, q, "fr")
+
+    # Contexte du template :
     # - "q"     : valeur saisie (pour préremplir l’input)
     # - "field" : champ choisi (pour garder la sélection)
     # - "fields_config" : pour générer les <option> du select
-    return render(
-        request,
-        "page/search_ad.html",
-        {
-            "cards": cards,
-            "q": q,
-            "field": field,
-            "fields_config": FIELDS_CONFIG,
-        },
-    )
+    context = {
+        "q": q,
+        "field": field,
+        "fields_config": FIELDS_CONFIG,
+    }
+
+    # Mode streaming : en-tête + formulaire envoyés tout de suite, puis les
+    # lignes par paquets au fil de la lecture, puis le nombre de résultats.
+    if settings.SEARCH_STREAM_HTML:
+        return stream_search_page(request, "page/search_ad.html", context, Card, get_ids)
+
+    # Sinon, page rendue d'un bloc ("cards" : cartes relues par clé primaire, sets préchargés).
+    context["cards"] = [card for chunk in hydrate(Card, get_ids(), settings.SEARCH_STREAM_CHUNK) for card in chunk]
+    return render(request, "page/search_ad.html", context)
 
 def recherche(request):
 	return render(request, "page/search.html")
@@ -116,14 +110,18 @@ def recherche(request):
 # Config des champs pour la recherche EN (mêmes noms de champs que FR)
 FIELDS_CONFIG_EN = [
     ("name",      "Nom (EN)",       "text"),
-    ("archetype", "Archétype",      "text"),
-    ("type",      "Type",           "text"),
-    ("attribute", "Attribut",       "text"),
-    ("race",      "Race",           "text"),
+    ("name_key",  "Nom (EN, commence par)", "prefix"),
+    ("archetype", "Archétype",      "choice"),
+    ("type",      "Type",           "choice"),
+    ("attribute", "Attribut",       "choice"),
+    ("race",      "Race",           "choice"),
     ("desc",      "Description",    "text"),
     ("level",     "Niveau",         "number"),
     ("atk",       "ATK",            "number"),
     ("def_stat",  "DEF",            "number"),  # <-- DEF se nomme def_stat dans le modèle
+    ("scale",     "Pendulum Scale", "number"),
+    ("linkval",   "Link Rating",    "number"),
+    ("ban_tcg",   "TCG Banlist",    "choice"),
 ]
 
 def recherche_BDD_en(request):
@@ -138,26 +136,55 @@ def recherche_BDD_en(request):
 
     cards = CardEN.objects.all().order_by("name")
 
-    if q:
-        config_by_field = {fname: (label, ftype) for fname, label, ftype in FIELDS_CONFIG_EN}
-        if field in config_by_field:
-            _, ftype = config_by_field[field]
-            if ftype == "text":
-                cards = cards.filter(**{f"{field}__icontains": q})
-            elif ftype == "number":
-                cards = cards.filter(**{field: int(q)}) if q.lstrip("-").isdigit() else cards.none()
-        else:
-            cards = cards.none()
-
-    cards = cards.distinct()
-
-    return render(
-        request,
-        "page/search_ad_en.html",   # on réutilise le même template
-        {
-            "cards": cards,
-            "q": q,
-            "field": field,
-            "fields_config": FIELDS_CONFIG_EN,  # on passe la config EN pour le select
-        },
-    )
+    get_ids = partial(search_ids, cards, FIELDS_CONFIG_EN, field, q, "en")
+
+    context = {
+        "q": q,
+        "field": field,
+        "fields_config": FIELDS_CONFIG_EN,  # on passe la config EN pour le select
+    }
+    if settings.SEARCH_STREAM_HTML:
+        return stream_search_page(request, "page/search_ad_en.html", context, CardEN, get_ids)
+
+    context["cards"] = [card for chunk in hydrate(CardEN, get_ids(), settings.SEARCH_STREAM_CHUNK) for card in chunk]
+    return render(request, "page/search_ad_en.html", context)
+
+
+# --- Extensions (sets) ---
+
+from django.core.paginator import Paginator
+from django.shortcuts import get_object_or_404
+from YugiCall import setsummary
+from YugiCall.catalog import LANGUAGES
+from YugiCall.models import SetSummary
+
+SETS_PER_PAGE = 100
+PRINTINGS_PER_PAGE = 200
+
+
+def extensions(request):
+    """
+    Liste des extensions depuis les résumés précalculés (SetSummary) :
+    - GET ?lang=fr|en & q=<code ou nom> & page=N
+    - q : début de code produit ("LOB", "BLRR-") ou morceau du nom
+    Aucun agrégat calculé ici : une ligne lue par extension affichée.
+    """
+    lang = (request.GET.get("lang") or "fr").strip().lower()
+    if lang not in LANGUAGES:
+        lang = "fr"
+    q = (request.GET.get("q") or "").strip()
+    page = Paginator(setsummary.find_sets(lang, q), SETS_PER_PAGE).get_page(request.GET.get("page"))
+    return render(request, "page/sets.html", {"lang": lang, "q": q, "languages": LANGUAGES, "page": page})
+
+
+def extension_detail(request, set_id):
+    """
+    Résumé d'une extension + une page de ses impressions (lues par l'index sur
+    set_name) ; le nombre de pages vient du résumé, sans COUNT(*).
+    """
+    summary = get_object_or_404(SetSummary, pk=set_id)
+    paginator = Paginator(setsummary.set_printings(summary), PRINTINGS_PER_PAGE)
+    paginator.count = summary.printings
+    context = {"summary": summary, "page": paginator.get_page(request.GET.get("page"))}
+    return render(request, "page/set_detail.html", context)
+